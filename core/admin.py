@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import TaxHousehold, HouseholdMember, BankAccount, AccountType, PaymentMethod
+from .models import TaxHousehold, HouseholdMember, BankAccount, AccountType, PaymentMethod, ExchangeRate, MonthlyRollup
 
 class HouseholdMemberInline(admin.TabularInline):
     model = HouseholdMember
@@ -63,3 +63,16 @@ class PaymentMethodAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ('date', 'base_currency', 'currency', 'rate')
+    list_filter = ('base_currency', 'currency')
+    date_hierarchy = 'date'
+    readonly_fields = ('created_at',)
+
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ('month', 'tax_household', 'account', 'category', 'transaction_type', 'is_transfer', 'count', 'amount')
+    list_filter = ('transaction_type', 'is_transfer', 'tax_household')
+    date_hierarchy = 'month'
@@ -9,3 +9,6 @@ class CoreConfig(AppConfig):
         # Register translations when the app is ready
         from .translation_loader import register_translations
         register_translations()
+        
+        # Connect the model signal handlers
+        from . import signals  # noqa: F401
@@ -23,4 +23,13 @@ def currency_context(request):
     return {
         'supported_currencies': CurrencyExchangeService.SUPPORTED_CURRENCIES,
         'selected_currency': selected_currency,
+    }
+
+def household_context(request):
+    """
+    Context processor that exposes the per-request household data (see
+    HouseholdContextMiddleware). Nothing is loaded until a template reads it.
+    """
+    return {
+        'household_ctx': getattr(request, 'household_ctx', None),
     }
\ No newline at end of file
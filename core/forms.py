@@ -1,7 +1,13 @@
+import re
 from django import forms
 from django.forms import inlineformset_factory
 from django.utils.translation import gettext_lazy as _
-from .models import TaxHousehold, HouseholdMember, BankAccount, AccountType, PaymentMethod, TransactionCategory, CostCenter, Transaction
+from .models import TaxHousehold, HouseholdMember, BankAccount, AccountType, PaymentMethod, TransactionCategory, CostCenter, Transaction, CategorizationRule, OccurrenceException
+from .utils.system_objects import get_bank_transfer_method, get_transfer_category
+
+def model_choices(field, choices):
+    """Choices of a ModelChoiceField from (pk, label) pairs loaded beforehand, so rendering does not query"""
+    return ([] if field.empty_label is None else [('', field.empty_label)]) + list(choices)
 
 class DateInput(forms.DateInput):
     input_type = 'date'
@@ -186,7 +192,12 @@ class TransactionForm(forms.ModelForm):
         widget=forms.Select(attrs={'class': 'form-control'})
     )
     
-    def __init__(self, *args, household=None, **kwargs):
+    def __init__(self, *args, household=None, household_ctx=None, **kwargs):
+        # household_ctx (request.household_ctx) provides the household and the cached
+        # choices of its fields, instead of querying them again
+        if household is None and household_ctx is not None:
+            household = household_ctx.household
+        
         # Check if this is a transfer form submission
         is_transfer = False
         if args and len(args) > 0 and isinstance(args[0], dict) and args[0].get('is_transfer') == 'on':
@@ -208,6 +219,7 @@ class TransactionForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         self.household = household
+        self.household_ctx = household_ctx
         
         # Special handling for transfers - if this is a transfer submission,
         # make certain fields not required since they'll be auto-filled
@@ -227,15 +239,27 @@ class TransactionForm(forms.ModelForm):
             self.fields['category'].queryset = TransactionCategory.objects.filter(tax_household=household)
             
             # Filter bank accounts by the household members
-            members = HouseholdMember.objects.filter(tax_household=household)
-            bank_accounts = BankAccount.objects.filter(members__in=members).distinct()
+            bank_accounts = BankAccount.objects.filter(tax_household=household)
             
             # Set account queryset for both fields
             self.fields['account'].queryset = bank_accounts
             self.fields['destination_account'].queryset = bank_accounts
             
-            # Make choices for the recipient selection
-            member_choices = [(str(member.id), f"{member.first_name} {member.last_name}") for member in members]
+            if household_ctx is not None:
+                # Render the choices from the cached snapshot of the household (the
+                # querysets are only read to validate submitted values)
+                choices = household_ctx.form_choices
+                self.fields['category'].choices = model_choices(self.fields['category'], choices['categories'])
+                for name in ('account', 'destination_account'):
+                    self.fields[name].choices = model_choices(self.fields[name], choices['accounts'])
+                self.fields['payment_method'].choices = model_choices(self.fields['payment_method'], choices['payment_methods'])
+                member_choices = choices['members']
+                account_count = len(choices['accounts'])
+            else:
+                # Make choices for the recipient selection
+                members = HouseholdMember.objects.filter(tax_household=household)
+                member_choices = [(str(member.id), f"{member.first_name} {member.last_name}") for member in members]
+                account_count = bank_accounts.count()
             
             # Create a custom choice field with Family and members (no external option)
             self.fields['recipient'] = forms.ChoiceField(
@@ -247,7 +271,7 @@ class TransactionForm(forms.ModelForm):
             )
             
             # Check if transfer option should be available (need at least 2 accounts)
-            if bank_accounts.count() < 2:
+            if account_count < 2:
                 self.fields['is_transfer'].widget = forms.HiddenInput()
                 self.fields['destination_account'].widget = forms.HiddenInput()
             
@@ -384,126 +408,11 @@ class TransactionForm(forms.ModelForm):
             # For transfers, set transaction type to expense (we'll create the matching income transaction separately)
             cleaned_data['transaction_type'] = 'expense'
             
-            # For transfers, try to find or create a Transfer category
+            # For transfers, use the Transfer category and the Bank Transfer payment
+            # method (provisioned system objects, resolved from the cache)
             if self.household:
-                try:
-                    # First, try to find or create a Transfer cost center
-                    transfer_cost_center = None
-                    try:
-                        # Check if Transfer cost center already exists
-                        transfer_cost_centers = CostCenter.objects.filter(
-                            tax_household=self.household,
-                            name="Transfer"
-                        )
-                        
-                        if transfer_cost_centers.exists():
-                            # Use existing Transfer cost center
-                            transfer_cost_center = transfer_cost_centers.first()
-                        else:
-                            # Create a new Transfer cost center with a neutral gray color
-                            transfer_cost_center = CostCenter.objects.create(
-                                tax_household=self.household,
-                                name="Transfer",
-                                color="#8a92a9"  # Using the gray from color_choices
-                            )
-                            print(f"DEBUG - Created new Transfer cost center: {transfer_cost_center}")
-                    except Exception as e:
-                        print(f"Warning: Could not create Transfer cost center: {e}")
-                    
-                    # Now find or create the Transfer category linked to the cost center
-                    transfer_categories = TransactionCategory.objects.filter(
-                        tax_household=self.household,
-                        name="Transfer"
-                    )
-                    
-                    if transfer_categories.exists():
-                        # Use existing Transfer category
-                        transfer_category = transfer_categories.first()
-                        # Ensure it's linked to the Transfer cost center if we have one
-                        if transfer_cost_center and transfer_category.cost_center != transfer_cost_center:
-                            transfer_category.cost_center = transfer_cost_center
-                            transfer_category.save()
-                    else:
-                        # Create a new Transfer category
-                        transfer_category = TransactionCategory.objects.create(
-                            tax_household=self.household,
-                            name="Transfer",
-                            cost_center=transfer_cost_center
-                        )
-                    
-                    # Set the category in cleaned data
-                    cleaned_data['category'] = transfer_category
-                    print(f"DEBUG - Set category to: {transfer_category}")
-                except Exception as e:
-                    print(f"Error with Transfer category: {e}")
-                    # If we can't create/get the category, try using any existing category
-                    categories = TransactionCategory.objects.filter(tax_household=self.household)
-                    if categories.exists():
-                        cleaned_data['category'] = categories.first()
-                        print(f"DEBUG - Used fallback category: {cleaned_data['category']}")
-                    else:
-                        # Critical error - create a simple default category as a last resort
-                        try:
-                            default_category = TransactionCategory.objects.create(
-                                tax_household=self.household,
-                                name="Other"
-                            )
-                            cleaned_data['category'] = default_category
-                            print(f"DEBUG - Created last resort category: {default_category}")
-                        except Exception as fallback_error:
-                            print(f"CRITICAL - Could not create any category: {fallback_error}")
-                            # At this point, we have to let validation fail
-            
-            # Find or create a special payment method for transfers if it doesn't exist
-            try:
-                # First check if we have any payment methods at all
-                payment_methods = PaymentMethod.objects.filter(is_active=True)
-                
-                if payment_methods.exists():
-                    # Try to find the Bank Transfer method
-                    bank_transfer_methods = payment_methods.filter(name="Bank Transfer")
-                    
-                    if bank_transfer_methods.exists():
-                        # Use existing Bank Transfer method
-                        bank_transfer_method = bank_transfer_methods.first()
-                    else:
-                        # Create a new Bank Transfer method
-                        bank_transfer_method = PaymentMethod.objects.create(
-                            name="Bank Transfer",
-                            icon="bi-bank",
-                            is_active=True
-                        )
-                else:
-                    # No payment methods exist, create a default one
-                    bank_transfer_method = PaymentMethod.objects.create(
-                        name="Bank Transfer",
-                        icon="bi-bank",
-                        is_active=True
-                    )
-                
-                # Set the payment method in the cleaned data
-                cleaned_data['payment_method'] = bank_transfer_method
-                print(f"DEBUG - Set payment method to: {bank_transfer_method}")
-            except Exception as e:
-                print(f"Error creating Bank Transfer payment method: {e}")
-                # If we can't create/get the payment method, use any available
-                payment_methods = PaymentMethod.objects.filter(is_active=True)
-                if payment_methods.exists():
-                    cleaned_data['payment_method'] = payment_methods.first()
-                    print(f"DEBUG - Used fallback payment method: {cleaned_data['payment_method']}")
-                else:
-                    # Critical error - create a simple default payment method as a last resort
-                    try:
-                        default_method = PaymentMethod.objects.create(
-                            name="Credit Card",
-                            icon="bi-credit-card",
-                            is_active=True
-                        )
-                        cleaned_data['payment_method'] = default_method
-                        print(f"DEBUG - Created last resort payment method: {default_method}")
-                    except Exception as fallback_error:
-                        print(f"CRITICAL - Could not create any payment method: {fallback_error}")
-                        # At this point, we have to let validation fail
+                cleaned_data['category'] = get_transfer_category(self.household)
+            cleaned_data['payment_method'] = get_bank_transfer_method(self.household)
             
             # For transfers, the recipient is determined by the account ownership
             # The appropriate recipient will be set in the view based on the source and destination accounts
@@ -600,3 +509,118 @@ class TransactionForm(forms.ModelForm):
             instance.save()
         
         return instance
+
+class CategorizationRuleForm(forms.ModelForm):
+    def __init__(self, *args, household=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        if household:
+            # Only offer categories and members of the current household
+            self.fields['category'].queryset = TransactionCategory.objects.filter(tax_household=household).order_by('name')
+            self.fields['recipient_member'].queryset = HouseholdMember.objects.filter(tax_household=household)
+        self.fields['payment_method'].queryset = PaymentMethod.objects.filter(is_active=True)
+    
+    class Meta:
+        model = CategorizationRule
+        fields = [
+            'name', 'match_type', 'pattern', 'transaction_type', 'min_amount', 'max_amount',
+            'category', 'payment_method', 'recipient_type', 'recipient_member', 'priority', 'is_active'
+        ]
+        widgets = {
+            'name': forms.TextInput(attrs={'class': 'form-control'}),
+            'match_type': forms.Select(attrs={'class': 'form-control'}),
+            'pattern': forms.TextInput(attrs={'class': 'form-control'}),
+            'transaction_type': forms.Select(attrs={'class': 'form-control'}),
+            'min_amount': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'max_amount': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'category': forms.Select(attrs={'class': 'form-control'}),
+            'payment_method': forms.Select(attrs={'class': 'form-control'}),
+            'recipient_type': forms.Select(attrs={'class': 'form-control'}),
+            'recipient_member': forms.Select(attrs={'class': 'form-control'}),
+            'priority': forms.NumberInput(attrs={'class': 'form-control'}),
+            'is_active': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        }
+        help_texts = {
+            'name': _('A descriptive name for the rule (e.g., "Supermarkets")'),
+            'pattern': _('Text to look for in the description (case-insensitive)'),
+        }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        
+        pattern = (cleaned_data.get('pattern') or '').strip()
+        cleaned_data['pattern'] = pattern
+        if pattern and cleaned_data.get('match_type') == 'regex':
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                self.add_error('pattern', _('Invalid regular expression: {}').format(e))
+        
+        min_amount = cleaned_data.get('min_amount')
+        max_amount = cleaned_data.get('max_amount')
+        if not pattern and min_amount is None and max_amount is None:
+            raise forms.ValidationError(_('A rule needs a pattern or an amount range.'))
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            self.add_error('max_amount', _('The maximum amount must be greater than the minimum amount.'))
+        
+        if cleaned_data.get('recipient_type') == 'member':
+            if not cleaned_data.get('recipient_member'):
+                self.add_error('recipient_member', _('Select the household member receiving matching transactions.'))
+        else:
+            cleaned_data['recipient_member'] = None
+        
+        return cleaned_data
+
+class OccurrenceExceptionForm(forms.ModelForm):
+    """
+    Change to one occurrence of a recurring transaction. The fields show the values of
+    the occurrence; only those that differ from the parent transaction are stored.
+    """
+    def __init__(self, *args, parent=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.parent = parent
+        
+        # Only offer categories of the parent's household; transfers keep their categories
+        if parent.is_transfer:
+            del self.fields['category']
+        else:
+            self.fields['category'].queryset = TransactionCategory.objects.filter(tax_household=parent.tax_household).order_by('name')
+        
+        if not self.is_bound:
+            self.initial.setdefault('date', self.instance.date or self.instance.occurrence_date)
+            self.initial.setdefault('amount', self.instance.amount if self.instance.amount is not None else parent.amount)
+            if 'category' in self.fields:
+                self.initial.setdefault('category', self.instance.category_id or parent.category_id)
+    
+    class Meta:
+        model = OccurrenceException
+        fields = ['is_skipped', 'date', 'amount', 'category']
+        widgets = {
+            'is_skipped': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'date': DateInput(attrs={'class': 'form-control'}),
+            'amount': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0.01'}),
+            'category': forms.Select(attrs={'class': 'form-control'}),
+        }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        
+        amount = cleaned_data.get('amount')
+        if amount is not None and amount <= 0:
+            self.add_error('amount', _('The amount must be greater than zero.'))
+        
+        # Values equal to the parent's are not stored, so later changes to the series still apply
+        if cleaned_data.get('date') == self.instance.occurrence_date:
+            cleaned_data['date'] = None
+        if amount == self.parent.amount:
+            cleaned_data['amount'] = None
+        if cleaned_data.get('category') is not None and cleaned_data['category'].pk == self.parent.category_id:
+            cleaned_data['category'] = None
+        
+        return cleaned_data
+    
+    def has_changes(self):
+        """Whether the cleaned values change the occurrence at all"""
+        return self.cleaned_data.get('is_skipped') or any(
+            self.cleaned_data.get(field) is not None for field in ('date', 'amount', 'category')
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core.utils.upcoming import advance_next_occurrences
+
+
+class Command(BaseCommand):
+    help = 'Advances the next occurrence date of recurring transactions (to be scheduled daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute the next occurrence of every recurring transaction')
+
+    def handle(self, *args, **options):
+        updated = advance_next_occurrences(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f'{updated} recurring transactions advanced'))
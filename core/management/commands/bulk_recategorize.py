@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import TaxHousehold, TransactionCategory, CostCenter
+from core.utils.export import parse_transaction_filters
+from core.utils.recategorization import move_categories_to_cost_center, recategorize_transactions, transactions_in_scope
+
+
+class Command(BaseCommand):
+    help = 'Moves transactions to a category, or categories to a cost center, with single UPDATE statements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('household', type=int, help='Id of the tax household')
+
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--to-category', type=int, help='Move the selected transactions to this category id')
+        target.add_argument(
+            '--to-cost-center',
+            help='Move the categories given with --categories to this cost center id ("none" to detach them)'
+        )
+
+        parser.add_argument('--categories', type=int, nargs='+', default=[], help='Category ids to move (with --to-cost-center)')
+        parser.add_argument('--category', help='Only transactions of this category id')
+        parser.add_argument('--account', help='Only transactions of this bank account id')
+        parser.add_argument('--type', choices=['expense', 'income'], help='Only transactions of this type')
+        parser.add_argument('--date-from', help='First transaction date (YYYY-MM-DD)')
+        parser.add_argument('--date-to', help='Last transaction date (YYYY-MM-DD)')
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Move every transaction of the household when no filter is given (with --to-category)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Count the rows in scope without updating them')
+
+    def handle(self, *args, **options):
+        try:
+            household = TaxHousehold.objects.get(pk=options['household'])
+        except TaxHousehold.DoesNotExist:
+            raise CommandError(f'Tax household {options["household"]} does not exist')
+
+        if options['to_cost_center'] is not None:
+            self.move_categories(household, options)
+        else:
+            self.move_transactions(household, options)
+
+    def move_categories(self, household, options):
+        if not options['categories']:
+            raise CommandError('--categories is required with --to-cost-center')
+
+        cost_center = None
+        if options['to_cost_center'].lower() != 'none':
+            try:
+                cost_center = CostCenter.objects.get(pk=options['to_cost_center'], tax_household=household)
+            except (CostCenter.DoesNotExist, ValueError):
+                raise CommandError(f'Cost center {options["to_cost_center"]} does not belong to this household')
+
+        if options['dry_run']:
+            count = TransactionCategory.objects.filter(tax_household=household, id__in=options['categories']).count()
+            self.stdout.write(self.style.SUCCESS(f'{count} categories would be moved'))
+            return
+
+        count = move_categories_to_cost_center(household, options['categories'], cost_center)
+        self.stdout.write(self.style.SUCCESS(f'{count} categories moved to {cost_center or "no cost center"}'))
+
+    def move_transactions(self, household, options):
+        try:
+            category = TransactionCategory.objects.get(pk=options['to_category'], tax_household=household)
+        except TransactionCategory.DoesNotExist:
+            raise CommandError(f'Category {options["to_category"]} does not belong to this household')
+
+        filters = parse_transaction_filters(options)
+        if not any(filters.values()) and not options['all']:
+            raise CommandError(
+                'No filter given: this would move every transaction of the household. Pass --all to confirm'
+            )
+
+        if options['dry_run']:
+            count = transactions_in_scope(household, filters).exclude(category=category).count()
+            self.stdout.write(self.style.SUCCESS(f'{count} transactions would be moved to {category.name}'))
+            return
+
+        count = recategorize_transactions(household, category, filters=filters)
+        self.stdout.write(self.style.SUCCESS(f'{count} transactions moved to {category.name}'))
@@ -0,0 +1,105 @@
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from core.models import TaxHousehold
+from core.utils.recurring_patterns import (
+    PATTERN_PERIODS, apply_recurring_patterns, detect_recurring_patterns, find_periodic_groups
+)
+
+
+class Command(BaseCommand):
+    help = 'Detects periodic series in the transaction history of households and proposes them as recurring transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--household', type=int, help='Only process the tax household with this id')
+        parser.add_argument('--min-occurrences', type=int, default=3, help='Smallest number of transactions of a series')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.1,
+            help='Accepted deviation of an interval from the period, as a fraction of the period'
+        )
+        parser.add_argument(
+            '--amount-tolerance',
+            type=float,
+            default=0.25,
+            help='Accepted variation of the amounts of a series (standard deviation relative to the mean)'
+        )
+        parser.add_argument('--apply', action='store_true', help='Make the last transaction of each series recurring')
+        parser.add_argument(
+            '--benchmark',
+            type=int,
+            metavar='N',
+            help='Measure detection throughput on N synthetic transactions instead of reading households'
+        )
+
+    def handle(self, *args, **options):
+        thresholds = {
+            'min_occurrences': options['min_occurrences'],
+            'tolerance': options['tolerance'],
+            'amount_tolerance': options['amount_tolerance'],
+        }
+        if options['benchmark']:
+            self.benchmark(options['benchmark'], thresholds)
+            return
+
+        households = TaxHousehold.objects.all()
+        if options['household']:
+            households = households.filter(pk=options['household'])
+            if not households.exists():
+                raise CommandError(f'Tax household {options["household"]} does not exist')
+
+        total = 0
+        for household in households:
+            proposals = detect_recurring_patterns(household, **thresholds)
+            for proposal in proposals:
+                self.stdout.write(
+                    f'{household}: {proposal["description"]} ({proposal["transaction_type"]} {proposal["amount"]}) '
+                    f'{proposal["period"]}, {proposal["occurrences"]} times from {proposal["first_date"]} '
+                    f'to {proposal["last_date"]} -> transaction {proposal["transaction_id"]}'
+                )
+            if options['apply']:
+                total += apply_recurring_patterns(proposals)
+            else:
+                total += len(proposals)
+
+        verb = 'made recurring' if options['apply'] else 'detected'
+        self.stdout.write(self.style.SUCCESS(f'{total} recurring series {verb}'))
+
+    def benchmark(self, count, thresholds):
+        """Time the detection alone, on a mix of periodic series and irregular spending"""
+        rng = random.Random(42)
+        today = date.today()
+        groups, days, amounts = [], [], []
+        group = 0
+        while len(groups) < count:
+            if rng.random() < 0.3:
+                # A periodic series with some jitter on its dates and amounts
+                period = rng.choice(list(PATTERN_PERIODS.values()))
+                occurrences = rng.randint(3, 36)
+                start = today - timedelta(days=round(period * occurrences))
+                amount = rng.uniform(5, 500)
+                for index in range(occurrences):
+                    groups.append(group)
+                    days.append((start + timedelta(days=round(period * index) + rng.randint(-1, 1))).toordinal())
+                    amounts.append(amount * rng.uniform(0.95, 1.05))
+            else:
+                for _ in range(rng.randint(1, 40)):
+                    groups.append(group)
+                    days.append((today - timedelta(days=rng.randint(0, 1000))).toordinal())
+                    amounts.append(rng.uniform(1, 200))
+            group += 1
+
+        start = time.perf_counter()
+        series = find_periodic_groups(
+            np.array(groups[:count]), np.array(days[:count]), np.array(amounts[:count]), today, **thresholds
+        )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f'{count} transactions in {group} groups, {len(series)} periodic series')
+        self.stdout.write(self.style.SUCCESS(
+            f'{elapsed:.3f}s ({count / elapsed:,.0f} transactions per second)'
+        ))
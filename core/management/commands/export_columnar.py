@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import TaxHousehold
+from core.utils.columnar import export_household, pyarrow_available, FORMATS
+
+
+class Command(BaseCommand):
+    help = 'Exports the transactions, bank accounts, categories and cost centers of a household as Parquet or .npz files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('household', type=int, help='Id of the tax household to export')
+        parser.add_argument('output', help='Directory to write the files to')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Output format (defaults to parquet when pyarrow is installed, npz otherwise)'
+        )
+        parser.add_argument('--row-group-size', type=int, default=50000, help='Number of rows per row group')
+
+    def handle(self, *args, **options):
+        try:
+            household = TaxHousehold.objects.get(pk=options['household'])
+        except TaxHousehold.DoesNotExist:
+            raise CommandError(f'Tax household {options["household"]} does not exist')
+
+        if options['format'] == 'parquet' and not pyarrow_available():
+            raise CommandError('Parquet export requires pyarrow (pip install pyarrow), or use --format npz')
+
+        written = export_household(
+            household,
+            options['output'],
+            file_format=options['format'],
+            chunk_size=options['row_group_size'],
+        )
+
+        for path, rows in written.items():
+            self.stdout.write(f'{path}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(f'Exported {len(written)} tables to {options["output"]}'))
@@ -0,0 +1,61 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import TaxHousehold
+from core.utils.currency import CurrencyExchangeService
+from core.utils.export import parse_transaction_filters, iter_transaction_rows, export_fields, EXPORT_FORMATS
+
+
+class Command(BaseCommand):
+    help = 'Exports the transactions of a tax household as CSV or JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('household', type=int, help='Id of the tax household to export')
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Output format')
+        parser.add_argument('--output', help='File to write to (defaults to standard output)')
+        parser.add_argument('--recurring', action='store_true', help='Include generated recurring occurrences')
+        parser.add_argument('--currency', help='Add amounts converted into this currency')
+        parser.add_argument('--category', help='Only export this category id')
+        parser.add_argument('--account', help='Only export this bank account id')
+        parser.add_argument('--type', choices=['expense', 'income'], help='Only export this transaction type')
+        parser.add_argument('--date-from', help='First date to export (YYYY-MM-DD)')
+        parser.add_argument('--date-to', help='Last date to export (YYYY-MM-DD)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched from the database at a time')
+
+    def handle(self, *args, **options):
+        try:
+            household = TaxHousehold.objects.get(pk=options['household'])
+        except TaxHousehold.DoesNotExist:
+            raise CommandError(f'Tax household {options["household"]} does not exist')
+
+        display_currency = options['currency']
+        if display_currency and display_currency not in dict(CurrencyExchangeService.SUPPORTED_CURRENCIES):
+            raise CommandError(f'Unsupported currency: {display_currency}')
+
+        rows = iter_transaction_rows(
+            household,
+            parse_transaction_filters(options),
+            include_recurring=options['recurring'],
+            display_currency=display_currency,
+            chunk_size=options['chunk_size'],
+        )
+        stream = EXPORT_FORMATS[options['format']][0]
+
+        exported = 0
+
+        def counted(rows):
+            nonlocal exported
+            for row in rows:
+                exported += 1
+                yield row
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in stream(counted(rows), export_fields(display_currency)):
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Exported {exported} transactions to {options["output"]}'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import TaxHousehold
+from core.utils.rollups import find_rollup_drift, rebuild_monthly_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the monthly transaction rollups used by the analysis reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--household', type=int, help='Only rebuild the rollups of this household (id)')
+        parser.add_argument('--check', action='store_true', help='Only report rollup rows that differ from the transactions')
+
+    def handle(self, *args, **options):
+        household = None
+        if options['household'] is not None:
+            try:
+                household = TaxHousehold.objects.get(pk=options['household'])
+            except TaxHousehold.DoesNotExist:
+                raise CommandError(f"Household {options['household']} does not exist")
+
+        if options['check']:
+            drifted = 0
+            for month, dimensions, stored, expected in find_rollup_drift(household):
+                drifted += 1
+                self.stdout.write(self.style.WARNING(
+                    f'{month:%Y-%m} household {dimensions["tax_household_id"]} account {dimensions["account_id"]} '
+                    f'category {dimensions["category_id"]} {dimensions["transaction_type"]}: '
+                    f'stored {stored[0]} / {stored[1]}, expected {expected[0]} / {expected[1]}'
+                ))
+            if drifted:
+                self.stdout.write(self.style.ERROR(f'{drifted} rollup rows drifted (run without --check to rebuild them)'))
+            else:
+                self.stdout.write(self.style.SUCCESS('All rollups are consistent'))
+            return
+
+        written = rebuild_monthly_rollups(household)
+        self.stdout.write(self.style.SUCCESS(f'{written} rollup rows rebuilt'))
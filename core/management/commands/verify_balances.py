@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from core.models import BankAccount
+from core.utils.balances import find_balance_drift, refresh_current_balances
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored current balance of bank accounts from their transactions and reports drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Overwrite drifted balances with the recomputed value')
+
+    def handle(self, *args, **options):
+        accounts = BankAccount.objects.all()
+
+        # Drift is measured against the stored values, before anything overwrites them
+        drifted = []
+        for account, expected in find_balance_drift(accounts):
+            drifted.append(account.pk)
+            self.stdout.write(self.style.WARNING(
+                f'{account.reference or account.name} (id {account.id}): stored {account.current_balance}, '
+                f'expected {expected} (drift {account.current_balance - expected})'
+            ))
+            if options['fix']:
+                BankAccount.objects.filter(pk=account.pk).update(current_balance=expected)
+
+        # Accounts never computed or last refreshed on an earlier day are then brought up to
+        # date; drifted ones are left as they are unless they were fixed
+        refreshed = refresh_current_balances(accounts if options['fix'] else accounts.exclude(pk__in=drifted))
+        if refreshed:
+            self.stdout.write(f'{refreshed} accounts brought up to date')
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS(f'All {accounts.count()} balances are consistent'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'{len(drifted)} balances fixed'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{len(drifted)} balances drifted (run with --fix to correct them)'))
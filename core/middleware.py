@@ -2,6 +2,7 @@ from django.utils import translation
 from django.conf import settings
 import re
 from core.translation_loader import load_json_translations, TRANSLATION_DICT
+from core.utils.household import HouseholdContext
 
 class LanguageMiddleware:
     """
@@ -69,4 +70,19 @@ class LanguageMiddleware:
                 samesite=settings.LANGUAGE_COOKIE_SAMESITE,
             )
         
-        return response
\ No newline at end of file
+        return response
+
+
+class HouseholdContextMiddleware:
+    """
+    Attach a HouseholdContext to each request as `request.household_ctx`.
+    Nothing is queried here: the household data is loaded lazily on first use.
+    Must come after AuthenticationMiddleware.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        request.household_ctx = HouseholdContext(request.user)
+        return self.get_response(request)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_add_transfer_relations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorizationRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Rule name', max_length=100)),
+                ('match_type', models.CharField(choices=[('substring', 'Contains text'), ('regex', 'Regular expression')], default='substring', help_text='How the pattern is matched against the description', max_length=10)),
+                ('pattern', models.CharField(blank=True, help_text='Text or regular expression to look for in the description (case-insensitive, leave empty to match on amount only)', max_length=255)),
+                ('transaction_type', models.CharField(blank=True, choices=[('expense', 'Expense'), ('income', 'Income')], default='', help_text='Only apply to expenses or incomes (leave empty for both)', max_length=10)),
+                ('min_amount', models.DecimalField(blank=True, decimal_places=2, help_text='Minimum amount (inclusive)', max_digits=10, null=True)),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, help_text='Maximum amount (inclusive)', max_digits=10, null=True)),
+                ('recipient_type', models.CharField(blank=True, choices=[('family', 'Family'), ('member', 'Household Member'), ('external', 'External')], default='', help_text='Recipient assigned to matching transactions (leave empty to keep it unchanged)', max_length=10)),
+                ('priority', models.PositiveIntegerField(default=100, help_text='Rules with a lower priority number are tried first')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this rule is applied')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(help_text='Category assigned to matching transactions', on_delete=django.db.models.deletion.CASCADE, related_name='categorization_rules', to='core.transactioncategory')),
+                ('payment_method', models.ForeignKey(blank=True, help_text='Payment method assigned to matching transactions (optional)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='categorization_rules', to='core.paymentmethod')),
+                ('recipient_member', models.ForeignKey(blank=True, help_text="Specific household member when recipient_type is 'member'", null=True, on_delete=django.db.models.deletion.CASCADE, related_name='categorization_rules', to='core.householdmember')),
+                ('tax_household', models.ForeignKey(help_text='The tax household this rule belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='categorization_rules', to='core.taxhousehold')),
+            ],
+            options={
+                'verbose_name': 'Categorization Rule',
+                'verbose_name_plural': 'Categorization Rules',
+                'ordering': ['priority', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_categorizationrule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='current_balance',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Balance including the transactions recorded since the balance date', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='current_balance_as_of',
+            field=models.DateField(blank=True, help_text='Date up to which transactions are included in the current balance', null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_tax_household(apps, schema_editor):
+    """Fill the new field from the household of each account's first member"""
+    BankAccount = apps.get_model('core', 'BankAccount')
+    HouseholdMember = apps.get_model('core', 'HouseholdMember')
+    BankAccount.objects.update(
+        tax_household=models.Subquery(
+            HouseholdMember.objects.filter(
+                bank_accounts=models.OuterRef('pk')
+            ).order_by('id').values('tax_household')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_bankaccount_current_balance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='tax_household',
+            field=models.ForeignKey(blank=True, help_text='The tax household of the account owners', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_accounts', to='core.taxhousehold'),
+        ),
+        migrations.RunPython(populate_tax_household, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_bankaccount_tax_household'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Day the rate applies to')),
+                ('base_currency', models.CharField(help_text='Currency being converted', max_length=3)),
+                ('currency', models.CharField(help_text='Currency converted into', max_length=3)),
+                ('rate', models.DecimalField(decimal_places=8, help_text='Amount of the currency for one unit of the base currency', max_digits=18)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Exchange Rate',
+                'verbose_name_plural': 'Exchange Rates',
+                'ordering': ['-date', 'base_currency', 'currency'],
+                'unique_together': {('base_currency', 'currency', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_exchangerate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['tax_household', 'transaction_type', 'date'], name='transaction_hh_type_date_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+
+def populate_monthly_rollups(apps, schema_editor):
+    """Build the rollups of the existing transactions"""
+    Transaction = apps.get_model('core', 'Transaction')
+    MonthlyRollup = apps.get_model('core', 'MonthlyRollup')
+    groups = Transaction.objects.annotate(month=TruncMonth('date')).values(
+        'month', 'tax_household_id', 'account_id', 'category_id', 'transaction_type',
+        'is_transfer', 'recipient_type', 'recipient_member_id'
+    ).annotate(count=models.Count('id'), amount=models.Sum('amount')).order_by()
+    MonthlyRollup.objects.bulk_create((MonthlyRollup(**group) for group in groups), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_transaction_household_type_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('transaction_type', models.CharField(choices=[('expense', 'Expense'), ('income', 'Income')], max_length=10)),
+                ('is_transfer', models.BooleanField(default=False)),
+                ('recipient_type', models.CharField(choices=[('family', 'Family'), ('member', 'Household Member'), ('external', 'External')], max_length=10)),
+                ('count', models.IntegerField(default=0, help_text='Number of transactions')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, help_text='Total amount of the transactions', max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='core.bankaccount')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='core.transactioncategory')),
+                ('recipient_member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='core.householdmember')),
+                ('tax_household', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='core.taxhousehold')),
+            ],
+            options={
+                'verbose_name': 'Monthly Rollup',
+                'verbose_name_plural': 'Monthly Rollups',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['tax_household', 'transaction_type', 'month'], name='rollup_hh_type_month_idx')],
+            },
+        ),
+        migrations.RunPython(populate_monthly_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taxhousehold',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0, help_text="Incremented on every change to the household's financial data (used to invalidate cached reports)"),
+        ),
+    ]
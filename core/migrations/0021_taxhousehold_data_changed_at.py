@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_taxhousehold_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taxhousehold',
+            name='data_changed_at',
+            field=models.DateTimeField(blank=True, help_text="When the household's financial data last changed", null=True),
+        ),
+    ]
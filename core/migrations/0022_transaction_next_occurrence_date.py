@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:46
+
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, models
+
+from core.utils.recurrence import next_occurrence_date
+
+
+def populate_next_occurrence_dates(apps, schema_editor):
+    """Compute the next occurrence of the existing recurring transactions"""
+    Transaction = apps.get_model('core', 'Transaction')
+    today = date.today()
+    recurring = list(Transaction.objects.filter(is_recurring=True).only(
+        'date', 'recurrence_period', 'recurrence_start_date', 'recurrence_end_date'
+    ))
+    for transaction in recurring:
+        start_date = transaction.recurrence_start_date or transaction.date
+        end_date = transaction.recurrence_end_date or start_date + relativedelta(years=1)
+        transaction.next_occurrence_date = next_occurrence_date(start_date, transaction.recurrence_period, end_date, today)
+    Transaction.objects.bulk_update(recurring, ['next_occurrence_date'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_taxhousehold_data_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='next_occurrence_date',
+            field=models.DateField(blank=True, editable=False, help_text='Next occurrence of a recurring transaction, on or after the current date', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['next_occurrence_date', 'tax_household'], name='transaction_next_occ_idx'),
+        ),
+        migrations.RunPython(populate_next_occurrence_dates, migrations.RunPython.noop),
+    ]
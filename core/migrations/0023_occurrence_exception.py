@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_transaction_next_occurrence_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccurrenceException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurrence_date', models.DateField(help_text='Scheduled date of the occurrence')),
+                ('is_skipped', models.BooleanField(default=False, help_text='Whether this occurrence does not take place')),
+                ('date', models.DateField(blank=True, help_text='Date the occurrence is moved to', null=True)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, help_text='Amount of this occurrence', max_digits=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, help_text='Category of this occurrence', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrence_exceptions', to='core.transactioncategory')),
+                ('parent', models.ForeignKey(help_text='Recurring transaction the occurrence belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='occurrence_exceptions', to='core.transaction')),
+            ],
+            options={
+                'verbose_name': 'Occurrence Exception',
+                'verbose_name_plural': 'Occurrence Exceptions',
+                'ordering': ['occurrence_date'],
+                'constraints': [models.UniqueConstraint(fields=('parent', 'occurrence_date'), name='unique_occurrence_exception')],
+            },
+        ),
+    ]
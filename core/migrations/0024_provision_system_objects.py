@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:12
+
+from django.db import migrations
+
+
+# Same names and values as core/utils/system_objects.py, frozen for this migration
+TRANSFER_NAME = 'Transfer'
+TRANSFER_COLOR = '#8a92a9'
+
+
+def provision_system_objects(apps, schema_editor):
+    """
+    Create the Bank Transfer payment method and, in every household, the Transfer cost
+    center and category that used to be created on the first transfer
+    """
+    TaxHousehold = apps.get_model('core', 'TaxHousehold')
+    CostCenter = apps.get_model('core', 'CostCenter')
+    TransactionCategory = apps.get_model('core', 'TransactionCategory')
+    PaymentMethod = apps.get_model('core', 'PaymentMethod')
+
+    PaymentMethod.objects.get_or_create(name='Bank Transfer', defaults={'icon': 'bi-bank', 'is_active': True})
+
+    for household in TaxHousehold.objects.all():
+        cost_center = CostCenter.objects.filter(tax_household=household, name=TRANSFER_NAME).first()
+        if cost_center is None:
+            cost_center = CostCenter.objects.create(tax_household=household, name=TRANSFER_NAME, color=TRANSFER_COLOR)
+        category = TransactionCategory.objects.filter(tax_household=household, name=TRANSFER_NAME).first()
+        if category is None:
+            TransactionCategory.objects.create(tax_household=household, name=TRANSFER_NAME, cost_center=cost_center)
+        elif category.cost_center_id != cost_center.id:
+            category.cost_center = cost_center
+            category.save(update_fields=['cost_center'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_occurrence_exception'),
+    ]
+
+    operations = [
+        migrations.RunPython(provision_system_objects, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_provision_system_objects'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taxhousehold',
+            name='reference_version',
+            field=models.PositiveBigIntegerField(default=0, help_text="Incremented on every change to the household's members, accounts, categories, cost centers or to the payment methods (used to invalidate cached form choices)"),
+        ),
+    ]
@@ -1,19 +1,54 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
+from decimal import Decimal
 
 class TaxHousehold(models.Model):
     """Model representing a tax household for a user"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='tax_household')
     name = models.CharField(max_length=100, help_text=_("Name of the tax household (e.g. 'Smith Family')"))
+    data_version = models.PositiveBigIntegerField(
+        default=0,
+        help_text=_("Incremented on every change to the household's financial data (used to invalidate cached reports)")
+    )
+    data_changed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("When the household's financial data last changed")
+    )
+    reference_version = models.PositiveBigIntegerField(
+        default=0,
+        help_text=_("Incremented on every change to the household's members, accounts, categories, cost centers "
+                    "or to the payment methods (used to invalidate cached form choices)")
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} (Owner: {self.user.username})"
 
+    @classmethod
+    def bump_data_version(cls, household_id):
+        """Increment the data version of a household and record the change time, with a single UPDATE"""
+        if household_id:
+            cls.objects.filter(pk=household_id).update(
+                data_version=models.F('data_version') + 1,
+                data_changed_at=timezone.now()
+            )
+
+    @classmethod
+    def bump_reference_version(cls, household_id):
+        """Increment the reference data version of a household with a single UPDATE"""
+        if household_id:
+            cls.objects.filter(pk=household_id).update(reference_version=models.F('reference_version') + 1)
+
+    @classmethod
+    def bump_all_reference_versions(cls):
+        """Increment the reference data version of every household, after a payment method (shared by all) changed"""
+        cls.objects.update(reference_version=models.F('reference_version') + 1)
+
 class HouseholdMember(models.Model):
     """Model representing a member of a tax household"""
     tax_household = models.ForeignKey(TaxHousehold, on_delete=models.CASCADE, related_name='members')
@@ -64,6 +99,17 @@ class BankAccount(models.Model):
     bank_name = models.CharField(max_length=100, help_text=_("Name of the bank"), default="")
     account_type = models.ForeignKey(AccountType, on_delete=models.PROTECT, related_name='accounts', null=True)
     members = models.ManyToManyField(HouseholdMember, related_name='bank_accounts')
+    # Denormalized from the members (who all belong to one household) so that a
+    # household's accounts can be resolved without joining through the M2M table.
+    # Kept in sync by the m2m_changed handler in core/signals.py.
+    tax_household = models.ForeignKey(
+        TaxHousehold,
+        on_delete=models.SET_NULL,
+        related_name='bank_accounts',
+        null=True,
+        blank=True,
+        help_text=_("The tax household of the account owners")
+    )
     reference = models.CharField(max_length=100, blank=True, help_text=_("Auto-generated reference code"))
     currency = models.CharField(
         max_length=3,
@@ -82,6 +128,19 @@ class BankAccount(models.Model):
         default=timezone.now,
         help_text=_("Date when the balance was last updated")
     )
+    # Denormalized balance: `balance` plus the transactions dated after `balance_date`
+    # and up to `current_balance_as_of`, maintained by Transaction.save() and deletion
+    current_balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text=_("Balance including the transactions recorded since the balance date")
+    )
+    current_balance_as_of = models.DateField(
+        null=True,
+        blank=True,
+        help_text=_("Date up to which transactions are included in the current balance")
+    )
     timestamp = models.DateTimeField(default=timezone.now, help_text=_("Account creation date and time"))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -97,10 +156,27 @@ class BankAccount(models.Model):
         # For existing accounts with no reference
         if not is_new and not self.reference:
             self.reference = self._generate_reference()
+        
+        # A new account has no transactions yet: its current balance is its balance
+        if is_new:
+            self.current_balance = self.balance
+            self.current_balance_as_of = timezone.now().date()
+        
+        # Changing the balance or its date invalidates the stored current balance
+        update_fields = kwargs.get('update_fields')
+        balance_changed = False
+        if not is_new and (update_fields is None or {'balance', 'balance_date'} & set(update_fields)):
+            stored = BankAccount.objects.filter(pk=self.pk).values('balance', 'balance_date').first()
+            balance_changed = stored is not None and (
+                stored['balance'] != self.balance or stored['balance_date'] != self.balance_date
+            )
             
         # Call the standard save method
         result = super().save(*args, **kwargs)
         
+        if balance_changed:
+            self.recompute_current_balance()
+        
         # For new accounts, we need to call save twice
         # First save (above) ensures the pk exists so M2M relationships can be established
         # After initial save, in the view we will add members
@@ -172,6 +248,49 @@ class BankAccount(models.Model):
             return f"{self.name} - {self.bank_name} [{self.reference}]"
         return f"{self.name} - {self.bank_name}"
         
+    def recompute_current_balance(self, as_of=None):
+        """
+        Recompute the stored current balance from the transactions recorded after the
+        balance date and up to `as_of` (today by default).
+        """
+        if as_of is None:
+            as_of = timezone.now().date()
+        net = Transaction.objects.filter(
+            account=self,
+            date__gt=self.balance_date,
+            date__lte=as_of
+        ).aggregate(
+            net=models.Sum(
+                models.Case(
+                    models.When(transaction_type='income', then=models.F('amount')),
+                    default=-models.F('amount'),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2)
+                )
+            )
+        )['net'] or 0
+        self.current_balance = Decimal(str(self.balance)) + net
+        self.current_balance_as_of = as_of
+        BankAccount.objects.filter(pk=self.pk).update(
+            current_balance=self.current_balance,
+            current_balance_as_of=as_of
+        )
+        return self.current_balance
+    
+    @classmethod
+    def apply_transaction_delta(cls, account_id, transaction_date, delta):
+        """
+        Add a signed amount to the stored current balance of an account, if the
+        transaction date falls in the period the current balance covers. The check is
+        part of the UPDATE, so no read is needed.
+        """
+        if not account_id or not delta:
+            return
+        cls.objects.filter(
+            pk=account_id,
+            balance_date__lt=transaction_date,
+            current_balance_as_of__gte=transaction_date
+        ).update(current_balance=models.F('current_balance') + delta)
+    
     @property
     def short_reference(self):
         """Return just the reference code for compact display"""
@@ -368,6 +487,13 @@ class Transaction(models.Model):
         blank=True,
         help_text=_("End date for recurring transactions (defaults to one year after start date)")
     )
+    # Kept up to date on save and by the advance_recurring_transactions command
+    next_occurrence_date = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("Next occurrence of a recurring transaction, on or after the current date")
+    )
     account = models.ForeignKey(
         BankAccount,
         on_delete=models.PROTECT,
@@ -453,8 +579,54 @@ class Transaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Fields that change the effect of a transaction on its account balance
+    BALANCE_FIELDS = {'account', 'date', 'amount', 'transaction_type'}
+    
+    # Fields that move the transaction to another MonthlyRollup row
+    ROLLUP_FIELDS = {'tax_household', 'account', 'category', 'date', 'amount', 'transaction_type',
+                     'is_transfer', 'recipient_type', 'recipient_member'}
+    
     def __str__(self):
         return f"{self.date} - {self.description} ({self.amount})"
+    
+    @property
+    def signed_amount(self):
+        """Effect of the transaction on its account balance"""
+        amount = Decimal(str(self.amount or 0))
+        return amount if self.transaction_type == 'income' else -amount
+    
+    # Fields that move the next occurrence of a recurring transaction
+    RECURRENCE_FIELDS = {'date', 'is_recurring', 'recurrence_period', 'recurrence_start_date', 'recurrence_end_date'}
+    
+    def save(self, *args, **kwargs):
+        """
+        Save the transaction and update the stored current balance of the affected
+        account(s) in the same database transaction.
+        """
+        update_fields = kwargs.get('update_fields')
+        self.next_occurrence_date = self.compute_next_occurrence()
+        if update_fields is not None and self.RECURRENCE_FIELDS & set(update_fields):
+            kwargs['update_fields'] = update_fields = set(update_fields) | {'next_occurrence_date'}
+        if update_fields is not None and not (self.BALANCE_FIELDS | self.ROLLUP_FIELDS) & set(update_fields):
+            return super().save(*args, **kwargs)
+        
+        with db_transaction.atomic():
+            previous = None
+            if self.pk and not self._state.adding:
+                previous = Transaction.objects.filter(pk=self.pk).values(
+                    'date', 'amount', *MonthlyRollup.DIMENSIONS
+                ).first()
+            
+            result = super().save(*args, **kwargs)
+            
+            if previous:
+                previous_amount = previous['amount'] if previous['transaction_type'] == 'income' else -previous['amount']
+                BankAccount.apply_transaction_delta(previous['account_id'], previous['date'], -previous_amount)
+                MonthlyRollup.apply_delta(previous, previous['date'], -1, -previous['amount'])
+            BankAccount.apply_transaction_delta(self.account_id, self.date, self.signed_amount)
+            MonthlyRollup.apply_delta(self.__dict__, self.date, 1, Decimal(str(self.amount or 0)))
+        
+        return result
         
     @property
     def clean_description(self):
@@ -491,276 +663,447 @@ class Transaction(models.Model):
             return self._recurring_parent
         return None
         
-    def generate_recurring_instances(self, current_date=None):
+    def recurrence_bounds(self):
+        """
+        First and last dates of a recurring transaction's series: the recurrence start
+        (or transaction) date, and the recurrence end date or one year after the start
+        """
+        from dateutil.relativedelta import relativedelta
+        
+        start_date = self.recurrence_start_date or self.date
+        end_date = self.recurrence_end_date or start_date + relativedelta(years=1)
+        return start_date, end_date
+    
+    def is_scheduled_date(self, day):
+        """
+        Whether a date is a scheduled occurrence of the series. Occurrence exceptions
+        whose date is no longer scheduled (after the period or the start date changed)
+        are ignored.
+        """
+        from core.utils.recurrence import next_occurrence_date
+        
+        start_date, end_date = self.recurrence_bounds()
+        return next_occurrence_date(start_date, self.recurrence_period, end_date, day) == day
+    
+    def compute_next_occurrence(self, current_date=None):
+        """
+        Date of the next occurrence of a recurring transaction on or after current_date
+        (today by default), or None when the series has ended or is not recurring
+        
+        Occurrences moved earlier by an OccurrenceException count at their new date;
+        skipped occurrences are not left out, so the value is never later than the
+        actual next occurrence.
+        """
+        from datetime import date
+        from core.utils.recurrence import next_occurrence_date
+        
+        if not self.is_recurring or self.date is None:
+            return None
+        current_date = current_date or date.today()
+        start_date, end_date = self.recurrence_bounds()
+        next_date = next_occurrence_date(start_date, self.recurrence_period, end_date, current_date)
+        
+        if self.pk is None:
+            return next_date
+        if 'occurrence_exceptions' in getattr(self, '_prefetched_objects_cache', {}):
+            moved = [
+                (exception.occurrence_date, exception.date) for exception in self.occurrence_exceptions.all()
+                if exception.is_moved and not exception.is_skipped and exception.date >= current_date
+            ]
+        else:
+            moved = list(self.occurrence_exceptions.filter(
+                is_skipped=False, date__gte=current_date
+            ).exclude(date=models.F('occurrence_date')).values_list('occurrence_date', 'date'))
+        moved = [day for scheduled_date, day in moved if self.is_scheduled_date(scheduled_date)]
+        return min([day for day in [next_date] + moved if day is not None], default=None)
+    
+    def recurrence_window(self, current_date=None, window_start=None, window_end=None):
+        """
+        First and last dates of the instances of a recurring transaction that are
+        generated (see iter_recurring_instances), or None when there are none
+        """
+        from datetime import date
+        
+        if not self.is_recurring or self.date is None:
+            return None
+        
+        current_date = current_date or date.today()
+        start_date, end_date = self.recurrence_bounds()
+        
+        # Instances are shown from the start date up to the current date (the end date
+        # only limits the series, instances stay visible once it has passed)
+        last_date = min(end_date, current_date)
+        if window_end is not None:
+            last_date = min(last_date, window_end)
+        first_date = max(start_date, window_start) if window_start else start_date
+        if first_date > last_date:
+            return None
+        return first_date, last_date
+    
+    def _build_recurring_instance(self, instance_date, scheduled_date=None, exception=None):
+        """
+        Occurrence of this transaction on a date, preceded by the occurrence of its
+        paired transaction for transfers. The exception of the occurrence (if any) also
+        applies to the paired side, except for its category.
+        """
+        from core.utils.recurrence import Occurrence
+        
+        occurrence = Occurrence(self, instance_date, scheduled_date=scheduled_date, exception=exception)
+        if not (self.is_transfer and self.paired_transaction):
+            return [occurrence]
+        
+        # Link the occurrences of both sides of the transfer to each other
+        paired_occurrence = Occurrence(
+            self.paired_transaction, instance_date, occurrence, scheduled_date=scheduled_date, exception=exception
+        )
+        occurrence.paired_transaction = paired_occurrence
+        return [paired_occurrence, occurrence]
+    
+    def occurrence_exceptions_between(self, first_date, last_date):
+        """
+        Occurrence exceptions of this transaction scheduled, or moved, between two dates,
+        keyed by scheduled date. Prefetched exceptions (prefetch_related('occurrence_exceptions'))
+        are filtered in memory, otherwise they are read with one query. Exceptions of dates
+        the series no longer schedules are left out (see is_scheduled_date).
+        """
+        if 'occurrence_exceptions' in getattr(self, '_prefetched_objects_cache', {}):
+            exceptions = [
+                exception for exception in self.occurrence_exceptions.all()
+                if first_date <= exception.occurrence_date <= last_date
+                or (exception.date is not None and first_date <= exception.date <= last_date)
+            ]
+        else:
+            exceptions = self.occurrence_exceptions.filter(
+                models.Q(occurrence_date__range=(first_date, last_date)) | models.Q(date__range=(first_date, last_date))
+            )
+        return {
+            exception.occurrence_date: exception for exception in exceptions
+            if self.is_scheduled_date(exception.occurrence_date)
+        }
+    
+    def iter_occurrence_dates(self, current_date=None, window_start=None, window_end=None):
+        """
+        Lazily generate the occurrences of this recurring transaction in the window (see
+        iter_recurring_instances) as (scheduled_date, date, exception) tuples, in date order
+        
+        The occurrence exceptions of the window are read once and looked up by scheduled
+        date: skipped occurrences are left out and moved ones come at their new date.
+        `exception` is None for occurrences generated unchanged.
+        """
+        import heapq
+        from core.utils.recurrence import occurrence_dates
+        
+        window = self.recurrence_window(current_date, window_start, window_end)
+        if window is None:
+            return
+        first_date, last_date = window
+        
+        start_date = self.recurrence_bounds()[0]
+        scheduled = occurrence_dates(start_date, self.recurrence_period, first_date, last_date)
+        exceptions = self.occurrence_exceptions_between(first_date, last_date)
+        if not exceptions:
+            for instance_date in scheduled:
+                yield instance_date, instance_date, None
+            return
+        
+        def unchanged_or_edited():
+            for instance_date in scheduled:
+                exception = exceptions.get(instance_date)
+                if exception is None:
+                    yield instance_date, instance_date, None
+                elif not exception.is_skipped and not exception.is_moved:
+                    yield instance_date, instance_date, exception
+        
+        moved = sorted(
+            (exception.date, exception.occurrence_date, exception) for exception in exceptions.values()
+            if exception.is_moved and not exception.is_skipped and first_date <= exception.date <= last_date
+        )
+        yield from heapq.merge(
+            ((scheduled_date, instance_date, exception) for instance_date, scheduled_date, exception in moved),
+            unchanged_or_edited(),
+            key=lambda occurrence: occurrence[1]
+        )
+    
+    def iter_recurring_instances(self, current_date=None, window_start=None, window_end=None):
+        """
+        Lazily generate the instances of this recurring transaction
+        
+        Only occurrences inside the series bounds (see recurrence_bounds), not after
+        current_date and inside the optional [window_start, window_end] window are
+        produced; the first one is computed directly rather than by stepping from the
+        start of the series. Occurrence exceptions are applied (see iter_occurrence_dates).
+        
+        Args:
+            current_date: The current date (defaults to today's date)
+            window_start: Skip occurrences before this date (optional)
+            window_end: Skip occurrences after this date (optional)
+            
+        Yields:
+            Occurrence objects (see core/utils/recurrence.py) representing the recurring instances
+        """
+        for scheduled_date, instance_date, exception in self.iter_occurrence_dates(current_date, window_start, window_end):
+            yield from self._build_recurring_instance(instance_date, scheduled_date, exception)
+    
+    def generate_recurring_instances(self, current_date=None, window_start=None, window_end=None):
         """
         Generate instances of this recurring transaction between start and end dates
         
         Args:
             current_date: The current date (defaults to today's date)
+            window_start: Skip occurrences before this date (optional)
+            window_end: Skip occurrences after this date (optional)
             
         Returns:
-            List of Transaction objects representing the recurring instances
+            List of Occurrence objects representing the recurring instances
         """
-        from datetime import date, timedelta, datetime
-        from dateutil.relativedelta import relativedelta
-        
-        instances = []  # Initialize return value outside try blocks
-        
-        # CRITICAL: Wrap the entire method in try/except to prevent crashes
         try:
-            # If not recurring, return empty list
-            if not self.is_recurring:
-                return []
-            
-            # Use today's date if not provided
-            if not current_date:
-                current_date = date.today()
-            
-            # Print detailed debug info about the transaction dates
-            print(f"DETAIL: Transaction {self.id} date fields:")
-            print(f"DETAIL: - self.date = {self.date} ({type(self.date)})")
-            print(f"DETAIL: - self.recurrence_start_date = {self.recurrence_start_date} ({type(self.recurrence_start_date) if self.recurrence_start_date else 'None'})")
-            print(f"DETAIL: - self.recurrence_end_date = {self.recurrence_end_date} ({type(self.recurrence_end_date) if self.recurrence_end_date else 'None'})")
-            print(f"DETAIL: - current_date = {current_date} ({type(current_date)})")
-            
-            # Check for any None values that might cause comparison errors
-            if self.date is None:
-                print(f"ERROR: Transaction {self.id} has no date!")
-                return []
-            
-            # Use a try block for date conversions to catch any errors
-            try:
-                # Make sure we're working with date objects, not datetime
-                if hasattr(self.date, 'date'):  # If it's a datetime
-                    base_date_val = self.date.date()
-                else:  # It's already a date
-                    base_date_val = self.date
-                    
-                # Get creation date for validity checks
-                transaction_creation_date = None
-                if hasattr(self, 'created_at') and self.created_at:
-                    if hasattr(self.created_at, 'date'):
-                        transaction_creation_date = self.created_at.date()
-                    else:
-                        transaction_creation_date = self.created_at
-                
-                # If we can't get created_at, use base_date as a fallback
-                if not transaction_creation_date:
-                    transaction_creation_date = base_date_val
-                
-                # Same for start and end dates
-                if self.recurrence_start_date:
-                    if hasattr(self.recurrence_start_date, 'date'):
-                        start_date = self.recurrence_start_date.date()
-                    else:
-                        start_date = self.recurrence_start_date
-                else:
-                    start_date = base_date_val
-                    
-                # Ensure current_date is also a date, not datetime
-                if hasattr(current_date, 'date'):
-                    current_date = current_date.date()
-                
-                # Handle end date
-                if self.recurrence_end_date:
-                    if hasattr(self.recurrence_end_date, 'date'):
-                        end_date = self.recurrence_end_date.date()
-                    else:
-                        end_date = self.recurrence_end_date
-                else:
-                    # Default to one year after start
-                    end_date = date(
-                        year=start_date.year + 1,
-                        month=start_date.month,
-                        day=start_date.day
-                    )
-            except Exception as e:
-                print(f"ERROR in date conversion for transaction {self.id}: {e}")
-                return []
-            
-            # Safety check - make sure we have valid dates
-            if not isinstance(start_date, date) or not isinstance(end_date, date) or not isinstance(current_date, date):
-                print(f"WARNING: Invalid date types in generate_recurring_instances: start={type(start_date)}, end={type(end_date)}, current={type(current_date)}")
-                return []
-            
-            # More detailed logging
-            print(f"DETAIL: Using dates for transaction {self.id}:")
-            print(f"DETAIL: - creation_date = {transaction_creation_date}")
-            print(f"DETAIL: - base_date_val = {base_date_val}")
-            print(f"DETAIL: - start_date = {start_date}")
-            print(f"DETAIL: - end_date = {end_date}")
-            print(f"DETAIL: - current_date = {current_date}")
-            
-            # VALIDITY CHECKS
-            # Key concepts:
-            # 1. Transaction Creation Date must be within validity period to create instances
-            # 2. Current date must not be before start date to generate instances
-            # 3. If current date is after end date, we only show instances up to end date
-            
-            try:
-                # Check 1: Is creation date within validity period?
-                # NOTE: We're commenting this check out for now as it's preventing instances from showing
-                # after the end date has passed. We'll implement this at the form validation level instead.
-                # This ensures that instances remain visible after the validity period ends.
-                # if transaction_creation_date < start_date or transaction_creation_date > end_date:
-                #     print(f"DEBUG: Transaction {self.id} was created on {transaction_creation_date}, which is outside " +
-                #           f"validity period ({start_date} to {end_date}). No instances will be generated.")
-                #     return []
-                
-                # Check 2: Is current date before start date?
-                if current_date < start_date:
-                    print(f"DEBUG: Transaction {self.id} - current date {current_date} is before start date {start_date}")
-                    return []  # No instances to show if we're before the start date
-                
-                # Check 3: Cap end date at the current date for display purposes
-                # This only limits the *display*, not the validity of the recurring transaction
-                max_display_date = current_date
-                
-                # Use the earlier of original end_date or max_display_date
-                display_end_date = min(end_date, max_display_date)
-                
-                # Don't go past end date in generating instances
-                # If end date is already passed, we'll cap the generation date at the end date
-                calculation_date = min(current_date, end_date)
-                
-                print(f"DEBUG: Calculation date (min of current & end): {calculation_date}")
-                
-                # Generate dates based on the recurrence period
-                instance_dates = []
-                current_instance_date = start_date
-                
-                # Ensure we're not going to generate an excessive number of instances
-                if self.recurrence_period == 'daily':
-                    # For daily recurrence, cap at 365 instances
-                    max_instances = 365
-                    increment_func = lambda d: d + timedelta(days=1)
-                elif self.recurrence_period == 'weekly':
-                    # For weekly recurrence, cap at 52 instances
-                    max_instances = 52
-                    increment_func = lambda d: d + timedelta(weeks=1)
-                elif self.recurrence_period == 'monthly':
-                    # For monthly recurrence, cap at 12 instances
-                    max_instances = 12
-                    increment_func = lambda d: d + relativedelta(months=1)
-                elif self.recurrence_period == 'quarterly':
-                    # For quarterly recurrence, cap at 4 instances
-                    max_instances = 4
-                    increment_func = lambda d: d + relativedelta(months=3)
-                elif self.recurrence_period == 'annually':
-                    # For annual recurrence, cap at 3 instances
-                    max_instances = 3
-                    increment_func = lambda d: d + relativedelta(years=1)
-                else:
-                    # Unknown recurrence period, return empty list
-                    print(f"WARNING: Unknown recurrence period: {self.recurrence_period}")
-                    return []
-                
-                # Generate instance dates
-                print(f"DEBUG: Generating instances from {start_date} to {display_end_date}")
-                
-                count = 0
-                
-                # If the start date is in the future, only generate that single instance
-                if start_date > current_date:
-                    print(f"DEBUG: Start date {start_date} is in the future, only generating that instance")
-                    instance_dates.append(start_date)
-                    count = 1
-                else:
-                    # For each date, starting from start_date, generate instances until display_end_date
-                    while current_instance_date <= display_end_date and count < max_instances:
-                        # Add date to the list
-                        instance_dates.append(current_instance_date)
-                        count += 1
-                        
-                        # Calculate next date based on recurrence period
-                        current_instance_date = increment_func(current_instance_date)
-                
-                print(f"DEBUG: Generated {count} instance dates")
-                
-                # Create Transaction instances for each date
-                for instance_date in instance_dates:
-                    try:
-                        # Create a clone of this transaction with the new date
-                        clone = Transaction(
-                            tax_household=self.tax_household,
-                            date=instance_date,
-                            description=self.description,
-                            category=self.category,
-                            amount=self.amount,
-                            account=self.account,
-                            payment_method=self.payment_method,
-                            transaction_type=self.transaction_type,
-                            recipient_type=self.recipient_type,
-                            recipient_member=self.recipient_member,
-                            is_recurring=False,  # Generated instances aren't themselves recurring
-                            is_transfer=self.is_transfer,
-                            paired_transaction=None  # Will be set properly later if this is a transfer
-                        )
-                        
-                        # Set generated instance ID using parent ID + instance date
-                        # This helps identify that this is a generated instance, not a real transaction
-                        instance_id_str = f"{self.id}-{instance_date.strftime('%Y%m%d')}"
-                        
-                        # Set a dummy ID and instance marker (won't be saved to db)
-                        clone.id = instance_id_str
-                        clone._is_generated = True
-                        clone._recurring_parent = self
-                        clone._instance_date = instance_date
-                        
-                        # For transfers, we need to handle the paired transaction correctly
-                        if self.is_transfer and self.paired_transaction:
-                            # Create a clone of the paired transaction with the same date
-                            paired_clone = Transaction(
-                                tax_household=self.paired_transaction.tax_household,
-                                date=instance_date,
-                                description=self.paired_transaction.description,
-                                category=self.paired_transaction.category,
-                                amount=self.paired_transaction.amount,
-                                account=self.paired_transaction.account,
-                                payment_method=self.paired_transaction.payment_method,
-                                transaction_type=self.paired_transaction.transaction_type,
-                                recipient_type=self.paired_transaction.recipient_type,
-                                recipient_member=self.paired_transaction.recipient_member,
-                                # Even though this is a generated instance, it should follow
-                                # the recurring settings of its parent transaction
-                                is_recurring=False,  # Generated instances aren't themselves recurring
-                                is_transfer=True,
-                                paired_transaction=None
-                            )
-                            
-                            # Generate a unique ID for the paired clone
-                            paired_id_str = f"{self.paired_transaction.id}-{instance_date.strftime('%Y%m%d')}"
-                            paired_clone.id = paired_id_str
-                            paired_clone._is_generated = True
-                            paired_clone._recurring_parent = self.paired_transaction
-                            paired_clone._instance_date = instance_date
-                            
-                            # Link the clones to each other
-                            clone.paired_transaction = paired_clone
-                            paired_clone.paired_transaction = clone
-                            
-                            # Add the paired clone to the instances list
-                            instances.append(paired_clone)
-                        
-                        instances.append(clone)
-                    except Exception as e:
-                        print(f"ERROR creating instance for date {instance_date}: {e}")
-                        # Continue to the next date
-                
-                print(f"DEBUG: Created {len(instances)} recurring instances for transaction {self.id}")
-                return instances
-                
-            except Exception as e:
-                print(f"ERROR in generate_recurring_instances for transaction {self.id}: {e}")
-                return []
-                
-        except Exception as outer_e:
-            print(f"CRITICAL ERROR in generate_recurring_instances for transaction {self.id}: {outer_e}")
+            return list(self.iter_recurring_instances(current_date, window_start, window_end))
+        except Exception as e:
+            print(f"ERROR in generate_recurring_instances for transaction {self.id}: {e}")
             return []
-            
-        return []
+    
     
     class Meta:
         ordering = ['-date', '-created_at']
         verbose_name = _("Transaction")
-        verbose_name_plural = _("Transactions")
\ No newline at end of file
+        verbose_name_plural = _("Transactions")
+        indexes = [
+            # Household reports filter one transaction type over a date range
+            models.Index(fields=['tax_household', 'transaction_type', 'date'], name='transaction_hh_type_date_idx'),
+            # Upcoming occurrences are read with a range query on the next occurrence date
+            models.Index(fields=['next_occurrence_date', 'tax_household'], name='transaction_next_occ_idx'),
+        ]
+
+class OccurrenceException(models.Model):
+    """
+    Change made to a single occurrence of a recurring transaction, identified by its
+    parent and scheduled date: the occurrence is skipped, or generated with another
+    date, amount and/or category. Occurrences without an exception are generated from
+    the parent unchanged, so the table stays sparse.
+    """
+    parent = models.ForeignKey(
+        Transaction,
+        on_delete=models.CASCADE,
+        related_name='occurrence_exceptions',
+        help_text=_("Recurring transaction the occurrence belongs to")
+    )
+    occurrence_date = models.DateField(help_text=_("Scheduled date of the occurrence"))
+    is_skipped = models.BooleanField(default=False, help_text=_("Whether this occurrence does not take place"))
+    date = models.DateField(null=True, blank=True, help_text=_("Date the occurrence is moved to"))
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text=_("Amount of this occurrence")
+    )
+    category = models.ForeignKey(
+        TransactionCategory,
+        on_delete=models.SET_NULL,
+        related_name='occurrence_exceptions',
+        null=True,
+        blank=True,
+        help_text=_("Category of this occurrence")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.parent_id} - {self.occurrence_date}"
+    
+    @property
+    def is_moved(self):
+        return self.date is not None and self.date != self.occurrence_date
+    
+    class Meta:
+        ordering = ['occurrence_date']
+        verbose_name = _("Occurrence Exception")
+        verbose_name_plural = _("Occurrence Exceptions")
+        constraints = [
+            models.UniqueConstraint(fields=['parent', 'occurrence_date'], name='unique_occurrence_exception'),
+        ]
+
+class CategorizationRule(models.Model):
+    """Model representing a user-defined rule that categorizes transactions from their description and amount"""
+
+    MATCH_TYPE_CHOICES = [
+        ('substring', _('Contains text')),
+        ('regex', _('Regular expression')),
+    ]
+
+    tax_household = models.ForeignKey(
+        TaxHousehold,
+        on_delete=models.CASCADE,
+        related_name='categorization_rules',
+        help_text=_("The tax household this rule belongs to")
+    )
+    name = models.CharField(
+        max_length=100,
+        help_text=_("Rule name")
+    )
+    match_type = models.CharField(
+        max_length=10,
+        choices=MATCH_TYPE_CHOICES,
+        default='substring',
+        help_text=_("How the pattern is matched against the description")
+    )
+    pattern = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Text or regular expression to look for in the description (case-insensitive, leave empty to match on amount only)")
+    )
+    transaction_type = models.CharField(
+        max_length=10,
+        choices=Transaction.TRANSACTION_TYPE_CHOICES,
+        blank=True,
+        default='',
+        help_text=_("Only apply to expenses or incomes (leave empty for both)")
+    )
+    min_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text=_("Minimum amount (inclusive)")
+    )
+    max_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text=_("Maximum amount (inclusive)")
+    )
+    category = models.ForeignKey(
+        TransactionCategory,
+        on_delete=models.CASCADE,
+        related_name='categorization_rules',
+        help_text=_("Category assigned to matching transactions")
+    )
+    payment_method = models.ForeignKey(
+        PaymentMethod,
+        on_delete=models.SET_NULL,
+        related_name='categorization_rules',
+        null=True,
+        blank=True,
+        help_text=_("Payment method assigned to matching transactions (optional)")
+    )
+    recipient_type = models.CharField(
+        max_length=10,
+        choices=Transaction.RECIPIENT_TYPE_CHOICES,
+        blank=True,
+        default='',
+        help_text=_("Recipient assigned to matching transactions (leave empty to keep it unchanged)")
+    )
+    recipient_member = models.ForeignKey(
+        HouseholdMember,
+        on_delete=models.CASCADE,
+        related_name='categorization_rules',
+        null=True,
+        blank=True,
+        help_text=_("Specific household member when recipient_type is 'member'")
+    )
+    priority = models.PositiveIntegerField(
+        default=100,
+        help_text=_("Rules with a lower priority number are tried first")
+    )
+    is_active = models.BooleanField(default=True, help_text=_("Whether this rule is applied"))
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+    def accepts(self, amount, transaction_type):
+        """Check the amount and transaction type constraints of the rule"""
+        if self.transaction_type and transaction_type and self.transaction_type != transaction_type:
+            return False
+        if amount is not None:
+            if self.min_amount is not None and amount < self.min_amount:
+                return False
+            if self.max_amount is not None and amount > self.max_amount:
+                return False
+        return True
+
+    class Meta:
+        ordering = ['priority', 'id']
+        verbose_name = _("Categorization Rule")
+        verbose_name_plural = _("Categorization Rules")
+
+class ExchangeRate(models.Model):
+    """Model storing the exchange rate between two currencies on a given day, to convert past balances"""
+    date = models.DateField(help_text=_("Day the rate applies to"))
+    base_currency = models.CharField(max_length=3, help_text=_("Currency being converted"))
+    currency = models.CharField(max_length=3, help_text=_("Currency converted into"))
+    rate = models.DecimalField(
+        max_digits=18,
+        decimal_places=8,
+        help_text=_("Amount of the currency for one unit of the base currency")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.date} 1 {self.base_currency} = {self.rate} {self.currency}"
+
+    class Meta:
+        ordering = ['-date', 'base_currency', 'currency']
+        unique_together = ['base_currency', 'currency', 'date']
+        verbose_name = _("Exchange Rate")
+        verbose_name_plural = _("Exchange Rates")
+
+class MonthlyRollup(models.Model):
+    """
+    Model storing the number and total amount of the transactions of a month sharing the
+    same household, account, category, type, transfer flag and recipient. Rows are kept
+    up to date on every Transaction save and delete (see apply_delta), so reports can sum
+    a few rows per month instead of reading every transaction.
+    """
+    # Transaction fields the rollup rows are grouped by
+    DIMENSIONS = (
+        'tax_household_id', 'account_id', 'category_id', 'transaction_type',
+        'is_transfer', 'recipient_type', 'recipient_member_id'
+    )
+
+    tax_household = models.ForeignKey(TaxHousehold, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField(help_text=_("First day of the month"))
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='monthly_rollups')
+    category = models.ForeignKey(TransactionCategory, on_delete=models.CASCADE, related_name='monthly_rollups')
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    is_transfer = models.BooleanField(default=False)
+    recipient_type = models.CharField(max_length=10, choices=Transaction.RECIPIENT_TYPE_CHOICES)
+    recipient_member = models.ForeignKey(
+        HouseholdMember,
+        on_delete=models.CASCADE,
+        related_name='monthly_rollups',
+        null=True,
+        blank=True
+    )
+    count = models.IntegerField(default=0, help_text=_("Number of transactions"))
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text=_("Total amount of the transactions"))
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.category_id} ({self.count} / {self.amount})"
+
+    @classmethod
+    def apply_delta(cls, dimensions, month, count, amount):
+        """
+        Add a number of transactions and their amount (negative to remove them) to the
+        rollup row of a month and set of DIMENSIONS, creating or deleting the row as needed
+        """
+        if not count:
+            return
+        dimensions = {field: dimensions[field] for field in cls.DIMENSIONS}
+        month = month.replace(day=1)
+        rows = cls.objects.filter(month=month, **dimensions)
+        updated = rows.update(count=models.F('count') + count, amount=models.F('amount') + amount)
+        if not updated and count > 0:
+            cls.objects.create(month=month, count=count, amount=amount, **dimensions)
+        elif count < 0:
+            rows.filter(count__lte=0).delete()
+
+    class Meta:
+        ordering = ['-month']
+        indexes = [
+            models.Index(fields=['tax_household', 'transaction_type', 'month'], name='rollup_hh_type_month_idx'),
+        ]
+        verbose_name = _("Monthly Rollup")
+        verbose_name_plural = _("Monthly Rollups")
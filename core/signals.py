@@ -0,0 +1,113 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    BankAccount, CostCenter, HouseholdMember, MonthlyRollup, OccurrenceException, PaymentMethod, TaxHousehold,
+    Transaction, TransactionCategory,
+)
+from .utils.system_objects import provision_household
+
+
+@receiver(post_delete, sender=Transaction)
+def remove_transaction_from_balance(sender, instance, **kwargs):
+    """
+    Take a deleted transaction out of its account's stored current balance.
+    Deletions (including cascades) run inside the collector's atomic block, so the
+    balance update is committed together with the deletion.
+    """
+    BankAccount.apply_transaction_delta(instance.account_id, instance.date, -instance.signed_amount)
+
+
+@receiver(post_delete, sender=Transaction)
+def remove_transaction_from_rollup(sender, instance, **kwargs):
+    """Take a deleted transaction out of its MonthlyRollup row"""
+    MonthlyRollup.apply_delta(instance.__dict__, instance.date, -1, -instance.amount)
+
+
+def sync_account_households(account_ids):
+    """Set the tax_household of bank accounts from their (remaining) members"""
+    for account in BankAccount.objects.filter(pk__in=account_ids):
+        household_id = account.members.values_list('tax_household_id', flat=True).first()
+        if household_id != account.tax_household_id:
+            BankAccount.objects.filter(pk=account.pk).update(tax_household_id=household_id)
+            TaxHousehold.bump_data_version(account.tax_household_id)
+            TaxHousehold.bump_data_version(household_id)
+            TaxHousehold.bump_reference_version(account.tax_household_id)
+            TaxHousehold.bump_reference_version(household_id)
+
+
+@receiver(m2m_changed, sender=BankAccount.members.through)
+def update_account_household(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep BankAccount.tax_household consistent when account owners change"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # account.members.add(...) / remove(...) / clear() / set(...)
+        sync_account_households([instance.pk])
+    elif action == 'post_clear':
+        # member.bank_accounts.clear(): the affected accounts are no longer known, so
+        # check the accounts of the household that lost their last owner
+        BankAccount.objects.filter(
+            tax_household_id=instance.tax_household_id,
+            members__isnull=True
+        ).update(tax_household=None)
+        TaxHousehold.bump_data_version(instance.tax_household_id)
+        TaxHousehold.bump_reference_version(instance.tax_household_id)
+    else:
+        # member.bank_accounts.add(...) / remove(...)
+        sync_account_households(pk_set or [])
+
+
+@receiver(post_delete, sender=HouseholdMember)
+def detach_orphaned_accounts(sender, instance, **kwargs):
+    """Accounts whose only owner was deleted no longer belong to the household"""
+    BankAccount.objects.filter(
+        tax_household_id=instance.tax_household_id,
+        members__isnull=True
+    ).update(tax_household=None)
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=BankAccount)
+@receiver([post_save, post_delete], sender=TransactionCategory)
+@receiver([post_save, post_delete], sender=CostCenter)
+@receiver([post_save, post_delete], sender=HouseholdMember)
+def bump_household_data_version(sender, instance, **kwargs):
+    """Invalidate the cached reports of the household whose data changed"""
+    TaxHousehold.bump_data_version(instance.tax_household_id)
+
+
+@receiver([post_save, post_delete], sender=BankAccount)
+@receiver([post_save, post_delete], sender=TransactionCategory)
+@receiver([post_save, post_delete], sender=CostCenter)
+@receiver([post_save, post_delete], sender=HouseholdMember)
+def bump_household_reference_version(sender, instance, **kwargs):
+    """Invalidate the cached form choices and system objects of the household whose reference data changed"""
+    TaxHousehold.bump_reference_version(instance.tax_household_id)
+
+
+@receiver([post_save, post_delete], sender=PaymentMethod)
+def bump_all_household_reference_versions(sender, instance, **kwargs):
+    """Payment methods are shared by all households: invalidate the cached form choices of every household"""
+    TaxHousehold.bump_all_reference_versions()
+
+
+@receiver(post_save, sender=TaxHousehold)
+def provision_household_system_objects(sender, instance, created, **kwargs):
+    """Give new households the Transfer cost center and category used by transfers"""
+    if created:
+        provision_household(instance)
+
+
+@receiver([post_save, post_delete], sender=OccurrenceException)
+def refresh_recurring_parent(sender, instance, **kwargs):
+    """
+    Keep the next occurrence date of the parent in line with its occurrence exceptions
+    (a moved occurrence may come first) and invalidate the household's cached reports.
+    Exceptions deleted along with their parent have nothing left to refresh.
+    """
+    parent = Transaction.objects.filter(pk=instance.parent_id).first()
+    if parent is None:
+        return
+    Transaction.objects.filter(pk=parent.pk).update(next_occurrence_date=parent.compute_next_occurrence())
+    TaxHousehold.bump_data_version(parent.tax_household_id)
@@ -1,3 +1,341 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from .models import (
+    AccountType, BankAccount, CategorizationRule, ExchangeRate, HouseholdMember, OccurrenceException, PaymentMethod, TaxHousehold, Transaction, TransactionCategory
+)
+from .utils.balances import balance_evolutions
+from .utils.categorization import apply_rules
+from .utils.export import parse_transaction_filters
+from .utils.household import HouseholdContext
+from .utils.networth import net_worth_timeline
+from .utils.recategorization import recategorize_transactions
+from .utils.reconciliation import StatementParseError, parse_statement_csv
+from .utils.recurrence import (
+    first_index_on_or_after, next_occurrence_date, occurrence_date, occurrence_dates, occurrence_offsets
+)
+from .utils.rollups import find_rollup_drift
+from .utils.system_objects import get_transfer_category
+
+
+class ParseStatementCsvTests(TestCase):
+    def test_parses_amount_and_debit_credit_columns(self):
+        lines = parse_statement_csv("date,description,amount\n2026-01-05,Groceries,-12.50\n2026-01-06,Salary,2000\n")
+        self.assertEqual([line.amount for line in lines], [Decimal('-12.50'), Decimal('2000.00')])
+
+        lines = parse_statement_csv("date;label;debit;credit\n05/01/2026;Rent;800,00;\n")
+        self.assertEqual(lines[0].amount, Decimal('-800.00'))
+
+    def test_short_row_raises_parse_error(self):
+        content = "date,description,amount\n2026-01-05,Groceries,-12.50\n2026-01-06,Short\n"
+        with self.assertRaisesMessage(StatementParseError, "Line 3"):
+            parse_statement_csv(content)
+
+
+class ParseTransactionFiltersTests(TestCase):
+    def test_invalid_values_are_ignored(self):
+        filters = parse_transaction_filters({
+            'category': 'abc', 'type': 'other', 'date_from': '2024-02-30', 'date_to': '2024-13-01',
+        })
+        self.assertEqual(filters, {'category': None, 'account': None, 'type': None, 'date_from': None, 'date_to': None})
+
+    def test_valid_dates_are_parsed(self):
+        filters = parse_transaction_filters({'date_from': '2024-02-29', 'date_to': ''})
+        self.assertEqual(filters['date_from'], date(2024, 2, 29))
+        self.assertIsNone(filters['date_to'])
+
+
+class HouseholdTestMixin:
+    """Household with one member, a category, a payment method and two accounts holding 1000 and 0"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='secret')
+        cls.household = TaxHousehold.objects.create(user=cls.user, name='Home')
+        cls.member = HouseholdMember.objects.create(
+            tax_household=cls.household, first_name='Ann', last_name='Smith', date_of_birth=date(1980, 1, 1)
+        )
+        account_type = AccountType.objects.create(designation='Current account', short_designation='CA')
+        cls.accounts = []
+        for name, balance in (('Main', Decimal('1000')), ('Savings', Decimal('0'))):
+            account = BankAccount.objects.create(
+                name=name, bank_name='Bank', account_type=account_type, currency='EUR',
+                balance=balance, balance_date=date(2026, 1, 1)
+            )
+            account.members.set([cls.member])
+            cls.accounts.append(account)
+        cls.category = TransactionCategory.objects.create(tax_household=cls.household, name='Food')
+        cls.payment_method = PaymentMethod.objects.create(name='Card')
+
+    def create_transaction(self, account, transaction_type, amount, day, **fields):
+        return Transaction.objects.create(
+            tax_household=self.household, account=account, transaction_type=transaction_type,
+            amount=Decimal(amount), date=day, description=fields.pop('description', 'Transaction'),
+            category=fields.pop('category', self.category), payment_method=self.payment_method, **fields
+        )
+
+    def create_recurring_transfer(self, source, destination, amount, day, period='monthly'):
+        fields = {'description': 'Savings', 'is_transfer': True, 'is_recurring': True, 'recurrence_period': period}
+        withdrawal = self.create_transaction(source, 'expense', amount, day, **fields)
+        deposit = self.create_transaction(destination, 'income', amount, day, paired_transaction=withdrawal, **fields)
+        withdrawal.paired_transaction = deposit
+        withdrawal.save()
+        return withdrawal, deposit
+
+
+class BalanceEvolutionRecurringTransferTests(HouseholdTestMixin, TestCase):
+    """A monthly transfer of 100 from Main to Savings, recorded on Jan 15 and generated until Sep 15"""
+
+    def setUp(self):
+        self.create_recurring_transfer(self.accounts[0], self.accounts[1], '100', date(2026, 1, 15))
+
+    def final_balances(self, accounts):
+        data = balance_evolutions(accounts, date(2026, 1, 1), date(2026, 10, 1))
+        return {series['account_id']: series['balances'][-1] for series in data['accounts']}
+
+    def test_single_account(self):
+        main, savings = self.accounts
+        self.assertEqual(self.final_balances([main]), {main.id: 100.0})
+        self.assertEqual(self.final_balances([savings]), {savings.id: 900.0})
+
+    def test_both_accounts(self):
+        main, savings = self.accounts
+        self.assertEqual(self.final_balances([main, savings]), {main.id: 100.0, savings.id: 900.0})
+
+    def test_net_worth_across_currencies(self):
+        main, savings = self.accounts
+        BankAccount.objects.filter(pk=savings.pk).update(currency='USD')
+        ExchangeRate.objects.create(date=date(2025, 12, 1), base_currency='USD', currency='EUR', rate=Decimal('0.5'))
+        data = net_worth_timeline(self.household, date(2026, 1, 1), date(2026, 10, 1), 'EUR')
+        # 100 EUR on Main and 900 USD on Savings
+        self.assertEqual(data['net_worth'][-1], 550.0)
+
+
+class RecurrenceEngineTests(TestCase):
+    PERIODS = ('daily', 'weekly', 'monthly', 'quarterly', 'annually')
+    STARTS = (date(2024, 1, 31), date(2024, 2, 29), date(2023, 8, 31), date(2023, 11, 30), date(2024, 3, 15))
+
+    def test_month_end_is_clamped_without_drifting(self):
+        start = date(2025, 1, 31)
+        self.assertEqual(
+            [occurrence_date(start, 'monthly', index) for index in range(4)],
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)]
+        )
+        self.assertEqual(occurrence_date(date(2024, 1, 31), 'monthly', 1), date(2024, 2, 29))
+        self.assertEqual(occurrence_date(date(2023, 11, 30), 'quarterly', 1), date(2024, 2, 29))
+        self.assertEqual(occurrence_date(date(2023, 11, 30), 'quarterly', 2), date(2024, 5, 30))
+
+    def test_february_29_start(self):
+        start = date(2024, 2, 29)
+        self.assertEqual(
+            [occurrence_date(start, 'annually', index) for index in range(5)],
+            [date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)]
+        )
+        self.assertEqual(occurrence_date(start, 'monthly', 1), date(2024, 3, 29))
+        self.assertEqual(next_occurrence_date(start, 'annually', date(2030, 1, 1), date(2025, 3, 1)), date(2026, 2, 28))
+        self.assertIsNone(next_occurrence_date(start, 'annually', date(2026, 2, 27), date(2025, 3, 1)))
+
+    def test_unknown_period(self):
+        with self.assertRaises(ValueError):
+            occurrence_date(date(2024, 1, 1), 'fortnightly', 1)
+        self.assertIsNone(next_occurrence_date(date(2024, 1, 1), 'fortnightly', date(2025, 1, 1), date(2024, 6, 1)))
+
+    def test_windowed_starts_match_full_enumeration(self):
+        window_end = date(2027, 12, 31)
+        for period in self.PERIODS:
+            for start in self.STARTS:
+                full = list(occurrence_dates(start, period, window_end=window_end))
+                for window_start in (start - timedelta(days=3), start, *(start + timedelta(days=offset) for offset in range(1, 800, 13))):
+                    with self.subTest(period=period, start=start, window_start=window_start):
+                        expected = [day for day in full if window_start <= day <= window_end]
+                        self.assertEqual(list(occurrence_dates(start, period, window_start, window_end)), expected)
+
+                        index = first_index_on_or_after(start, period, window_start)
+                        self.assertGreaterEqual(occurrence_date(start, period, index), window_start)
+                        if index:
+                            self.assertLess(occurrence_date(start, period, index - 1), window_start)
+
+                        offsets = occurrence_offsets(start, period, window_start, window_end, date(2023, 1, 1))
+                        self.assertEqual([date(2023, 1, 1) + timedelta(days=int(offset)) for offset in offsets], expected)
+
+
+class OccurrenceExceptionTests(HouseholdTestMixin, TestCase):
+    def test_exceptions_of_dates_no_longer_scheduled_are_ignored(self):
+        parent = self.create_transaction(
+            self.accounts[0], 'expense', '30', date(2026, 1, 5), is_recurring=True, recurrence_period='monthly'
+        )
+        OccurrenceException.objects.create(parent=parent, occurrence_date=date(2026, 3, 5), date=date(2026, 3, 10))
+
+        def dates():
+            parent.refresh_from_db()
+            return [instance.date for instance in parent.generate_recurring_instances(current_date=date(2026, 6, 30))]
+
+        self.assertIn(date(2026, 3, 10), dates())
+        self.assertNotIn(date(2026, 3, 5), dates())
+        self.assertEqual(parent.compute_next_occurrence(date(2026, 3, 6)), date(2026, 3, 10))
+
+        parent.recurrence_period = 'quarterly'
+        parent.save()
+        self.assertEqual(dates(), [date(2026, 1, 5), date(2026, 4, 5)])
+        self.assertEqual(parent.compute_next_occurrence(date(2026, 3, 6)), date(2026, 4, 5))
+
+
+class MonthlyRollupTests(HouseholdTestMixin, TestCase):
+    def assertNoDrift(self):
+        self.assertEqual(list(find_rollup_drift(self.household)), [])
+
+    def test_save_update_and_delete(self):
+        main, savings = self.accounts
+        transaction = self.create_transaction(main, 'expense', '10', date(2026, 1, 10))
+        self.create_transaction(main, 'expense', '5', date(2026, 1, 20))
+        self.assertNoDrift()
+
+        # Changes of amount, month, account, category and type move the transaction between rows
+        transaction.amount = Decimal('12.50')
+        transaction.save()
+        self.assertNoDrift()
+        transaction.date = date(2026, 2, 1)
+        transaction.save()
+        self.assertNoDrift()
+        transaction.account = savings
+        transaction.category = TransactionCategory.objects.create(tax_household=self.household, name='Rent')
+        transaction.transaction_type = 'income'
+        transaction.save()
+        self.assertNoDrift()
+
+        transaction.delete()
+        self.assertNoDrift()
+
+    def test_bulk_recategorization(self):
+        main = self.accounts[0]
+        for day in (date(2026, 1, 5), date(2026, 1, 6), date(2026, 2, 5)):
+            self.create_transaction(main, 'expense', '20', day)
+        rent = TransactionCategory.objects.create(tax_household=self.household, name='Rent')
+
+        filters = {'category': None, 'account': None, 'type': None, 'date_from': date(2026, 1, 6), 'date_to': None}
+        self.assertEqual(recategorize_transactions(self.household, rent, filters=filters), 2)
+        self.assertNoDrift()
+
+
+class FormChoicesTests(HouseholdTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def form_choices(self):
+        return HouseholdContext(User.objects.get(pk=self.user.pk)).form_choices
+
+    def test_snapshot_follows_the_household_reference_version(self):
+        self.assertEqual(sorted(label for _, label in self.form_choices()['categories']), ['Food', 'Transfer'])
+
+        # A change made by another process only reaches this one through the reference version
+        TransactionCategory.objects.filter(pk=self.category.pk).update(name='Groceries')
+        self.assertIn('Food', [label for _, label in self.form_choices()['categories']])
+        TaxHousehold.bump_reference_version(self.household.pk)
+        self.assertEqual(sorted(label for _, label in self.form_choices()['categories']), ['Groceries', 'Transfer'])
+
+    def test_snapshot_is_kept_when_transactions_change(self):
+        self.form_choices()
+        self.create_transaction(self.accounts[0], 'expense', '10', date(2026, 1, 10))
+        with self.assertNumQueries(2):
+            # The user and the household only
+            self.form_choices()
+
+    def test_payment_methods_are_shared_by_all_households(self):
+        self.form_choices()
+        PaymentMethod.objects.create(name='Cheque')
+        self.assertIn('Cheque', [label for _, label in self.form_choices()['payment_methods']])
+
+
+class TransferCategoryTests(HouseholdTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def transfer_category(self):
+        return get_transfer_category(TaxHousehold.objects.get(pk=self.household.pk))
+
+    def test_provisioned_with_the_household(self):
+        category = self.transfer_category()
+        self.assertEqual((category.name, category.cost_center.name), ('Transfer', 'Transfer'))
+
+    def test_replaced_category_is_not_read_from_the_cache(self):
+        cached = self.transfer_category()
+        self.assertEqual(self.transfer_category().pk, cached.pk)
+
+        # Renamed by another process: only the reference version tells this one
+        TransactionCategory.objects.filter(pk=cached.pk).update(name='Moves')
+        TaxHousehold.bump_reference_version(self.household.pk)
+        category = self.transfer_category()
+        self.assertNotEqual(category.pk, cached.pk)
+        self.assertTrue(TransactionCategory.objects.filter(pk=category.pk, name='Transfer').exists())
+
+    def test_category_is_kept_when_transactions_change(self):
+        self.transfer_category()
+        self.create_transaction(self.accounts[0], 'expense', '10', date(2026, 1, 10))
+        household = TaxHousehold.objects.get(pk=self.household.pk)
+        with self.assertNumQueries(0):
+            get_transfer_category(household)
+
+    def test_category_provisioned_on_a_miss_is_cached_under_the_new_version(self):
+        TransactionCategory.objects.filter(tax_household=self.household, name='Transfer').delete()
+        created = self.transfer_category()
+        household = TaxHousehold.objects.get(pk=self.household.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_transfer_category(household).pk, created.pk)
+
+
+class ApplyRulesTests(HouseholdTestMixin, TestCase):
+    def test_only_transactions_that_change_are_counted(self):
+        rent = TransactionCategory.objects.create(tax_household=self.household, name='Rent')
+        CategorizationRule.objects.create(
+            tax_household=self.household, name='Rent', pattern='landlord', category=rent, recipient_type='family'
+        )
+        self.create_transaction(self.accounts[0], 'expense', '800', date(2026, 1, 1), description='LANDLORD SEPA')
+        # In the category of the rule already, but with another recipient
+        self.create_transaction(
+            self.accounts[0], 'expense', '800', date(2026, 2, 1), description='LANDLORD SEPA',
+            category=rent, recipient_type='member', recipient_member=self.member
+        )
+        # Nothing to change
+        self.create_transaction(
+            self.accounts[0], 'expense', '800', date(2026, 3, 1), description='LANDLORD SEPA',
+            category=rent, recipient_type='family'
+        )
+
+        self.assertEqual(sum(apply_rules(self.household, dry_run=True).values()), 2)
+        self.assertEqual(sum(apply_rules(self.household).values()), 2)
+        self.assertEqual(apply_rules(self.household), {})
+        self.assertEqual(Transaction.objects.filter(category=rent, recipient_type='family').count(), 3)
+        self.assertEqual(list(find_rollup_drift(self.household)), [])
+
+
+class VerifyBalancesTests(HouseholdTestMixin, TestCase):
+    def setUp(self):
+        self.main = self.accounts[0]
+        self.create_transaction(self.main, 'expense', '109.94', date(2026, 1, 10))
+        # Corrupted stored balance, last refreshed yesterday
+        yesterday = timezone.now().date() - timedelta(days=1)
+        BankAccount.objects.filter(pk=self.main.pk).update(current_balance=Decimal('123'), current_balance_as_of=yesterday)
+
+    def verify(self, *args):
+        out = StringIO()
+        call_command('verify_balances', *args, stdout=out)
+        return out.getvalue()
+
+    def test_drift_of_stale_account_is_reported(self):
+        output = self.verify()
+        self.assertIn('stored 123.00, expected 890.06 (drift -767.06)', output)
+        self.assertIn('1 balances drifted', output)
+        self.assertEqual(BankAccount.objects.get(pk=self.main.pk).current_balance, Decimal('123'))
 
-# Create your tests here.
+    def test_fix(self):
+        self.assertIn('1 balances fixed', self.verify('--fix'))
+        account = BankAccount.objects.get(pk=self.main.pk)
+        self.assertEqual((account.current_balance, account.current_balance_as_of), (Decimal('890.06'), timezone.now().date()))
+        self.assertIn('All 2 balances are consistent', self.verify())
@@ -19,8 +19,11 @@ urlpatterns = [
     
     # Reporting & Analytics URLs
     path('reporting/balance-evolution/', views.balance_evolution, name='balance_evolution'),
+    path('reporting/net-worth/', views.net_worth, name='net_worth'),
+    path('reporting/forecast/', views.cash_flow_forecast, name='cash_flow_forecast'),
     path('reporting/account-overview/', views.account_overview, name='account_overview'),
     path('reporting/expense-analysis/', views.expense_analysis, name='expense_analysis'),
+    path('reporting/expense-analysis/transactions/', views.expense_analysis_transactions, name='expense_analysis_transactions'),
     path('reporting/income-analysis/', views.income_analysis, name='income_analysis'),
     
     # Financial Environment URLs
@@ -35,6 +38,7 @@ urlpatterns = [
     path('financial/bank-account/create/', views.bank_account_create, name='bank_account_create'),
     path('financial/bank-account/<int:pk>/update/', views.bank_account_update, name='bank_account_update'),
     path('financial/bank-account/<int:pk>/delete/', views.bank_account_delete, name='bank_account_delete'),
+    path('financial/bank-account/<int:pk>/reconcile/', views.bank_account_reconcile, name='bank_account_reconcile'),
     
     # Cost Center URLs
     path('financial/cost-centers/', views.cost_center_list, name='cost_center_list'),
@@ -49,14 +53,25 @@ urlpatterns = [
     path('financial/category/<int:pk>/update/', views.category_update, name='category_update'),
     path('financial/category/<int:pk>/delete/', views.category_delete, name='category_delete'),
     
+    # Categorization Rule URLs
+    path('financial/rules/', views.categorization_rule_list, name='categorization_rule_list'),
+    path('financial/rule/create/', views.categorization_rule_create, name='categorization_rule_create'),
+    path('financial/rule/<int:pk>/update/', views.categorization_rule_update, name='categorization_rule_update'),
+    path('financial/rule/<int:pk>/delete/', views.categorization_rule_delete, name='categorization_rule_delete'),
+    path('financial/rules/apply/', views.categorization_rule_apply, name='categorization_rule_apply'),
+    
     # Transaction URLs
     path('transactions/', views.transaction_list, name='transaction_list'),
+    path('transactions/export/', views.transaction_export, name='transaction_export'),
+    path('transactions/recategorize/', views.transaction_bulk_recategorize, name='transaction_bulk_recategorize'),
     path('transactions/recurring/', views.recurring_transaction_list, name='recurring_transaction_list'),
     path('transactions/recurring-transfers/', views.recurring_transfer_list, name='recurring_transfer_list'),
+    path('transactions/upcoming/', views.upcoming_transactions, name='upcoming_transactions'),
     path('transaction/create/', views.transaction_create, name='transaction_create'),
     path('transaction/<int:pk>/update/', views.transaction_update, name='transaction_update'),
     path('transaction/<int:pk>/delete/', views.transaction_delete, name='transaction_delete'),
     path('transaction/<int:pk>/duplicate/', views.transaction_duplicate, name='transaction_duplicate'),
+    path('transaction/<int:pk>/occurrence/<str:occurrence_date>/', views.occurrence_edit, name='occurrence_edit'),
     
     # Currency selection
     path('set-currency/', views.set_currency, name='set_currency'),
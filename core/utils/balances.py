@@ -0,0 +1,240 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import models
+from django.utils import timezone
+
+from .currency import CurrencyExchangeService
+from .timeseries import reduce_series
+
+
+def annotate_net_since_balance_date(accounts, until=None):
+    """
+    Annotate bank accounts with `net_since_balance_date`: income minus expenses recorded
+    after the balance date and up to `until` (by default each account's
+    `current_balance_as_of`), computed with one conditional Sum per account.
+    A subquery is used so that the sum is not multiplied by joins added to the queryset
+    (e.g. on members).
+    """
+    from core.models import Transaction
+
+    net_amount = Transaction.objects.filter(
+        account=models.OuterRef('pk'),
+        date__gt=models.OuterRef('balance_date'),
+        date__lte=until if until is not None else models.OuterRef('current_balance_as_of')
+    ).order_by().values('account').annotate(
+        net=models.Sum(
+            models.Case(
+                models.When(transaction_type='income', then=models.F('amount')),
+                default=-models.F('amount'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            )
+        )
+    ).values('net')
+
+    return accounts.annotate(
+        net_since_balance_date=models.Subquery(net_amount, output_field=models.DecimalField(max_digits=12, decimal_places=2))
+    )
+
+
+def refresh_current_balances(accounts, today=None):
+    """
+    Bring stored current balances up to today. Transactions dated in the future are
+    left out of the current balance until their date is reached, so accounts last
+    refreshed on an earlier day are recomputed (one query for all of them, then one
+    UPDATE per stale account). Accounts already refreshed today cost a single query
+    that does not touch the transaction table.
+
+    Returns:
+        Number of accounts refreshed
+    """
+    from core.models import BankAccount
+
+    if today is None:
+        today = timezone.now().date()
+
+    stale_ids = list(BankAccount.objects.filter(
+        id__in=accounts.values('id')
+    ).filter(
+        models.Q(current_balance_as_of__lt=today) | models.Q(current_balance_as_of__isnull=True)
+    ).values_list('id', flat=True))
+    if not stale_ids:
+        return 0
+
+    stale = annotate_net_since_balance_date(
+        BankAccount.objects.filter(id__in=stale_ids),
+        until=today
+    ).values('id', 'balance', 'net_since_balance_date')
+
+    refreshed = 0
+    for account in stale:
+        BankAccount.objects.filter(pk=account['id']).update(
+            current_balance=account['balance'] + (account['net_since_balance_date'] or Decimal('0.00')),
+            current_balance_as_of=today
+        )
+        refreshed += 1
+    return refreshed
+
+
+def find_balance_drift(accounts):
+    """
+    Recompute the current balance of each account from its transactions, up to the day
+    the stored value was computed, and yield (account, expected_balance) for every
+    account whose stored value differs.
+    """
+    for account in annotate_net_since_balance_date(accounts.filter(current_balance_as_of__isnull=False)):
+        expected = (account.balance + (account.net_since_balance_date or Decimal('0.00'))).quantize(Decimal('0.01'))
+        if expected != account.current_balance:
+            yield account, expected
+
+
+def _signed(transaction_type, amount):
+    return amount if transaction_type == 'income' else -amount
+
+
+def recurring_occurrences(account_ids, until):
+    """
+    Yield the generated occurrences (up to `until`) of the recurring transactions of
+    the given accounts. Parents are loaded with their related objects in one query.
+    A recurring transfer is expanded from one of its two parents only, since each
+    parent generates both sides, and the side on an account outside `account_ids`
+    is left out.
+    """
+    from core.models import Transaction
+
+    account_ids = set(account_ids)
+    parents = Transaction.objects.filter(
+        account_id__in=list(account_ids),
+        is_recurring=True
+    ).select_related(
+        'tax_household', 'category', 'account', 'payment_method', 'recipient_member',
+        'paired_transaction__tax_household', 'paired_transaction__category', 'paired_transaction__account',
+        'paired_transaction__payment_method', 'paired_transaction__recipient_member',
+    ).prefetch_related('occurrence_exceptions')
+    processed_transfers = set()
+    for parent in parents:
+        if parent.is_transfer and parent.paired_transaction_id:
+            pair_key = tuple(sorted([parent.id, parent.paired_transaction_id]))
+            if pair_key in processed_transfers:
+                continue
+            processed_transfers.add(pair_key)
+
+        for instance in parent.generate_recurring_instances(current_date=until):
+            if instance.account_id in account_ids:
+                yield instance
+
+
+def balance_evolutions(accounts, start_date, end_date, display_currency=None, include_total=False,
+                       granularity='day', aggregation='close', max_points=None):
+    """
+    Daily balance series of several bank accounts, for the balance evolution chart.
+
+    The stored transactions of all the accounts are loaded with one query and grouped
+    by account and day in a single pass. Occurrences of recurring transactions are added
+    unless an identical transaction (date, amount, type) is already recorded on the
+    account. Each series starts with the balance before start_date, followed by one
+    point per day up to end_date.
+
+    Args:
+        accounts: Iterable of BankAccount, in chart order
+        start_date: First day of the chart
+        end_date: Last day of the chart
+        display_currency: Currency of the returned balances (defaults to each account's currency)
+        include_total: Also return the sum of all series, point by point
+        granularity, aggregation, max_points: Resampling and downsampling options
+            (see timeseries.reduce_series)
+
+    Returns:
+        Dictionary with 'dates', 'currency', 'accounts' (one series per account) and,
+        when requested, 'total'. With the 'minmax' aggregation, series also get
+        'balances_min'/'balances_max' (and 'total_min'/'total_max')
+    """
+    from core.models import Transaction
+
+    accounts = list(accounts)
+    if not accounts:
+        return {'dates': [], 'currency': display_currency, 'accounts': [], 'total': [] if include_total else None}
+
+    # Net change per account and day, and the transactions recorded on each account
+    changes = {account.id: defaultdict(Decimal) for account in accounts}
+    recorded = {account.id: set() for account in accounts}
+
+    # Transactions between the earliest and latest dates any series depends on
+    first_day = min([start_date] + [account.balance_date for account in accounts])
+    last_day = max([end_date] + [account.balance_date for account in accounts])
+    rows = Transaction.objects.filter(
+        account_id__in=changes.keys(),
+        date__gte=first_day,
+        date__lte=last_day
+    ).order_by().values_list('account_id', 'date', 'transaction_type', 'amount')
+    for account_id, day, transaction_type, amount in rows.iterator(chunk_size=2000):
+        changes[account_id][day] += _signed(transaction_type, amount)
+        recorded[account_id].add((day, amount, transaction_type))
+
+    # Generated occurrences of recurring transactions
+    for instance in recurring_occurrences(changes.keys(), end_date):
+        if (instance.date, instance.amount, instance.transaction_type) in recorded[instance.account_id]:
+            continue
+        changes[instance.account_id][instance.date] += _signed(instance.transaction_type, instance.amount)
+
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+    series = []
+    totals = None
+    factors = {}
+    for account in accounts:
+        account_changes = changes[account.id]
+
+        # Balance before the first day of the chart
+        balance = account.balance
+        if start_date < account.balance_date:
+            balance -= sum(change for day, change in account_changes.items() if start_date <= day < account.balance_date)
+        else:
+            balance += sum(change for day, change in account_changes.items() if account.balance_date <= day < start_date)
+
+        balances = [balance]
+        for day in days:
+            balance += account_changes.get(day, Decimal('0'))
+            balances.append(balance)
+
+        # One exchange rate per account currency; balances stay in the account currency if it is unavailable
+        currency = display_currency or account.currency
+        if currency != account.currency:
+            if account.currency not in factors:
+                factors[account.currency] = CurrencyExchangeService.convert_currency(Decimal('1'), account.currency, currency)
+            if factors[account.currency] is not None:
+                balances = [balance * factors[account.currency] for balance in balances]
+
+        if include_total:
+            totals = balances if totals is None else [total + balance for total, balance in zip(totals, balances)]
+
+        series.append({
+            'account_id': account.id,
+            'account_name': account.name,
+            'balances': [float(balance) for balance in balances],
+            'currency': currency,
+            'original_currency': account.currency,
+        })
+
+    result = {
+        'dates': [day.strftime('%Y-%m-%d') for day in [start_date] + days],
+        'currency': display_currency,
+        'accounts': series,
+        'total': [float(total) for total in totals] if include_total else None,
+    }
+
+    # Resample / downsample all the lines of the chart together, so they keep sharing dates
+    lines = [(account, 'balances') for account in series]
+    if include_total:
+        lines.append((result, 'total'))
+    result['dates'], reduced = reduce_series(
+        result['dates'], [line[key] for line, key in lines], granularity, aggregation, max_points
+    )
+    for (line, key), points in zip(lines, reduced):
+        line[key] = points['close']
+        if aggregation == 'minmax':
+            line[f'{key}_min'] = points['min']
+            line[f'{key}_max'] = points['max']
+
+    return result
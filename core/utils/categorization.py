@@ -0,0 +1,198 @@
+import re
+from collections import defaultdict
+
+from .rollups import move_rollups
+
+
+def _trie_pattern(literals):
+    """
+    Build a regular expression matching any of the given literals, shaped as a trie
+    (e.g. 'a(?:mazon|uchan)') so that the regex engine follows a single branch per
+    character instead of trying every alternative at every position. Optional tails
+    are greedy, so the longest literal starting at a position is the one reported.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class RuleMatcher:
+    """
+    All active categorization rules of a household compiled into a single matcher.
+
+    Substring rules are merged into one trie-shaped regular expression that is run once
+    per description (as an overlapping scan), so the cost per description does not grow
+    with the number of substring rules. Regular expression rules are searched
+    individually and rules without a pattern only check amounts. When several rules
+    match, the one with the lowest priority number whose amount and type constraints
+    accept the transaction wins.
+    """
+
+    def __init__(self, rules):
+        # Rules sorted by priority: a rule's position is its rank
+        self.rules = sorted(rules, key=lambda rule: (rule.priority, rule.id or 0))
+
+        literal_ranks = defaultdict(list)
+        self.regex_rules = []
+        self.unconditional_ranks = []
+
+        for rank, rule in enumerate(self.rules):
+            pattern = (rule.pattern or '').strip()
+            if not pattern:
+                self.unconditional_ranks.append(rank)
+            elif rule.match_type == 'regex':
+                try:
+                    self.regex_rules.append((rank, re.compile(pattern, re.IGNORECASE)))
+                except re.error:
+                    # Invalid patterns are rejected by the form; skip any that slipped through
+                    continue
+            else:
+                literal_ranks[pattern.lower()].append(rank)
+
+        # A literal found in a description implies every shorter literal it contains
+        self.literal_ranks = {}
+        for literal in literal_ranks:
+            self.literal_ranks[literal] = sorted(
+                rank
+                for other, ranks in literal_ranks.items()
+                if other in literal
+                for rank in ranks
+            )
+
+        self.literal_regex = None
+        if literal_ranks:
+            self.literal_regex = re.compile('(?=(' + _trie_pattern(literal_ranks) + '))')
+
+    @classmethod
+    def for_household(cls, household):
+        """Compile the active rules of a household"""
+        from core.models import CategorizationRule
+
+        rules = CategorizationRule.objects.filter(
+            tax_household=household,
+            is_active=True
+        ).select_related('category', 'payment_method', 'recipient_member')
+        return cls(list(rules))
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def candidate_ranks(self, description):
+        """Return the ranks of all rules whose pattern matches the description"""
+        ranks = set(self.unconditional_ranks)
+        if self.literal_regex is not None:
+            for literal in set(self.literal_regex.findall(description.lower())):
+                ranks.update(self.literal_ranks[literal])
+        for rank, regex in self.regex_rules:
+            if regex.search(description):
+                ranks.add(rank)
+        return ranks
+
+    def match(self, description, amount=None, transaction_type=None):
+        """
+        Find the rule to apply to a transaction.
+
+        Args:
+            description: Transaction description
+            amount: Positive transaction amount (optional)
+            transaction_type: 'expense' or 'income' (optional)
+
+        Returns:
+            The winning CategorizationRule or None
+        """
+        for rank in sorted(self.candidate_ranks(description or '')):
+            rule = self.rules[rank]
+            if rule.accepts(amount, transaction_type):
+                return rule
+        return None
+
+
+def _rule_changes(rule):
+    """Field values (by attname) a rule sets on the transactions it matches"""
+    changes = {'category_id': rule.category_id}
+    if rule.payment_method_id:
+        changes['payment_method_id'] = rule.payment_method_id
+    if rule.recipient_type:
+        changes['recipient_type'] = rule.recipient_type
+        changes['recipient_member_id'] = rule.recipient_member_id if rule.recipient_type == 'member' else None
+    return changes
+
+
+def apply_rules(household, transactions=None, matcher=None, dry_run=False, chunk_size=2000):
+    """
+    Re-apply the categorization rules of a household to existing transactions.
+
+    Descriptions are streamed from the database, matched in memory and the results
+    written back with one UPDATE per rule (batched by id) rather than one save()
+    per transaction. Transfers are never recategorized, and transactions that already
+    have the values of their rule are left untouched.
+
+    Args:
+        household: The TaxHousehold whose rules are applied
+        transactions: Optional Transaction queryset restricting the scope
+        matcher: Optional precompiled RuleMatcher
+        dry_run: Only count the changes without writing them
+        chunk_size: Number of ids per UPDATE statement
+
+    Returns:
+        Dictionary mapping each applied rule to the number of transactions it changed
+    """
+    from core.models import TaxHousehold, Transaction
+
+    if matcher is None:
+        matcher = RuleMatcher.for_household(household)
+    if not matcher:
+        return {}
+
+    if transactions is None:
+        transactions = Transaction.objects.all()
+    rows = transactions.filter(
+        tax_household=household,
+        is_transfer=False
+    ).values_list(
+        'id', 'description', 'amount', 'transaction_type',
+        'category_id', 'payment_method_id', 'recipient_type', 'recipient_member_id'
+    )
+
+    changes_by_rule = {}
+    ids_by_rule = defaultdict(list)
+    for transaction_id, description, amount, transaction_type, *current in rows.iterator(chunk_size=chunk_size):
+        rule = matcher.match(description, amount, transaction_type)
+        if rule is None:
+            continue
+        if rule not in changes_by_rule:
+            changes_by_rule[rule] = _rule_changes(rule)
+        values = dict(zip(('category_id', 'payment_method_id', 'recipient_type', 'recipient_member_id'), current))
+        if any(values[field] != value for field, value in changes_by_rule[rule].items()):
+            ids_by_rule[rule].append(transaction_id)
+
+    if not dry_run:
+        from django.db import transaction as db_transaction
+        from django.utils import timezone
+
+        now = timezone.now()
+        with db_transaction.atomic():
+            for rule, ids in ids_by_rule.items():
+                changes = {**changes_by_rule[rule], 'updated_at': now}
+                for start in range(0, len(ids), chunk_size):
+                    chunk = Transaction.objects.filter(id__in=ids[start:start + chunk_size])
+                    move_rollups(chunk, changes)
+                    chunk.update(**changes)
+            if ids_by_rule:
+                TaxHousehold.bump_data_version(household.id)
+
+    return {rule: len(ids) for rule, ids in ids_by_rule.items()}
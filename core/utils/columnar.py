@@ -0,0 +1,204 @@
+import os
+import zipfile
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+    pq = None
+
+
+# Column kinds and how they are stored:
+#   int     -> int64 (missing foreign keys are -1 in .npz files)
+#   str     -> UTF-8 string
+#   date    -> date32 / datetime64[D] (NaT when missing)
+#   decimal -> decimal128(12, 2) / float64
+#   bool    -> bool
+TABLES = {
+    'transactions': {
+        'model': 'Transaction',
+        'columns': [
+            ('id', 'int'),
+            ('date', 'date'),
+            ('description', 'str'),
+            ('transaction_type', 'str'),
+            ('amount', 'decimal'),
+            ('account_id', 'int'),
+            ('category_id', 'int'),
+            ('payment_method_id', 'int'),
+            ('recipient_type', 'str'),
+            ('recipient_member_id', 'int'),
+            ('is_transfer', 'bool'),
+            ('paired_transaction_id', 'int'),
+            ('is_recurring', 'bool'),
+            ('recurrence_period', 'str'),
+        ],
+    },
+    'bank_accounts': {
+        'model': 'BankAccount',
+        'columns': [
+            ('id', 'int'),
+            ('name', 'str'),
+            ('bank_name', 'str'),
+            ('account_type__short_designation', 'str'),
+            ('currency', 'str'),
+            ('reference', 'str'),
+            ('balance', 'decimal'),
+            ('balance_date', 'date'),
+        ],
+    },
+    'categories': {
+        'model': 'TransactionCategory',
+        'columns': [
+            ('id', 'int'),
+            ('name', 'str'),
+            ('cost_center_id', 'int'),
+        ],
+    },
+    'cost_centers': {
+        'model': 'CostCenter',
+        'columns': [
+            ('id', 'int'),
+            ('name', 'str'),
+            ('color', 'str'),
+        ],
+    },
+}
+
+FORMATS = ('parquet', 'npz')
+
+
+def pyarrow_available():
+    return pa is not None
+
+
+def _column_name(field):
+    # 'account_type__short_designation' is exported as 'account_type'
+    return field.split('__')[0]
+
+
+def _table_rows(household, table, chunk_size):
+    """Yield lists of value tuples (row groups) for one table of a household"""
+    from core import models
+
+    spec = TABLES[table]
+    model = getattr(models, spec['model'])
+    fields = [field for field, _ in spec['columns']]
+    queryset = model.objects.filter(tax_household=household).order_by('id')
+
+    group = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        group.append(row)
+        if len(group) >= chunk_size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def _arrow_type(kind):
+    return {
+        'int': pa.int64(),
+        'str': pa.string(),
+        'date': pa.date32(),
+        'decimal': pa.decimal128(12, 2),
+        'bool': pa.bool_(),
+    }[kind]
+
+
+def _numpy_column(values, kind):
+    if kind == 'int':
+        return np.array([-1 if value is None else value for value in values], dtype=np.int64)
+    if kind == 'str':
+        return np.array(['' if value is None else value for value in values], dtype=np.str_)
+    if kind == 'date':
+        return np.array(values, dtype='datetime64[D]')
+    if kind == 'decimal':
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+    return np.array(values, dtype=np.bool_)
+
+
+def _write_parquet(path, columns, groups):
+    schema = pa.schema([(_column_name(field), _arrow_type(kind)) for field, kind in columns])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for group in groups:
+            # Each chunk becomes one row group
+            arrays = [
+                pa.array(values, type=field.type)
+                for field, values in zip(schema, zip(*group))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(group)
+    return rows
+
+
+def _write_npz(path, columns, groups):
+    """
+    Write an .npz archive with one array per column and row group, named
+    '<column>.<group>' (e.g. 'amount.00000'). Groups are written as they arrive, so
+    only one group is held in memory; read_npz() concatenates them back.
+    """
+    rows = 0
+    with zipfile.ZipFile(path, 'w', allowZip64=True) as archive:
+        group_number = 0
+        for group in groups:
+            for (field, kind), values in zip(columns, zip(*group)):
+                array = _numpy_column(values, kind)
+                with archive.open(f'{_column_name(field)}.{group_number:05d}.npy', 'w', force_zip64=True) as entry:
+                    np.lib.format.write_array(entry, array, allow_pickle=False)
+            rows += len(group)
+            group_number += 1
+        if not group_number:
+            # Keep empty tables loadable, with the right dtypes
+            for field, kind in columns:
+                with archive.open(f'{_column_name(field)}.00000.npy', 'w') as entry:
+                    np.lib.format.write_array(entry, _numpy_column([], kind), allow_pickle=False)
+    return rows
+
+
+def read_npz(path):
+    """Load a table written by export_household() in .npz format as a dict of column arrays"""
+    groups = {}
+    with np.load(path, allow_pickle=False) as archive:
+        for name in sorted(archive.files):
+            column = name.rsplit('.', 1)[0]
+            groups.setdefault(column, []).append(archive[name])
+    return {column: np.concatenate(arrays) for column, arrays in groups.items()}
+
+
+def export_household(household, directory, file_format=None, chunk_size=50000):
+    """
+    Export the transactions, bank accounts, categories and cost centers of a household
+    as columnar files, one per table.
+
+    Rows are read from the database with a chunked iterator and written one row group
+    at a time, so memory use is bounded by the chunk size rather than the history size.
+
+    Args:
+        household: The TaxHousehold to export
+        directory: Output directory (created if missing)
+        file_format: 'parquet' or 'npz'; defaults to Parquet when pyarrow is installed
+        chunk_size: Number of rows per row group
+
+    Returns:
+        Dictionary mapping each written file path to its number of rows
+    """
+    if file_format is None:
+        file_format = 'parquet' if pyarrow_available() else 'npz'
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported columnar format: {file_format}")
+    if file_format == 'parquet' and not pyarrow_available():
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    os.makedirs(directory, exist_ok=True)
+    writer = _write_parquet if file_format == 'parquet' else _write_npz
+
+    written = {}
+    for table, spec in TABLES.items():
+        path = os.path.join(directory, f'{table}.{file_format}')
+        written[path] = writer(path, spec['columns'], _table_rows(household, table, chunk_size))
+    return written
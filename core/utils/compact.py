@@ -0,0 +1,117 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.http import HttpResponse
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+# Compact payloads replace bulky values with marker objects that static/js/compact.js
+# expands back on the client:
+#   {"$dates": {"start": "2025-01-01", "step": 1, "count": 365}}  evenly spaced dates
+#   {"$dates": {"start": "2025-01-01", "deltas": [0, 7, 7]}}  other dates (day offsets, delta-encoded)
+#   {"$deltas": [123456, -250, 0], "scale": 100}              numbers, as delta-encoded integers
+#   {"$table": {"columns": [...], "values": [[...]], "dictionaries": {...}}}
+#                                                             list of dicts, stored column by column
+
+
+def compact_requested(request):
+    """Whether the client asked for the compact response format (?format=compact)"""
+    return request.GET.get('format') == 'compact'
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _delta_encode(numbers):
+    previous = 0
+    deltas = []
+    for number in numbers:
+        deltas.append(number - previous)
+        previous = number
+    return deltas
+
+
+def encode_dates(dates):
+    """Encode a sorted list of dates (date objects or 'YYYY-MM-DD' strings)"""
+    if not dates:
+        return {'$dates': {'start': None, 'deltas': []}}
+    days = [_as_date(value).toordinal() for value in dates]
+    start = dates[0] if isinstance(dates[0], str) else dates[0].strftime('%Y-%m-%d')
+    steps = {later - earlier for earlier, later in zip(days, days[1:])}
+    if len(steps) == 1 and steps != {0}:
+        return {'$dates': {'start': start, 'step': steps.pop(), 'count': len(days)}}
+    return {'$dates': {'start': start, 'deltas': _delta_encode([day - days[0] for day in days])}}
+
+
+def encode_values(values, decimals=2):
+    """Encode numbers rounded to `decimals` places (None values are kept as null)"""
+    scale = 10 ** decimals
+    if any(value is None for value in values):
+        return [None if value is None else round(float(value), decimals) for value in values]
+    return {'$deltas': _delta_encode([round(float(value) * scale) for value in values]), 'scale': scale}
+
+
+def encode_fields(data, keys, decimals=2):
+    """Encode in place the numeric list fields of a dict listed in `keys` (absent or None ones are skipped)"""
+    for key in keys:
+        if data.get(key) is not None:
+            data[key] = encode_values(data[key], decimals)
+    return data
+
+
+def encode_table(rows, dictionary_columns=(), value_columns=()):
+    """
+    Encode a list of dicts sharing the same keys column by column. Columns listed in
+    `dictionary_columns` store each distinct value once and index it per row; columns in
+    `value_columns` are encoded with encode_values().
+    """
+    columns = list(rows[0].keys()) if rows else []
+    values = []
+    dictionaries = {}
+    for column in columns:
+        column_values = [row[column] for row in rows]
+        if column in dictionary_columns:
+            positions = {}
+            dictionary = []
+            indexes = []
+            for value in column_values:
+                if value not in positions:
+                    positions[value] = len(dictionary)
+                    dictionary.append(value)
+                indexes.append(positions[value])
+            dictionaries[column] = dictionary
+            values.append(indexes)
+        elif column in value_columns:
+            values.append(encode_values(column_values))
+        else:
+            values.append(column_values)
+    return {'$table': {'columns': columns, 'values': values, 'dictionaries': dictionaries}}
+
+
+def _default(value):
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def fast_json_response(data, status=200):
+    """
+    JSON response without whitespace, serialized with orjson when it is installed
+    (the standard library encoder otherwise).
+    """
+    if orjson is not None:
+        content = orjson.dumps(data, default=_default)
+    else:
+        content = json.dumps(data, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return HttpResponse(content, content_type='application/json', status=status)
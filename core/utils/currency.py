@@ -78,6 +78,9 @@ class CurrencyExchangeService:
                 # Save to cache
                 cache.set(cache_key, result, cls.CACHE_DURATION)
                 
+                # Keep the day's rates (as published, EUR based) for historical conversions
+                cls.store_daily_rates('EUR', {currency: Decimal(str(rate)) for currency, rate in data['rates'].items()})
+                
                 return result
         except requests.RequestException as e:
             # Log the error (in production, you'd want better error handling)
@@ -86,6 +89,31 @@ class CurrencyExchangeService:
             # Return None or cached data if available
             return cached_data if cached_data else None
     
+    @classmethod
+    def store_daily_rates(cls, base_currency, rates, day=None):
+        """
+        Record exchange rates for a day (today by default) as ExchangeRate rows,
+        replacing rates already stored for that day. Only supported currencies are kept.
+        """
+        from core.models import ExchangeRate
+        
+        day = day or datetime.now().date()
+        supported = dict(cls.SUPPORTED_CURRENCIES)
+        try:
+            ExchangeRate.objects.bulk_create(
+                [
+                    ExchangeRate(date=day, base_currency=base_currency, currency=currency, rate=rate)
+                    for currency, rate in rates.items()
+                    if currency in supported and currency != base_currency
+                ],
+                update_conflicts=True,
+                unique_fields=['base_currency', 'currency', 'date'],
+                update_fields=['rate']
+            )
+        except Exception as e:
+            # Historical rates are a nice-to-have: never fail the conversion because of them
+            print(f"Error storing exchange rates: {e}")
+    
     @classmethod
     def convert_currency(cls, amount, from_currency, to_currency):
         """
@@ -0,0 +1,253 @@
+import csv
+import heapq
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+
+from .currency import CurrencyExchangeService
+from .recurrence import unrecorded_occurrences
+
+
+# Columns of an exported transaction, in file order
+EXPORT_FIELDS = [
+    'id', 'date', 'description', 'transaction_type', 'amount', 'currency',
+    'category', 'cost_center', 'account', 'account_reference', 'payment_method',
+    'recipient', 'is_transfer', 'is_recurring', 'recurrence_period', 'is_generated',
+]
+CONVERTED_FIELDS = ['converted_amount', 'display_currency']
+
+# Related values fetched with each stored transaction, keyed by export column
+EXPORT_VALUES = {
+    'category': 'category__name',
+    'cost_center': 'category__cost_center__name',
+    'account': 'account__name',
+    'account_reference': 'account__reference',
+    'currency': 'account__currency',
+    'payment_method': 'payment_method__name',
+    'recipient_first_name': 'recipient_member__first_name',
+    'recipient_last_name': 'recipient_member__last_name',
+}
+
+
+def _parse_id(value):
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        # Well formed but impossible dates such as 2024-02-30
+        return None
+
+
+def parse_transaction_filters(params):
+    """
+    Read the transaction list filters (category, account, type, date_from, date_to)
+    from a query dict. Invalid values are ignored rather than raising errors.
+    """
+    transaction_type = params.get('type')
+    return {
+        'category': _parse_id(params.get('category')),
+        'account': _parse_id(params.get('account')),
+        'type': transaction_type if transaction_type in ('expense', 'income') else None,
+        'date_from': _parse_date(params.get('date_from')),
+        'date_to': _parse_date(params.get('date_to')),
+    }
+
+
+def filter_transactions(queryset, filters, dates=True):
+    """Apply parsed transaction list filters to a Transaction queryset"""
+    if filters['category']:
+        queryset = queryset.filter(category_id=filters['category'])
+    if filters['account']:
+        queryset = queryset.filter(account_id=filters['account'])
+    if filters['type']:
+        queryset = queryset.filter(transaction_type=filters['type'])
+    if dates and filters['date_from']:
+        queryset = queryset.filter(date__gte=filters['date_from'])
+    if dates and filters['date_to']:
+        queryset = queryset.filter(date__lte=filters['date_to'])
+    return queryset
+
+
+def _matches_filters(instance, filters):
+    """Check a generated recurring instance against the transaction list filters"""
+    if filters['category'] and instance.category_id != filters['category']:
+        return False
+    if filters['account'] and instance.account_id != filters['account']:
+        return False
+    if filters['type'] and instance.transaction_type != filters['type']:
+        return False
+    if filters['date_from'] and instance.date < filters['date_from']:
+        return False
+    if filters['date_to'] and instance.date > filters['date_to']:
+        return False
+    return True
+
+
+def _recipient_label(recipient_type, first_name, last_name):
+    if recipient_type == 'member' and first_name:
+        return f"{first_name} {last_name}"
+    return recipient_type or ''
+
+
+def _stored_rows(queryset, chunk_size):
+    """Stream stored transactions as export dicts, oldest first"""
+    rows = queryset.order_by('date', 'id').values(
+        'id', 'date', 'description', 'transaction_type', 'amount', 'recipient_type',
+        'is_transfer', 'is_recurring', 'recurrence_period', *EXPORT_VALUES.values()
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        for column, path in EXPORT_VALUES.items():
+            row[column] = row.pop(path)
+        row['recipient'] = _recipient_label(
+            row.pop('recipient_type'),
+            row.pop('recipient_first_name'),
+            row.pop('recipient_last_name'),
+        )
+        row['is_generated'] = False
+        yield row
+
+
+def _generated_rows(household, queryset, filters, today):
+    """
+    Generated occurrences of the recurring transactions in the queryset that are not
+    already stored, oldest first. Only the occurrences inside the date filters are
+    generated, so this list stays small even when the stored history is large.
+    """
+    parents = queryset.filter(is_recurring=True).select_related(
+        'category', 'category__cost_center', 'account', 'payment_method', 'recipient_member',
+        'paired_transaction__category', 'paired_transaction__category__cost_center',
+        'paired_transaction__account', 'paired_transaction__payment_method',
+    ).prefetch_related('occurrence_exceptions__category__cost_center')
+
+    instances = []
+    for parent in parents:
+        for instance in parent.generate_recurring_instances(
+            current_date=today, window_start=filters['date_from'], window_end=filters['date_to']
+        ):
+            if instance.date <= today and _matches_filters(instance, filters):
+                instances.append(instance)
+    if not instances:
+        return []
+
+    # Skip occurrences already recorded as real transactions (same rule as transaction_list)
+    existing_keys = set(
+        queryset.model.objects.filter(
+            tax_household=household,
+            date__in={instance.date for instance in instances},
+        ).values_list('date', 'description', 'amount')
+    )
+
+    rows = []
+    for instance in unrecorded_occurrences(instances, existing_keys):
+        category = instance.category
+        member = instance.recipient_member
+        rows.append({
+            'id': instance.id,
+            'date': instance.date,
+            'description': instance.description,
+            'transaction_type': instance.transaction_type,
+            'amount': instance.amount,
+            'is_transfer': instance.is_transfer,
+            'is_recurring': True,
+            'recurrence_period': instance.recurrence_period,
+            'category': category.name if category else None,
+            'cost_center': category.cost_center.name if category and category.cost_center else None,
+            'account': instance.account.name,
+            'account_reference': instance.account.reference,
+            'currency': instance.account.currency,
+            'payment_method': instance.payment_method.name if instance.payment_method else None,
+            'recipient': _recipient_label(
+                instance.recipient_type,
+                member.first_name if member else None,
+                member.last_name if member else None,
+            ),
+            'is_generated': True,
+        })
+    rows.sort(key=lambda row: row['date'])
+    return rows
+
+
+def iter_transaction_rows(household, filters, include_recurring=False, display_currency=None, chunk_size=2000):
+    """
+    Yield the transactions of a household as export dicts, oldest first.
+
+    Stored transactions are streamed from the database in chunks, so memory use does not
+    depend on the size of the history. Generated recurring occurrences, when requested,
+    are merged into the stream by date.
+
+    Args:
+        household: The TaxHousehold to export
+        filters: Filters returned by parse_transaction_filters
+        include_recurring: Also export generated occurrences of recurring transactions
+        display_currency: Add the amount converted into this currency
+        chunk_size: Number of rows fetched from the database at a time
+    """
+    from core.models import Transaction
+
+    queryset = Transaction.objects.filter(tax_household=household)
+    rows = _stored_rows(filter_transactions(queryset, filters), chunk_size)
+
+    if include_recurring:
+        generated = _generated_rows(household, filter_transactions(queryset, filters, dates=False), filters, date.today())
+        if generated:
+            rows = heapq.merge(rows, generated, key=lambda row: row['date'])
+
+    # One exchange rate per account currency, looked up on first use
+    factors = {}
+    for row in rows:
+        if display_currency:
+            currency = row['currency']
+            if currency not in factors:
+                factors[currency] = CurrencyExchangeService.convert_currency(Decimal('1'), currency, display_currency)
+            factor = factors[currency]
+            row['converted_amount'] = (row['amount'] * factor).quantize(Decimal('0.01')) if factor is not None else None
+            row['display_currency'] = display_currency
+        yield row
+
+
+class _Echo:
+    """File-like object whose write() returns the value, so csv.writer can feed a generator"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, fields):
+    """Yield a header line followed by one CSV line per row"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([
+            '' if row.get(field) is None else row.get(field)
+            for field in fields
+        ])
+
+
+def stream_json(rows, fields):
+    """Yield a JSON array of row objects, one element at a time"""
+    yield '['
+    separator = '\n'
+    for row in rows:
+        yield separator + json.dumps({field: row.get(field) for field in fields}, cls=DjangoJSONEncoder)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'json': (stream_json, 'application/json', 'json'),
+}
+
+
+def export_fields(display_currency=None):
+    """Columns of an export, with the converted amount when a display currency is set"""
+    return EXPORT_FIELDS + CONVERTED_FIELDS if display_currency else list(EXPORT_FIELDS)
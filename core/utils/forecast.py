@@ -0,0 +1,198 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.utils import timezone
+
+from .balances import refresh_current_balances
+from .currency import CurrencyExchangeService
+from .recurrence import occurrence_offsets
+from .timeseries import reduce_series
+
+
+# Longest forecast horizon accepted by the forecast view, in months
+MAX_FORECAST_MONTHS = 60
+
+
+def forecast_timeline(household, months, currency, today=None,
+                      granularity='day', aggregation='close', max_points=None):
+    """
+    Projected end-of-day balances of the bank accounts of a household, from today up
+    to `months` months ahead.
+
+    Each account starts from its current balance (see refresh_current_balances) and
+    changes with the transactions already recorded after today, and with the future
+    occurrences of recurring transactions and transfers that are not recorded yet.
+    Occurrence days are computed for the forecast window only, as one array per series,
+    then every account is projected at once: the changes are summed per account and
+    day with one bincount and the balances come from one cumulative sum.
+
+    The household total is converted into `currency` with the current exchange rates.
+
+    Args:
+        household: The TaxHousehold
+        months: Number of months to project
+        currency: Currency of the household total
+        today: First day of the forecast (defaults to today's date)
+        granularity, aggregation, max_points: Resampling and downsampling options
+            (see timeseries.reduce_series)
+
+    Returns:
+        Dictionary with 'dates', 'currency', 'accounts' (one series per account, in
+        the account currency), 'total', 'lowest_total' (date and amount of the lowest
+        projected total) and 'missing_rates' (account currencies left unconverted).
+        With the 'minmax' aggregation, series also get 'balances_min'/'balances_max'
+        (and 'total_min'/'total_max')
+    """
+    from core.models import BankAccount, Transaction
+
+    if today is None:
+        today = timezone.now().date()
+    end_date = today + relativedelta(months=months)
+    size = (end_date - today).days + 1
+
+    accounts = BankAccount.objects.filter(tax_household=household).order_by('name')
+    refresh_current_balances(accounts, today)
+    accounts = list(accounts.values_list('id', 'name', 'currency', 'current_balance', 'balance_date'))
+    if not accounts:
+        return {'dates': [], 'currency': currency, 'accounts': [], 'total': [],
+                'lowest_total': None, 'missing_rates': []}
+
+    positions = {account_id: position for position, (account_id, _, _, _, _) in enumerate(accounts)}
+    # Changes up to this day offset are already part of the current balance of each account
+    cutoffs = {account_id: max(0, (balance_date - today).days) for account_id, _, _, _, balance_date in accounts}
+
+    # Transactions already recorded in the forecast window
+    account_positions = []
+    day_offsets = []
+    nets = []
+    recorded = defaultdict(set)
+    rows = Transaction.objects.filter(
+        account_id__in=positions.keys(),
+        date__gt=today,
+        date__lte=end_date
+    ).order_by().values_list('account_id', 'date', 'transaction_type', 'amount')
+    for account_id, day, transaction_type, amount in rows:
+        offset = (day - today).days
+        recorded[(account_id, amount, transaction_type)].add(offset)
+        if offset > cutoffs[account_id]:
+            account_positions.append(positions[account_id])
+            day_offsets.append(offset)
+            nets.append(float(amount if transaction_type == 'income' else -amount))
+    changes = [(np.array(account_positions, dtype=np.int64), np.array(day_offsets, dtype=np.int64), np.array(nets))]
+
+    # Future occurrences of recurring transactions, as day offsets per series rather
+    # than generated instances. Both parents of a recurring transfer generate both of
+    # its sides, so the occurrence days of each side are merged. Occurrences changed by
+    # an OccurrenceException are taken out of the series and counted one by one
+    sides = {}
+    replaced = defaultdict(set)
+    adjusted = {}
+    parents = Transaction.objects.filter(
+        account_id__in=positions.keys(),
+        is_recurring=True
+    ).select_related('paired_transaction').prefetch_related('occurrence_exceptions')
+    for parent in parents:
+        window = parent.recurrence_window(end_date, today + timedelta(days=1))
+        if window is None:
+            continue
+        try:
+            offsets = occurrence_offsets(parent.recurrence_bounds()[0], parent.recurrence_period, *window, today)
+        except ValueError:
+            # Like generate_recurring_instances(), series that cannot be generated are skipped
+            continue
+        series = [parent]
+        if parent.is_transfer and parent.paired_transaction:
+            series.append(parent.paired_transaction)
+        exceptions = parent.occurrence_exceptions_between(*window)
+        for side in series:
+            if side.account_id not in positions:
+                continue
+            side_offsets = np.union1d(sides[side.id][1], offsets) if side.id in sides else offsets
+            sides[side.id] = (side, side_offsets)
+            replaced[side.id].update((scheduled_date - today).days for scheduled_date in exceptions)
+        if exceptions:
+            for scheduled_date, instance_date, exception in parent.iter_occurrence_dates(end_date, *window):
+                if exception is not None:
+                    for occurrence in parent._build_recurring_instance(instance_date, scheduled_date, exception):
+                        adjusted[occurrence.id] = occurrence
+
+    for side, offsets in sides.values():
+        offsets = offsets[offsets > cutoffs[side.account_id]]
+        if replaced[side.id]:
+            offsets = offsets[~np.isin(offsets, list(replaced[side.id]))]
+        # Occurrences already recorded as real transactions are not counted twice
+        already_recorded = recorded.get((side.account_id, side.amount, side.transaction_type))
+        if already_recorded:
+            offsets = offsets[~np.isin(offsets, list(already_recorded))]
+        net = float(side.amount if side.transaction_type == 'income' else -side.amount)
+        changes.append((np.full(len(offsets), positions[side.account_id], dtype=np.int64), offsets, np.full(len(offsets), net)))
+
+    changed = [
+        occurrence for occurrence in adjusted.values()
+        if occurrence.account_id in positions
+        and (occurrence.date - today).days > cutoffs[occurrence.account_id]
+        and (occurrence.date - today).days not in recorded.get(
+            (occurrence.account_id, occurrence.amount, occurrence.transaction_type), ()
+        )
+    ]
+    changes.append((
+        np.array([positions[occurrence.account_id] for occurrence in changed], dtype=np.int64),
+        np.array([(occurrence.date - today).days for occurrence in changed], dtype=np.int64),
+        np.array([float(occurrence.signed_amount) for occurrence in changed])
+    ))
+
+    account_positions, day_offsets, nets = (np.concatenate(column) for column in zip(*changes))
+    daily = np.bincount(
+        account_positions * size + day_offsets, weights=nets, minlength=len(accounts) * size
+    ).reshape(len(accounts), size)
+    current_balances = np.array([float(balance or 0) for _, _, _, balance, _ in accounts])
+    balances = np.round(np.cumsum(daily, axis=1) + current_balances[:, None], 2)
+
+    # Household total, with one current exchange rate per account currency
+    factors = {}
+    missing = []
+    for account_currency in sorted({account_currency for _, _, account_currency, _, _ in accounts}):
+        factor = CurrencyExchangeService.convert_currency(Decimal('1'), account_currency, currency)
+        if factor is None:
+            missing.append(account_currency)
+            factor = 1
+        factors[account_currency] = float(factor)
+    account_factors = np.array([factors[account_currency] for _, _, account_currency, _, _ in accounts])
+    total = np.round(account_factors @ balances, 2)
+
+    lowest = int(np.argmin(total))
+    result = {
+        'currency': currency,
+        'accounts': [
+            {
+                'account_id': account_id,
+                'account_name': name,
+                'currency': account_currency,
+            }
+            for account_id, name, account_currency, _, _ in accounts
+        ],
+        'lowest_total': {
+            'date': (today + timedelta(days=lowest)).strftime('%Y-%m-%d'),
+            'amount': float(total[lowest]),
+        },
+        'missing_rates': missing,
+    }
+
+    # Resample / downsample all the lines together, so they keep sharing dates
+    lines = [(series, 'balances') for series in result['accounts']] + [(result, 'total')]
+    dates, reduced = reduce_series(
+        [today + timedelta(days=offset) for offset in range(size)],
+        list(balances) + [total],
+        granularity, aggregation, max_points
+    )
+    result['dates'] = [day.strftime('%Y-%m-%d') for day in dates]
+    for (line, key), points in zip(lines, reduced):
+        line[key] = points['close']
+        if aggregation == 'minmax':
+            line[f'{key}_min'] = points['min']
+            line[f'{key}_max'] = points['max']
+
+    return result
@@ -0,0 +1,136 @@
+from functools import cached_property
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+FORM_CHOICES_CACHE_KEY = 'form_choices'
+
+
+def form_choices_cache_key(household):
+    """
+    Cache key of the transaction form choices of a household. It contains the household
+    reference version, which changes whenever members, accounts, categories, cost centers
+    or payment methods change (but not with transactions): stale snapshots are never
+    read again, in any process, and simply expire.
+    """
+    return f"{FORM_CHOICES_CACHE_KEY}_{household.pk}_{household.reference_version}"
+
+
+class HouseholdContext:
+    """
+    Household data of the current user, loaded lazily and at most once per request.
+
+    Set on every request as `request.household_ctx` by HouseholdContextMiddleware, so
+    views, forms and templates share the same lists instead of querying the members,
+    accounts or categories of the household again. Each attribute runs its query the
+    first time it is read; requests that never read one never pay for it.
+
+    `household` behaves like `request.user.tax_household`: it raises
+    TaxHousehold.DoesNotExist when the user has no household (or is not logged in).
+    The lists are empty in that case.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def _household(self):
+        from core.models import TaxHousehold
+
+        if not self.user.is_authenticated:
+            return None
+        try:
+            return self.user.tax_household
+        except TaxHousehold.DoesNotExist:
+            return None
+
+    @property
+    def household(self):
+        from core.models import TaxHousehold
+
+        if self._household is None:
+            raise TaxHousehold.DoesNotExist("The user has no tax household")
+        return self._household
+
+    @property
+    def has_household(self):
+        return self._household is not None
+
+    @cached_property
+    def members(self):
+        from core.models import HouseholdMember
+
+        if self._household is None:
+            return []
+        return list(HouseholdMember.objects.filter(tax_household=self._household))
+
+    @cached_property
+    def accounts(self):
+        from core.models import BankAccount
+
+        if self._household is None:
+            return []
+        return list(BankAccount.objects.filter(tax_household=self._household).select_related('account_type'))
+
+    @cached_property
+    def categories(self):
+        from core.models import TransactionCategory
+
+        if self._household is None:
+            return []
+        return list(TransactionCategory.objects.filter(tax_household=self._household).select_related('cost_center'))
+
+    @cached_property
+    def cost_centers(self):
+        from core.models import CostCenter
+
+        if self._household is None:
+            return []
+        return list(CostCenter.objects.filter(tax_household=self._household))
+
+    @cached_property
+    def payment_methods(self):
+        """Active payment methods (they are shared by all households)"""
+        from core.models import PaymentMethod
+
+        return list(PaymentMethod.objects.filter(is_active=True))
+
+    @cached_property
+    def form_choices(self):
+        """
+        Choices of the transaction forms of the household, as lists of (pk, label)
+        pairs: 'categories', 'accounts', 'members' (with string pks, as used by the
+        recipient field) and 'payment_methods' (all of them, like the model field).
+
+        The snapshot is read from the cache under a key that contains the household
+        reference version (see form_choices_cache_key), and only built from the database
+        on a miss, so a form built from a warm snapshot renders without any query.
+        """
+        from core.models import PaymentMethod
+
+        if self._household is None:
+            return {
+                'categories': [], 'accounts': [], 'members': [],
+                'payment_methods': [(method.pk, str(method)) for method in PaymentMethod.objects.all()],
+            }
+
+        key = form_choices_cache_key(self._household)
+        choices = cache.get(key)
+        if choices is None:
+            choices = {
+                'categories': [(category.pk, str(category)) for category in self.categories],
+                'accounts': [(account.pk, str(account)) for account in self.accounts],
+                'members': [(str(member.id), f"{member.first_name} {member.last_name}") for member in self.members],
+                'payment_methods': [(method.pk, str(method)) for method in PaymentMethod.objects.all()],
+            }
+            cache.set(key, choices, getattr(settings, 'FORM_CHOICES_CACHE_TIMEOUT', 24 * 60 * 60))
+        return choices
+
+    @property
+    def member_ids(self):
+        return [member.id for member in self.members]
+
+    @property
+    def account_ids(self):
+        return [account.id for account in self.accounts]
@@ -0,0 +1,199 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import models
+
+from .balances import recurring_occurrences
+from .currency import CurrencyExchangeService
+from .timeseries import reduce_series
+
+
+def _forward_filled(rows, first_day, size):
+    """
+    Daily values from (date, value) rows sorted by date: each day takes the latest value
+    dated on or before it, NaN before the first row.
+    """
+    values = np.full(size, np.nan)
+    if not rows:
+        return values
+    row_offsets = np.array([(day - first_day).days for day, _ in rows])
+    row_values = np.array([float(value) for _, value in rows])
+    positions = np.searchsorted(row_offsets, np.arange(size), side='right') - 1
+    known = positions >= 0
+    values[known] = row_values[positions[known]]
+    return values
+
+
+def dated_conversion_factors(currencies, to_currency, start_date, end_date):
+    """
+    Daily factors converting each currency into `to_currency` between two dates.
+
+    Stored ExchangeRate rows are used where available (direct, inverse, or through the
+    EUR based rates recorded by CurrencyExchangeService), each day taking the latest rate
+    known on that day. Days before the first stored rate use the current rate.
+
+    Returns:
+        Tuple (factors, missing): a dictionary of numpy arrays (one factor per day) keyed
+        by currency, and the currencies for which no rate is known at all (their amounts
+        are left unconverted, like convert_currency() failures elsewhere)
+    """
+    from core.models import ExchangeRate
+
+    size = (end_date - start_date).days + 1
+    involved = set(currencies) | {to_currency, 'EUR'}
+
+    # All the rates that may be needed, in one query
+    stored = defaultdict(list)
+    rows = ExchangeRate.objects.filter(
+        base_currency__in=involved,
+        currency__in=involved,
+        date__lte=end_date
+    ).order_by('date').values_list('base_currency', 'currency', 'date', 'rate')
+    for base_currency, currency, day, rate in rows:
+        stored[(base_currency, currency)].append((day, rate))
+
+    def pair(base_currency, currency):
+        if base_currency == currency:
+            return np.ones(size)
+        direct = _forward_filled(stored[(base_currency, currency)], start_date, size)
+        inverse = 1.0 / _forward_filled(stored[(currency, base_currency)], start_date, size)
+        return np.where(np.isnan(direct), inverse, direct)
+
+    factors = {}
+    missing = []
+    for currency in currencies:
+        factor = pair(currency, to_currency)
+        if np.isnan(factor).any():
+            factor = np.where(np.isnan(factor), pair('EUR', to_currency) / pair('EUR', currency), factor)
+        if np.isnan(factor).any():
+            current = CurrencyExchangeService.convert_currency(Decimal('1'), currency, to_currency)
+            if current is None:
+                missing.append(currency)
+                current = 1
+            factor = np.where(np.isnan(factor), float(current), factor)
+        factors[currency] = factor
+    return factors, missing
+
+
+def net_worth_timeline(household, start_date, end_date, currency, include_recurring=True,
+                       granularity='day', aggregation='close', max_points=None):
+    """
+    Daily net worth of a household: the end-of-day balances of all its bank accounts,
+    converted into `currency` with dated exchange rates and summed.
+
+    Accounts are not replayed one by one. The net change of every account and day is
+    read with a single ordered aggregate query, and the balances of each account currency
+    come from one cumulative sum: the end-of-day balance of an account is
+    balance + C(day) - C(balance_date - 1), where C is the running sum of its changes.
+
+    Args:
+        household: The TaxHousehold
+        start_date: First day of the timeline
+        end_date: Last day of the timeline
+        currency: Currency of the returned values
+        include_recurring: Also count generated occurrences of recurring transactions
+            (as the balance evolution chart does)
+        granularity, aggregation, max_points: Resampling and downsampling options
+            (see timeseries.reduce_series)
+
+    Returns:
+        Dictionary with 'dates', 'currency', 'net_worth' (one value per day, or per
+        period), 'missing_rates' (account currencies left unconverted) and, with the
+        'minmax' aggregation, 'net_worth_min' and 'net_worth_max'
+    """
+    from core.models import BankAccount, Transaction
+
+    size = (end_date - start_date).days + 1
+    accounts = list(
+        BankAccount.objects.filter(tax_household=household).values_list('id', 'currency', 'balance', 'balance_date')
+    )
+    if not accounts or size <= 0:
+        return {'dates': [], 'currency': currency, 'net_worth': [], 'missing_rates': []}
+
+    positions = {account_id: position for position, (account_id, _, _, _) in enumerate(accounts)}
+    currencies = sorted({account_currency for _, account_currency, _, _ in accounts})
+    currency_positions = np.array([currencies.index(account_currency) for _, account_currency, _, _ in accounts])
+    balances = np.array([float(balance) for _, _, balance, _ in accounts])
+    balance_days = np.array([(balance_date - start_date).days for _, _, _, balance_date in accounts])
+
+    # Net change per account and day, oldest first
+    first_day = min([start_date] + [balance_date for _, _, _, balance_date in accounts])
+    last_day = max([end_date] + [balance_date for _, _, _, balance_date in accounts])
+    changes = list(
+        Transaction.objects.filter(
+            account_id__in=positions.keys(),
+            date__gte=first_day,
+            date__lte=last_day
+        ).values('account_id', 'date').annotate(
+            net=models.Sum(
+                models.Case(
+                    models.When(transaction_type='income', then=models.F('amount')),
+                    default=-models.F('amount'),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2)
+                )
+            )
+        ).order_by('date').values_list('account_id', 'date', 'net')
+    )
+
+    if include_recurring:
+        occurrences = [
+            instance for instance in recurring_occurrences(positions.keys(), end_date)
+            if first_day <= instance.date <= last_day
+        ]
+        if occurrences:
+            # Occurrences already recorded as real transactions are not counted twice
+            recorded = set(Transaction.objects.filter(
+                account_id__in=positions.keys(),
+                date__in={instance.date for instance in occurrences}
+            ).values_list('account_id', 'date', 'amount', 'transaction_type'))
+            changes.extend(
+                (instance.account_id, instance.date,
+                 instance.amount if instance.transaction_type == 'income' else -instance.amount)
+                for instance in occurrences
+                if (instance.account_id, instance.date, instance.amount, instance.transaction_type) not in recorded
+            )
+
+    if changes:
+        account_positions = np.array([positions[account_id] for account_id, _, _ in changes])
+        day_offsets = np.array([(day - start_date).days for _, day, _ in changes])
+        nets = np.array([float(net) for _, _, net in changes])
+    else:
+        account_positions = np.zeros(0, dtype=np.int64)
+        day_offsets = np.zeros(0, dtype=np.int64)
+        nets = np.zeros(0)
+
+    # balance - C(balance_date - 1) for each account, then summed per currency
+    before_balance_date = day_offsets < balance_days[account_positions]
+    offsets = balances - np.bincount(
+        account_positions[before_balance_date], weights=nets[before_balance_date], minlength=len(accounts)
+    )
+    currency_offsets = np.bincount(currency_positions, weights=offsets, minlength=len(currencies))
+
+    # Daily changes per currency; earlier changes are carried into the first day
+    in_range = day_offsets < size
+    flat_positions = currency_positions[account_positions[in_range]] * size + np.clip(day_offsets[in_range], 0, None)
+    daily = np.bincount(flat_positions, weights=nets[in_range], minlength=len(currencies) * size).reshape(len(currencies), size)
+    currency_balances = np.cumsum(daily, axis=1) + currency_offsets[:, None]
+
+    factors, missing = dated_conversion_factors(currencies, currency, start_date, end_date)
+    net_worth = np.zeros(size)
+    for position, account_currency in enumerate(currencies):
+        net_worth += currency_balances[position] * factors[account_currency]
+
+    dates, (points,) = reduce_series(
+        [start_date + timedelta(days=offset) for offset in range(size)],
+        [np.round(net_worth, 2)],
+        granularity, aggregation, max_points
+    )
+    result = {
+        'dates': [day.strftime('%Y-%m-%d') for day in dates],
+        'currency': currency,
+        'net_worth': points['close'],
+        'missing_rates': missing,
+    }
+    if aggregation == 'minmax':
+        result['net_worth_min'] = points['min']
+        result['net_worth_max'] = points['max']
+    return result
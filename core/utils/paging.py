@@ -0,0 +1,95 @@
+from functools import cmp_to_key
+
+from django.db import models
+
+
+def _value(obj, path):
+    """Value of a lookup path ('category__name') read from a model instance"""
+    for attribute in path.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def _compare(first, second):
+    # NULL sorts before any value, as enforced with nulls_first / nulls_last below
+    if first is None or second is None:
+        return (first is not None) - (second is not None)
+    return (first > second) - (first < second)
+
+
+def ordering_expressions(order_by):
+    """
+    ORDER BY expressions for lookups like ['-amount', 'date'], with NULLs placed
+    consistently across databases (first when ascending, last when descending)
+    """
+    expressions = []
+    for field in order_by:
+        if field.startswith('-'):
+            expressions.append(models.F(field[1:]).desc(nulls_last=True))
+        else:
+            expressions.append(models.F(field).asc(nulls_first=True))
+    return expressions
+
+
+def merged_page(queryset, extra_rows, order_by, page, page_size):
+    """
+    One page of the rows of a queryset merged with rows that are not stored in the
+    database (generated recurring instances), sorted with the same ordering.
+
+    Only the database rows that can land on the requested page are read: at most
+    len(extra_rows) rows before the page start, and the rows of the page itself.
+    Database rows come first among equal values, then by id.
+
+    Args:
+        queryset: Unordered queryset of the stored rows
+        extra_rows: Model instances to merge (not in the queryset)
+        order_by: Lookups like ['-date', 'description'] used for both kinds of rows
+        page: Page number, starting at 1
+        page_size: Number of rows per page
+
+    Returns:
+        Tuple (rows, count): the rows of the page and the total number of rows
+    """
+    def compare(first, second):
+        (first_stored, first_row), (second_stored, second_row) = first, second
+        for field in order_by:
+            descending = field.startswith('-')
+            path = field.lstrip('-')
+            result = _compare(_value(first_row, path), _value(second_row, path))
+            if result:
+                return -result if descending else result
+        if first_stored != second_stored:
+            return -1 if first_stored else 1
+        if first_stored:
+            return _compare(first_row.pk, second_row.pk)
+        return _compare(str(first_row.pk), str(second_row.pk))
+
+    stored_count = queryset.count()
+    offset = (page - 1) * page_size
+    end = offset + page_size
+    start = max(0, offset - len(extra_rows))
+    window = list(queryset.order_by(*ordering_expressions(order_by), 'id')[start:end]) if start < stored_count else []
+
+    merged = sorted(
+        [(True, row) for row in window] + [(False, row) for row in extra_rows],
+        key=cmp_to_key(compare)
+    )
+    rows = []
+    stored_seen = extra_seen = 0
+    for stored, row in merged:
+        # Generated rows sorting before the window or after a truncated window may
+        # have stored rows outside the window in front of them: their position is
+        # unknown, but they cannot be on the page
+        known = stored or not (
+            (start > 0 and stored_seen == 0) or
+            (stored_seen == len(window) and start + len(window) < stored_count)
+        )
+        if known and offset <= start + stored_seen + extra_seen < end:
+            rows.append(row)
+        if stored:
+            stored_seen += 1
+        else:
+            extra_seen += 1
+    return rows, stored_count + len(extra_rows)
@@ -0,0 +1,89 @@
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .export import filter_transactions
+from .rollups import move_rollups
+
+
+def move_categories_to_cost_center(household, category_ids, cost_center):
+    """
+    Move categories of a household to a cost center with a single UPDATE.
+
+    Ids that do not belong to the household are ignored.
+
+    Args:
+        household: The TaxHousehold owning the categories
+        category_ids: Iterable of TransactionCategory ids
+        cost_center: Target CostCenter, or None to detach the categories
+
+    Returns:
+        Number of categories updated
+    """
+    from core.models import TaxHousehold, TransactionCategory
+
+    updated = TransactionCategory.objects.filter(
+        tax_household=household,
+        id__in=list(category_ids)
+    ).update(cost_center=cost_center, updated_at=timezone.now())
+    if updated:
+        TaxHousehold.bump_data_version(household.id)
+        TaxHousehold.bump_reference_version(household.id)
+    return updated
+
+
+def clear_cost_center(cost_center):
+    """Detach every category from a cost center with a single UPDATE"""
+    from core.models import TaxHousehold, TransactionCategory
+
+    updated = TransactionCategory.objects.filter(
+        cost_center=cost_center
+    ).update(cost_center=None, updated_at=timezone.now())
+    if updated:
+        TaxHousehold.bump_data_version(cost_center.tax_household_id)
+        TaxHousehold.bump_reference_version(cost_center.tax_household_id)
+    return updated
+
+
+def transactions_in_scope(household, filters=None, transaction_ids=None):
+    """
+    Stored, non-transfer transactions of a household selected by the transaction list
+    filters and/or an explicit list of ids. Transfers keep their dedicated category.
+    """
+    from core.models import Transaction
+
+    queryset = Transaction.objects.filter(tax_household=household, is_transfer=False)
+    if filters:
+        queryset = filter_transactions(queryset, filters)
+    if transaction_ids is not None:
+        queryset = queryset.filter(id__in=list(transaction_ids))
+    return queryset
+
+
+def recategorize_transactions(household, category, filters=None, transaction_ids=None):
+    """
+    Assign a category to every transaction in scope with a single UPDATE.
+
+    Generated recurring instances are not stored: recategorizing their parent
+    transaction changes all of them.
+
+    Args:
+        household: The TaxHousehold owning the transactions
+        category: Target TransactionCategory (must belong to the household)
+        filters: Filters returned by parse_transaction_filters (optional)
+        transaction_ids: Restrict the update to these ids (optional)
+
+    Returns:
+        Number of transactions updated
+    """
+    from core.models import TaxHousehold
+
+    if category.tax_household_id != household.id:
+        raise ValueError("The category does not belong to this household")
+
+    transactions = transactions_in_scope(household, filters, transaction_ids).exclude(category=category)
+    with db_transaction.atomic():
+        move_rollups(transactions, {'category_id': category.id})
+        updated = transactions.update(category=category, updated_at=timezone.now())
+        if updated:
+            TaxHousehold.bump_data_version(household.id)
+    return updated
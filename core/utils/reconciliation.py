@@ -0,0 +1,362 @@
+import csv
+import io
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from difflib import SequenceMatcher
+
+from .recurrence import unrecorded_occurrences
+
+
+class StatementParseError(Exception):
+    """Raised when an uploaded bank statement cannot be read"""
+    pass
+
+
+class StatementLine:
+    """A single line of an imported bank statement"""
+    __slots__ = ('index', 'date', 'description', 'amount')
+
+    def __init__(self, index, date, description, amount):
+        self.index = index
+        self.date = date
+        self.description = description
+        # Signed amount: positive for credits (income), negative for debits (expenses)
+        self.amount = amount
+
+    @property
+    def transaction_type(self):
+        return 'income' if self.amount >= 0 else 'expense'
+
+    @property
+    def absolute_amount(self):
+        return abs(self.amount)
+
+
+class ReconciliationResult:
+    """Outcome of reconciling a statement against the stored transactions of an account"""
+
+    def __init__(self, matches, unmatched_lines, unmatched_transactions):
+        # List of (StatementLine, transaction dict) pairs
+        self.matches = matches
+        # Statement lines without a matching transaction
+        self.unmatched_lines = unmatched_lines
+        # Transactions (dicts) without a matching statement line
+        self.unmatched_transactions = unmatched_transactions
+
+    @property
+    def is_balanced(self):
+        return not self.unmatched_lines and not self.unmatched_transactions
+
+
+# Header names accepted for each statement column (lowercase)
+DATE_HEADERS = ('date', 'booking date', 'value date', 'date operation', 'date opération')
+DESCRIPTION_HEADERS = ('description', 'label', 'libellé', 'libelle', 'details', 'memo')
+AMOUNT_HEADERS = ('amount', 'montant')
+DEBIT_HEADERS = ('debit', 'débit')
+CREDIT_HEADERS = ('credit', 'crédit')
+
+STATEMENT_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y', '%d.%m.%Y')
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def _parse_date(value):
+    value = value.strip()
+    for date_format in STATEMENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise StatementParseError(f"Unrecognised date: {value!r}")
+
+
+def _parse_amount(value):
+    """Parse amounts such as '-1 234,56', '1,234.56' or '12.5'"""
+    value = value.strip().replace('\u00a0', '').replace(' ', '')
+    if not value:
+        return Decimal('0')
+    if ',' in value and '.' in value:
+        # The right-most separator is the decimal separator
+        if value.rfind(',') > value.rfind('.'):
+            value = value.replace('.', '').replace(',', '.')
+        else:
+            value = value.replace(',', '')
+    else:
+        value = value.replace(',', '.')
+    try:
+        return Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise StatementParseError(f"Unrecognised amount: {value!r}")
+
+
+def _find_column(header, candidates):
+    for position, name in enumerate(header):
+        if name in candidates:
+            return position
+    return None
+
+
+def parse_statement_csv(content):
+    """
+    Parse a CSV bank statement into a list of StatementLine objects.
+
+    The file needs a header row with a date column, a description column and either
+    a signed amount column or separate debit/credit columns. Comma and semicolon
+    delimiters are both accepted.
+
+    Args:
+        content: The statement as text or bytes
+
+    Returns:
+        List of StatementLine objects in file order
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig', errors='replace')
+
+    try:
+        dialect = csv.Sniffer().sniff(content[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(io.StringIO(content), dialect)
+    try:
+        header = [name.strip().lower() for name in next(reader)]
+    except StopIteration:
+        raise StatementParseError("The statement is empty")
+
+    date_col = _find_column(header, DATE_HEADERS)
+    description_col = _find_column(header, DESCRIPTION_HEADERS)
+    amount_col = _find_column(header, AMOUNT_HEADERS)
+    debit_col = _find_column(header, DEBIT_HEADERS)
+    credit_col = _find_column(header, CREDIT_HEADERS)
+
+    if date_col is None or description_col is None:
+        raise StatementParseError("The statement needs 'date' and 'description' columns")
+    if amount_col is None and (debit_col is None or credit_col is None):
+        raise StatementParseError("The statement needs an 'amount' column or 'debit' and 'credit' columns")
+
+    if amount_col is not None:
+        last_col = max(date_col, description_col, amount_col)
+    else:
+        last_col = max(date_col, description_col, debit_col, credit_col)
+
+    lines = []
+    for row in reader:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if len(row) <= last_col:
+            raise StatementParseError(
+                f"Line {reader.line_num} has {len(row)} columns, {last_col + 1} expected"
+            )
+        if amount_col is not None:
+            amount = _parse_amount(row[amount_col])
+        else:
+            amount = _parse_amount(row[credit_col]) - abs(_parse_amount(row[debit_col]))
+        lines.append(StatementLine(
+            index=len(lines),
+            date=_parse_date(row[date_col]),
+            description=row[description_col].strip(),
+            amount=amount,
+        ))
+    return lines
+
+
+def description_similarity(first, second):
+    """
+    Fuzzy similarity between two descriptions, between 0 and 1.
+    Uses the best of token overlap and character sequence similarity so that
+    bank labels like 'CB CARREFOUR 12/03' still match 'Carrefour groceries'.
+    """
+    first = first.lower()
+    second = second.lower()
+    first_tokens = set(TOKEN_PATTERN.findall(first))
+    second_tokens = set(TOKEN_PATTERN.findall(second))
+    token_score = 0.0
+    if first_tokens and second_tokens:
+        token_score = len(first_tokens & second_tokens) / min(len(first_tokens), len(second_tokens))
+        if token_score == 1.0:
+            return token_score
+    return max(token_score, SequenceMatcher(None, first, second).ratio())
+
+
+def _to_cents(amount):
+    return int(amount * 100)
+
+
+def reconcile(lines, transactions, date_window=3, min_similarity=0.0):
+    """
+    Match statement lines against transactions with a sort-merge over (amount, date).
+
+    Both sides are sorted by (signed amount in cents, date) and walked once. Only
+    groups with the same amount are compared, and within a group only transactions
+    whose date lies within `date_window` days of the statement line are candidates,
+    so the cost is O(n log n) rather than the O(n * m) of pairwise comparison.
+    Among candidates, the best description similarity wins, with closer dates
+    preferred on ties.
+
+    Args:
+        lines: List of StatementLine objects
+        transactions: List of transaction dicts with 'date', 'description',
+            'amount' (positive Decimal) and 'transaction_type' keys
+        date_window: Maximum distance in days between matched dates
+        min_similarity: Minimum description similarity required for a match
+
+    Returns:
+        ReconciliationResult
+    """
+    window = timedelta(days=date_window)
+
+    # Sort keys are (cents, date, position) tuples: the position keeps the sort stable
+    # and stops the comparison from ever reaching the payload in the last slot
+    statement_side = sorted(
+        (_to_cents(line.amount), line.date, position, line)
+        for position, line in enumerate(lines)
+    )
+    ledger_side = sorted(
+        (
+            _to_cents(txn['amount'] if txn['transaction_type'] == 'income' else -txn['amount']),
+            txn['date'],
+            position,
+            txn,
+        )
+        for position, txn in enumerate(transactions)
+    )
+
+    matches = []
+    unmatched_lines = []
+    unmatched_transactions = []
+
+    i = j = 0
+    statement_count = len(statement_side)
+    ledger_count = len(ledger_side)
+
+    while i < statement_count and j < ledger_count:
+        statement_cents = statement_side[i][0]
+        ledger_cents = ledger_side[j][0]
+
+        if statement_cents < ledger_cents:
+            unmatched_lines.append(statement_side[i][3])
+            i += 1
+            continue
+        if ledger_cents < statement_cents:
+            unmatched_transactions.append(ledger_side[j][3])
+            j += 1
+            continue
+
+        # Both sides have a run of the same amount: find where the runs end
+        statement_end = i
+        while statement_end < statement_count and statement_side[statement_end][0] == statement_cents:
+            statement_end += 1
+        ledger_end = j
+        while ledger_end < ledger_count and ledger_side[ledger_end][0] == ledger_cents:
+            ledger_end += 1
+
+        used = [False] * (ledger_end - j)
+        window_start = j
+        for _, line_date, _, line in statement_side[i:statement_end]:
+            # Slide the start of the date window forward (both runs are date-sorted)
+            while window_start < ledger_end and ledger_side[window_start][1] < line_date - window:
+                window_start += 1
+
+            candidates = []
+            k = window_start
+            while k < ledger_end and ledger_side[k][1] <= line_date + window:
+                if not used[k - j]:
+                    candidates.append(k)
+                k += 1
+
+            best = None
+            if len(candidates) == 1 and min_similarity <= 0:
+                # A single candidate needs no description scoring
+                best = candidates[0]
+            else:
+                best_score = None
+                for k in candidates:
+                    similarity = description_similarity(line.description, ledger_side[k][3]['description'])
+                    if similarity >= min_similarity:
+                        score = (similarity, -abs((ledger_side[k][1] - line_date).days))
+                        if best_score is None or score > best_score:
+                            best, best_score = k, score
+
+            if best is None:
+                unmatched_lines.append(line)
+            else:
+                used[best - j] = True
+                matches.append((line, ledger_side[best][3]))
+
+        unmatched_transactions.extend(
+            ledger_side[k][3] for k in range(j, ledger_end) if not used[k - j]
+        )
+        i = statement_end
+        j = ledger_end
+
+    unmatched_lines.extend(item[3] for item in statement_side[i:])
+    unmatched_transactions.extend(item[3] for item in ledger_side[j:])
+
+    matches.sort(key=lambda pair: (pair[0].date, pair[0].index))
+    unmatched_lines.sort(key=lambda line: (line.date, line.index))
+    unmatched_transactions.sort(key=lambda txn: txn['date'])
+
+    return ReconciliationResult(matches, unmatched_lines, unmatched_transactions)
+
+
+def load_account_transactions(account, start_date, end_date):
+    """
+    Load the transactions of an account between two dates as plain dicts,
+    including generated instances of recurring transactions.
+    """
+    from core.models import Transaction
+
+    rows = Transaction.objects.filter(
+        account=account,
+        date__gte=start_date,
+        date__lte=end_date,
+    ).values('id', 'date', 'description', 'amount', 'transaction_type')
+
+    transactions = [dict(row, is_generated=False) for row in rows]
+    existing_keys = {(txn['date'], txn['description'], txn['amount']) for txn in transactions}
+
+    instances = []
+    for parent in Transaction.objects.filter(account=account, is_recurring=True).prefetch_related('occurrence_exceptions'):
+        instances.extend(
+            instance for instance in parent.generate_recurring_instances(current_date=end_date, window_start=start_date)
+            # Paired clones of transfers belong to the other account
+            if instance.account_id == account.id and start_date <= instance.date <= end_date
+        )
+    for instance in unrecorded_occurrences(instances, existing_keys):
+        transactions.append({
+            'id': instance.id,
+            'date': instance.date,
+            'description': instance.description,
+            'amount': instance.amount,
+            'transaction_type': instance.transaction_type,
+            'is_generated': True,
+        })
+
+    return transactions
+
+
+def reconcile_account(account, lines, date_window=3, min_similarity=0.0):
+    """
+    Reconcile statement lines against the transactions of a bank account over the
+    period covered by the statement (widened by the date window).
+    """
+    if not lines:
+        return ReconciliationResult([], [], [])
+
+    window = timedelta(days=date_window)
+    start_date = min(line.date for line in lines) - window
+    end_date = max(line.date for line in lines) + window
+
+    transactions = load_account_transactions(account, start_date, end_date)
+    result = reconcile(lines, transactions, date_window=date_window, min_similarity=min_similarity)
+
+    # Transactions only loaded because of the widened window are not expected on the statement
+    first_date = start_date + window
+    last_date = end_date - window
+    result.unmatched_transactions = [
+        txn for txn in result.unmatched_transactions
+        if first_date <= txn['date'] <= last_date
+    ]
+    return result
@@ -0,0 +1,219 @@
+from datetime import timedelta
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+
+# Length of one recurrence period, in days or in months
+PERIOD_DAYS = {'daily': 1, 'weekly': 7}
+PERIOD_MONTHS = {'monthly': 1, 'quarterly': 3, 'annually': 12}
+
+
+def occurrence_date(start, period, index):
+    """
+    Date of the index-th occurrence of a series (0 being its start). It is always computed
+    from the start date, so month ends are clamped without drifting: a series starting on
+    January 31st falls on February 28th (or 29th), then March 31st.
+    """
+    if period in PERIOD_DAYS:
+        return start + timedelta(days=index * PERIOD_DAYS[period])
+    if period in PERIOD_MONTHS:
+        return start + relativedelta(months=index * PERIOD_MONTHS[period])
+    raise ValueError(f"Unknown recurrence period: {period}")
+
+
+def first_index_on_or_after(start, period, day):
+    """Index of the first occurrence of a series dated on or after `day`, computed without iterating"""
+    if day <= start:
+        return 0
+    if period in PERIOD_DAYS:
+        return -(-(day - start).days // PERIOD_DAYS[period])
+    if period not in PERIOD_MONTHS:
+        raise ValueError(f"Unknown recurrence period: {period}")
+    months = (day.year - start.year) * 12 + day.month - start.month
+    index = months // PERIOD_MONTHS[period]
+    # Clamping can only move an occurrence earlier, so at most one more step is needed
+    while occurrence_date(start, period, index) < day:
+        index += 1
+    return index
+
+
+def next_occurrence_date(start, period, end, day):
+    """
+    First occurrence of a series dated on or after `day` and not after the series end
+    date, or None when there is none left (or the period is unknown)
+    """
+    if period not in PERIOD_DAYS and period not in PERIOD_MONTHS:
+        return None
+    next_date = occurrence_date(start, period, first_index_on_or_after(start, period, day))
+    return next_date if next_date <= end else None
+
+
+def occurrence_dates(start, period, window_start=None, window_end=None):
+    """
+    Occurrence dates of a series inside a window, as a lazy generator.
+
+    The first occurrence of the window is reached directly, without enumerating the
+    earlier ones, so the cost only depends on the number of dates produced.
+
+    Args:
+        start: Date of the first occurrence of the series
+        period: One of the PERIOD_DAYS / PERIOD_MONTHS keys
+        window_start: First date of the window (defaults to the series start)
+        window_end: Last date of the window (None for an endless generator)
+
+    Raises:
+        ValueError: For unknown recurrence periods
+    """
+    if period not in PERIOD_DAYS and period not in PERIOD_MONTHS:
+        raise ValueError(f"Unknown recurrence period: {period}")
+    first_index = first_index_on_or_after(start, period, window_start) if window_start else 0
+
+    def dates():
+        index = first_index
+        while True:
+            day = occurrence_date(start, period, index)
+            if window_end is not None and day > window_end:
+                return
+            yield day
+            index += 1
+    return dates()
+
+
+def occurrence_offsets(start, period, window_start, window_end, origin):
+    """
+    Occurrence dates of a series inside a window, as a numpy array of day offsets from
+    `origin`. Daily and weekly series are computed in one vectorized step; month based
+    series go through occurrence_dates() for the end-of-month clamping.
+
+    Raises:
+        ValueError: For unknown recurrence periods
+    """
+    if period in PERIOD_DAYS:
+        step = PERIOD_DAYS[period]
+        first_index = first_index_on_or_after(start, period, window_start)
+        last_index = (window_end - start).days // step
+        return (start - origin).days + step * np.arange(first_index, last_index + 1, dtype=np.int64)
+    return np.array(
+        [(day - origin).days for day in occurrence_dates(start, period, window_start, window_end)],
+        dtype=np.int64
+    )
+
+
+def unrecorded_occurrences(occurrences, recorded):
+    """
+    Yield the occurrences that do not stand for a stored transaction, in order.
+
+    `recorded` holds the (date, description, amount) of the stored transactions: the
+    parent of a series stands for its first occurrence, and an occurrence may have been
+    recorded by hand. Generated occurrences are told apart by id rather than by these
+    values, so identical occurrences of two series are both kept while the sides of a
+    recurring transfer (generated by both of its parents) are only yielded once.
+    """
+    seen = set()
+    for occurrence in occurrences:
+        if occurrence.id in seen or (occurrence.date, occurrence.description, occurrence.amount) in recorded:
+            continue
+        seen.add(occurrence.id)
+        yield occurrence
+
+
+class Occurrence:
+    """
+    Generated occurrence of a recurring transaction: the parent transaction and a date.
+
+    Occurrences are read like unsaved Transaction objects by views, templates and reports
+    (duck typing): every field and method not defined here comes from the parent. The id
+    is the parent id followed by the scheduled date ('42-20250101'), and transfer
+    occurrences are linked to the occurrence of the paired transaction on the same date.
+    The amount and category of an occurrence with an OccurrenceException come from the
+    exception when it sets them.
+    """
+    __slots__ = ('parent', 'date', 'paired_transaction', 'scheduled_date', 'exception')
+
+    # Generated occurrences are not recurring themselves and are never stored
+    is_recurring = False
+    recurrence_period = ''
+    recurrence_start_date = None
+    recurrence_end_date = None
+    created_at = None
+    updated_at = None
+    _is_generated = True
+
+    def __init__(self, parent, date, paired_transaction=None, scheduled_date=None, exception=None):
+        self.parent = parent
+        self.date = date
+        self.paired_transaction = paired_transaction
+        self.scheduled_date = scheduled_date or date
+        self.exception = exception
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the occurrence itself
+        if name in Occurrence.__slots__:
+            raise AttributeError(name)
+        return getattr(self.parent, name)
+
+    def __str__(self):
+        return f"{self.date} - {self.description} ({self.amount})"
+
+    def __repr__(self):
+        return f"<Occurrence: {self.id}>"
+
+    @property
+    def id(self):
+        return f"{self.parent.id}-{self.scheduled_date.strftime('%Y%m%d')}"
+
+    pk = id
+
+    @property
+    def amount(self):
+        if self.exception is not None and self.exception.amount is not None:
+            return self.exception.amount
+        return self.parent.amount
+
+    @property
+    def signed_amount(self):
+        return self.amount if self.transaction_type == 'income' else -self.amount
+
+    def _category_exception(self):
+        # Category changes only apply to the side of a transfer they were made on
+        exception = self.exception
+        if exception is not None and exception.category_id is not None and exception.parent_id == self.parent.pk:
+            return exception
+        return None
+
+    @property
+    def category(self):
+        exception = self._category_exception()
+        return exception.category if exception is not None else self.parent.category
+
+    @property
+    def category_id(self):
+        exception = self._category_exception()
+        return exception.category_id if exception is not None else self.parent.category_id
+
+    def get_cost_center(self):
+        return self.category.cost_center if self.category else None
+
+    @property
+    def is_adjusted(self):
+        """Whether an OccurrenceException changes this occurrence"""
+        return self.exception is not None
+
+    @property
+    def paired_transaction_id(self):
+        return self.paired_transaction.id if self.paired_transaction is not None else None
+
+    @property
+    def _recurring_parent(self):
+        return self.parent
+
+    @property
+    def _instance_date(self):
+        return self.date
+
+    def is_generated_instance(self):
+        return True
+
+    def get_parent_transaction(self):
+        return self.parent
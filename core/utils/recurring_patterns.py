@@ -0,0 +1,191 @@
+import re
+
+import numpy as np
+from django.utils import timezone
+
+
+# Average length of the detected recurrence periods, in days. Intervals within
+# `tolerance` (a fraction of the period, at least one day) of it count as matching
+PATTERN_PERIODS = {
+    'weekly': 7,
+    'monthly': 30.44,
+    'quarterly': 91.31,
+    'annually': 365.25,
+}
+
+# Digits, dates and references change between the occurrences of a series
+_NOISE = re.compile(r'[\d\W_]+')
+
+
+def normalize_description(description):
+    """Description reduced to its words, lowercased, for grouping the occurrences of a series"""
+    return ' '.join(_NOISE.sub(' ', description or '').lower().split())
+
+
+def find_periodic_groups(groups, days, amounts, today, min_occurrences=3, tolerance=0.1,
+                         amount_tolerance=0.25, min_ratio=0.8):
+    """
+    Find the groups of rows whose dates follow one of the PATTERN_PERIODS.
+
+    Rows are sorted once by group and day, then every statistic is computed for all the
+    groups at once from the intervals between consecutive rows of a group (bincount
+    sums per group), so the cost grows with the number of rows only. Same-day rows of a
+    group are not intervals and are ignored.
+
+    A group is periodic when it has at least `min_occurrences` rows, at least
+    `min_ratio` of its intervals match a period, its amounts vary by at most
+    `amount_tolerance` (standard deviation relative to the mean) and its last row is
+    not older than two periods (the series still runs).
+
+    Args:
+        groups: Integer array, group number of each row
+        days: Integer array, date ordinal of each row
+        amounts: Float array, amount of each row
+        today: Current date
+
+    Returns:
+        List of (first_row, last_row, period, occurrences, ratio) tuples, one per
+        periodic group, with the row indexes of its first and last rows
+    """
+    if len(groups) == 0:
+        return []
+    order = np.lexsort((days, groups))
+    groups, days, amounts = groups[order], days[order], amounts[order]
+    group_count = int(groups.max()) + 1
+
+    gaps = np.diff(days)
+    valid = (groups[1:] == groups[:-1]) & (gaps > 0)
+    interval_groups = groups[1:][valid]
+    gaps = gaps[valid]
+    intervals = np.bincount(interval_groups, minlength=group_count)
+
+    best_ratio = np.zeros(group_count)
+    best_period = np.full(group_count, -1)
+    for position, period_days in enumerate(PATTERN_PERIODS.values()):
+        margin = max(1, period_days * tolerance)
+        matching = np.bincount(
+            interval_groups, weights=np.abs(gaps - period_days) <= margin, minlength=group_count
+        )
+        ratio = np.divide(matching, intervals, out=np.zeros(group_count), where=intervals > 0)
+        better = ratio > best_ratio
+        best_ratio[better] = ratio[better]
+        best_period[better] = position
+
+    counts = np.bincount(groups, minlength=group_count)
+    means = np.bincount(groups, weights=amounts, minlength=group_count) / np.maximum(counts, 1)
+    squares = np.bincount(groups, weights=amounts * amounts, minlength=group_count) / np.maximum(counts, 1)
+    deviations = np.sqrt(np.maximum(squares - means * means, 0))
+
+    # First and last row of each group present, in sorted order
+    boundaries = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+    firsts = np.concatenate(([0], boundaries))
+    lasts = np.concatenate((boundaries - 1, [len(groups) - 1]))
+    present = groups[firsts]
+
+    periods = list(PATTERN_PERIODS.values())
+    period_lengths = np.array([periods[position] if position >= 0 else 0 for position in best_period[present]])
+    accepted = (
+        (intervals[present] + 1 >= min_occurrences)
+        & (best_period[present] >= 0)
+        & (best_ratio[present] >= min_ratio)
+        & (deviations[present] <= amount_tolerance * np.abs(means[present]))
+        & (today.toordinal() - days[lasts] <= 2 * period_lengths)
+    )
+
+    names = list(PATTERN_PERIODS)
+    return [
+        (int(order[first]), int(order[last]), names[best_period[group]], int(intervals[group]) + 1, float(best_ratio[group]))
+        for first, last, group in zip(firsts[accepted], lasts[accepted], present[accepted])
+    ]
+
+
+def detect_recurring_patterns(household, today=None, **options):
+    """
+    Detect the periodic series among the non-recurring transactions of a household.
+
+    Transactions are grouped by account, type and normalized description (see
+    normalize_description) and the groups are tested by find_periodic_groups.
+    Transfers are left out, and so are the groups already covered by a recurring
+    transaction. Each proposal points to the last transaction of its series, which
+    becomes the recurring parent when the proposal is applied.
+
+    Args:
+        household: The TaxHousehold
+        today: Current date (defaults to today's date)
+        **options: Thresholds passed to find_periodic_groups
+
+    Returns:
+        List of proposals (dictionaries with 'transaction_id', 'account_id',
+        'description', 'transaction_type', 'period', 'occurrences', 'first_date',
+        'last_date', 'amount' and 'ratio'), sorted by account and description
+    """
+    from core.models import Transaction
+
+    if today is None:
+        today = timezone.now().date()
+
+    covered = {
+        (account_id, transaction_type, normalize_description(description))
+        for account_id, transaction_type, description in Transaction.objects.filter(
+            tax_household=household, is_recurring=True
+        ).values_list('account_id', 'transaction_type', 'description')
+    }
+
+    rows = list(Transaction.objects.filter(
+        tax_household=household, is_recurring=False, is_transfer=False
+    ).order_by().values_list('id', 'account_id', 'transaction_type', 'description', 'date', 'amount'))
+
+    keys = {}
+    normalized = {}
+    groups = np.empty(len(rows), dtype=np.int64)
+    for position, (_, account_id, transaction_type, description, _, _) in enumerate(rows):
+        if description not in normalized:
+            normalized[description] = normalize_description(description)
+        groups[position] = keys.setdefault((account_id, transaction_type, normalized[description]), len(keys))
+    days = np.fromiter((row[4].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    amounts = np.fromiter((row[5] for row in rows), dtype=float, count=len(rows))
+
+    proposals = []
+    for first, last, period, occurrences, ratio in find_periodic_groups(groups, days, amounts, today, **options):
+        transaction_id, account_id, transaction_type, description, last_date, amount = rows[last]
+        if (account_id, transaction_type, normalized[description]) in covered:
+            continue
+        proposals.append({
+            'transaction_id': transaction_id,
+            'account_id': account_id,
+            'description': description,
+            'transaction_type': transaction_type,
+            'period': period,
+            'occurrences': occurrences,
+            'first_date': rows[first][4],
+            'last_date': last_date,
+            'amount': amount,
+            'ratio': ratio,
+        })
+
+    proposals.sort(key=lambda proposal: (proposal['account_id'], proposal['description'].lower()))
+    return proposals
+
+
+def apply_recurring_patterns(proposals):
+    """
+    Turn the last transaction of each proposed series into a recurring transaction of
+    the detected period, starting at its own date so that the recorded history is not
+    generated again.
+
+    Returns:
+        Number of transactions made recurring
+    """
+    from core.models import Transaction
+
+    transactions = Transaction.objects.in_bulk([proposal['transaction_id'] for proposal in proposals])
+    count = 0
+    for proposal in proposals:
+        transaction = transactions.get(proposal['transaction_id'])
+        if transaction is None or transaction.is_recurring:
+            continue
+        transaction.is_recurring = True
+        transaction.recurrence_period = proposal['period']
+        transaction.save(update_fields=['is_recurring', 'recurrence_period'])
+        count += 1
+    return count
@@ -0,0 +1,92 @@
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+
+
+CACHE_KEY = 'report'
+
+
+def report_cache_key(request, household, endpoint):
+    """
+    Cache key of a report response: household, endpoint, normalized query parameters,
+    display currency, language, current day and household data version.
+
+    The data version changes on every write to the household's data, so entries never
+    need to be deleted: they simply stop being requested. The day is part of the key
+    because reports depend on it (default periods, recurring instances, exchange rates).
+    """
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    currency = request.GET.get('display_currency', request.session.get('currency', 'EUR'))
+    fingerprint = repr((params, currency, get_language(), timezone.now().date().isoformat()))
+    digest = hashlib.md5(fingerprint.encode('utf-8')).hexdigest()
+    return f"{CACHE_KEY}_{household.pk}_{household.data_version}_{endpoint}_{digest}"
+
+
+def report_last_modified(household):
+    """
+    Last-Modified time of a household's reports: its last data change, or the start of
+    the current day when that is later (reports change with the day)
+    """
+    start_of_day = timezone.make_aware(datetime.combine(timezone.now().date(), time.min))
+    if household.data_changed_at is None:
+        return start_of_day
+    return max(household.data_changed_at, start_of_day)
+
+
+def cached_report(view):
+    """
+    Serve the AJAX GET responses of a report view from the cache until the household's
+    data changes. Page loads, other methods and error responses are never cached.
+
+    Responses also carry an ETag (the cache key) and a Last-Modified date, and must be
+    revalidated by the browser: a request whose If-None-Match / If-Modified-Since still
+    matches gets a 304 Not Modified without the report being computed or read.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.headers.get('x-requested-with') != 'XMLHttpRequest':
+            return view(request, *args, **kwargs)
+
+        from core.models import TaxHousehold
+        try:
+            household = request.user.tax_household
+        except TaxHousehold.DoesNotExist:
+            return view(request, *args, **kwargs)
+
+        key = report_cache_key(request, household, view.__name__)
+        etag = quote_etag(hashlib.md5(key.encode('utf-8')).hexdigest())
+        last_modified = int(report_last_modified(household).timestamp())
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            response = not_modified
+        else:
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    getattr(settings, 'REPORT_CACHE_TIMEOUT', 60 * 60)
+                )
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Per-user data: browsers may keep it, shared caches may not, and it is
+        # revalidated on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.db import models, transaction as db_transaction
+from django.db.models.functions import TruncMonth
+
+
+def transaction_groups(queryset):
+    """
+    Number and total amount of the transactions of a queryset, per month and
+    MonthlyRollup.DIMENSIONS (one dictionary per group, with 'month', 'count' and 'amount')
+    """
+    from core.models import MonthlyRollup
+
+    return queryset.annotate(
+        month=TruncMonth('date')
+    ).values('month', *MonthlyRollup.DIMENSIONS).annotate(
+        count=models.Count('id'),
+        amount=models.Sum('amount')
+    ).order_by()
+
+
+def move_rollups(queryset, changes):
+    """
+    Update the monthly rollups for a bulk queryset.update(**changes) that bypasses
+    Transaction.save(). Must be called before the update: the transactions are grouped
+    once, and each group moves to the rollup row matching the changed values.
+
+    Args:
+        queryset: Transactions about to be updated
+        changes: Field values set by the update, dimension fields given by attname
+            (e.g. 'category_id')
+    """
+    from core.models import MonthlyRollup
+
+    moved = {field: value for field, value in changes.items() if field in MonthlyRollup.DIMENSIONS}
+    if not moved:
+        return
+    for group in transaction_groups(queryset):
+        MonthlyRollup.apply_delta(group, group['month'], -group['count'], -group['amount'])
+        MonthlyRollup.apply_delta({**group, **moved}, group['month'], group['count'], group['amount'])
+
+
+def rebuild_monthly_rollups(household=None):
+    """
+    Recompute the monthly rollups from the transactions, for one household or all of them
+
+    Returns:
+        Number of rollup rows written
+    """
+    from core.models import MonthlyRollup, Transaction
+
+    rollups = MonthlyRollup.objects.all()
+    transactions = Transaction.objects.all()
+    if household is not None:
+        rollups = rollups.filter(tax_household=household)
+        transactions = transactions.filter(tax_household=household)
+
+    with db_transaction.atomic():
+        rollups.delete()
+        created = MonthlyRollup.objects.bulk_create(
+            (MonthlyRollup(**group) for group in transaction_groups(transactions)),
+            batch_size=1000
+        )
+    return len(created)
+
+
+def find_rollup_drift(household=None):
+    """
+    Compare the stored monthly rollups with the transactions
+
+    Yields:
+        Tuples (month, dimensions, stored, expected) where stored and expected are
+        (count, amount) pairs, (0, 0) for missing rows
+    """
+    from core.models import MonthlyRollup, Transaction
+
+    rollups = MonthlyRollup.objects.all()
+    transactions = Transaction.objects.all()
+    if household is not None:
+        rollups = rollups.filter(tax_household=household)
+        transactions = transactions.filter(tax_household=household)
+
+    def key(row):
+        return (row['month'],) + tuple(row[field] for field in MonthlyRollup.DIMENSIONS)
+
+    stored = {key(row): (row['count'], row['amount']) for row in rollups.values('month', 'count', 'amount', *MonthlyRollup.DIMENSIONS)}
+    expected = {key(row): (row['count'], row['amount']) for row in transaction_groups(transactions)}
+    for group in sorted(stored.keys() | expected.keys(), key=lambda group: group[0]):
+        if stored.get(group) != expected.get(group):
+            yield group[0], dict(zip(MonthlyRollup.DIMENSIONS, group[1:])), stored.get(group, (0, 0)), expected.get(group, (0, 0))
+
+
+def period_totals(conditions, start_date, end_date, fields):
+    """
+    Total amount of the transactions matching `conditions` between two dates, per month
+    and `fields`.
+
+    Months entirely inside the period are read from MonthlyRollup; only the days of
+    partial months at either end are summed from the transactions. `conditions` and
+    `fields` may therefore only use lookups shared by both models (the rollup DIMENSIONS
+    and the relations they point to, e.g. 'category__cost_center__name').
+
+    Returns:
+        List of dictionaries with 'month' (first day), the `fields` and 'total'
+    """
+    from core.models import MonthlyRollup, Transaction
+
+    first_month = start_date if start_date.day == 1 else (start_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+    after_last_month = (end_date + timedelta(days=1)).replace(day=1) if (end_date + timedelta(days=1)).day == 1 else end_date.replace(day=1)
+    if first_month >= after_last_month:
+        # No complete month in the period
+        first_month = after_last_month = start_date
+
+    totals = list(
+        MonthlyRollup.objects.filter(
+            conditions,
+            month__gte=first_month,
+            month__lt=after_last_month
+        ).values('month', *fields).annotate(total=models.Sum('amount')).order_by()
+    )
+
+    partial_days = models.Q(date__gte=start_date, date__lt=first_month) | models.Q(date__gte=after_last_month, date__lte=end_date)
+    totals.extend(
+        Transaction.objects.filter(conditions).filter(partial_days).annotate(
+            month=TruncMonth('date')
+        ).values('month', *fields).annotate(total=models.Sum('amount')).order_by()
+    )
+    return totals
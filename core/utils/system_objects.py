@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext as _
+
+
+# Objects used by transfers: a Transfer cost center and category in every household,
+# and one Bank Transfer payment method shared by all households. They are found by
+# name, so the ones created before they were provisioned are reused
+TRANSFER_NAME = 'Transfer'
+TRANSFER_COLOR = '#8a92a9'
+BANK_TRANSFER_METHOD = {'name': 'Bank Transfer', 'icon': 'bi-bank'}
+
+SYSTEM_OBJECTS_CACHE_KEY = 'system_objects'
+
+
+def system_object_cache_key(household, name):
+    """
+    Cache key of a system object used by a household. It contains the household
+    reference version, which changes with the household's categories and cost centers
+    and with the payment methods (but not with transactions), so an object deleted or
+    replaced in any process is never read from the cache again.
+    """
+    return f"{SYSTEM_OBJECTS_CACHE_KEY}_{name}_{household.pk}_{household.reference_version}"
+
+
+def _cache_timeout():
+    return getattr(settings, 'SYSTEM_OBJECTS_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def _refresh_reference_version(household):
+    """
+    Re-read the reference version of a household after objects may have been created:
+    creating them bumps it, and a value stored under the previous key would never be
+    read again.
+    """
+    household.refresh_from_db(fields=['reference_version'])
+
+
+def _cached_instance(model, household, name, load):
+    """
+    System object stored in the cache as its field values, and rebuilt from them
+    without a query. `load` reads (or creates) it from the database on a miss, and
+    every time when there is no household. Every call returns a new instance, so
+    callers never share one.
+    """
+    values = cache.get(system_object_cache_key(household, name)) if household else None
+    if values is not None:
+        return model.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+    instance = load()
+    if household:
+        _refresh_reference_version(household)
+        values = {field.attname: getattr(instance, field.attname) for field in model._meta.concrete_fields}
+        cache.set(system_object_cache_key(household, name), values, _cache_timeout())
+    return instance
+
+
+def provision_household(household):
+    """
+    Create the Transfer cost center and category of a household when missing, with
+    the category linked to the cost center. Safe to run again: it runs when a
+    household is created, for existing households in migration 0024, and when the
+    cached category is missing.
+
+    Returns:
+        The Transfer category
+    """
+    from core.models import CostCenter, TransactionCategory
+
+    cost_center = CostCenter.objects.filter(tax_household=household, name=TRANSFER_NAME).first()
+    if cost_center is None:
+        cost_center = CostCenter.objects.create(tax_household=household, name=TRANSFER_NAME, color=TRANSFER_COLOR)
+
+    category = TransactionCategory.objects.filter(tax_household=household, name=TRANSFER_NAME).first()
+    if category is None:
+        category = TransactionCategory.objects.create(tax_household=household, name=TRANSFER_NAME, cost_center=cost_center)
+    elif category.cost_center_id != cost_center.id:
+        category.cost_center = cost_center
+        category.save(update_fields=['cost_center'])
+    return category
+
+
+def get_transfer_category(household):
+    """Transfer category of a household, from the cache when possible"""
+    from core.models import TransactionCategory
+
+    return _cached_instance(TransactionCategory, household, 'transfer_category', lambda: provision_household(household))
+
+
+def get_bank_transfer_method(household=None):
+    """Payment method of transfers, from the cache of the household when one is given"""
+    from core.models import PaymentMethod
+
+    def load():
+        method, _ = PaymentMethod.objects.get_or_create(
+            name=BANK_TRANSFER_METHOD['name'],
+            defaults={'icon': BANK_TRANSFER_METHOD['icon'], 'is_active': True}
+        )
+        return method
+
+    return _cached_instance(PaymentMethod, household, 'bank_transfer_method', load)
+
+
+def ensure_payment_methods(household):
+    """
+    Make sure at least one payment method is active, creating a default one
+    otherwise. Checked once, then remembered in the cache until the household
+    reference version changes (which payment method changes do).
+    """
+    from core.models import PaymentMethod
+
+    if cache.get(system_object_cache_key(household, 'payment_methods_ready')):
+        return
+    if not PaymentMethod.objects.filter(is_active=True).exists():
+        PaymentMethod.objects.create(name=_("Credit Card"), icon="bi-credit-card", is_active=True)
+        _refresh_reference_version(household)
+    cache.set(system_object_cache_key(household, 'payment_methods_ready'), True, _cache_timeout())
+
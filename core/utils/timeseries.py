@@ -0,0 +1,143 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+
+# Chart granularities: 'auto' keeps daily points but downsamples them (LTTB) to a point budget
+GRANULARITIES = ('auto', 'day', 'week', 'month')
+# 'close' keeps the last value of each period, 'minmax' also returns the lowest and highest values
+AGGREGATIONS = ('close', 'minmax')
+DEFAULT_MAX_POINTS = 500
+
+
+def parse_granularity(params):
+    """
+    Read the granularity options of a chart request (query dict).
+
+    Invalid values fall back to the defaults: daily points, closing values and no
+    point budget.
+
+    Returns:
+        Tuple (granularity, aggregation, max_points)
+    """
+    granularity = params.get('granularity') or 'day'
+    if granularity not in GRANULARITIES:
+        granularity = 'day'
+
+    aggregation = params.get('aggregation') or 'close'
+    if aggregation not in AGGREGATIONS:
+        aggregation = 'close'
+
+    try:
+        max_points = int(params.get('max_points') or 0) or None
+    except (TypeError, ValueError):
+        max_points = None
+    if max_points is not None:
+        max_points = max(max_points, 3)
+
+    return granularity, aggregation, max_points
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that best keep the
+    visual shape of the (x, y) line. The first and last points are always kept.
+    """
+    size = len(y)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    bucket_size = (size - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = size - 1
+
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, size)
+
+        # Third vertex: average of the next bucket (the last point for the last bucket)
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[selected] - average_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (average_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
+
+
+def reduce_series(dates, series, granularity='day', aggregation='close', max_points=None):
+    """
+    Shrink daily chart series sharing the same dates.
+
+    Points are first grouped by week or month (labelled with the last date of each
+    period), then, when there are more than `max_points`, downsampled with LTTB. The
+    points kept are the union of the LTTB selection of each series, so the series still
+    share their dates and the total stays within the budget. With the 'minmax'
+    aggregation, the lowest and highest values of every dropped stretch are kept too.
+
+    Args:
+        dates: List of dates (date objects or 'YYYY-MM-DD' strings)
+        series: List of value lists, one per series, aligned with dates
+        granularity: One of GRANULARITIES ('auto' means daily points with a point budget)
+        aggregation: One of AGGREGATIONS
+        max_points: Maximum number of points per chart (DEFAULT_MAX_POINTS with 'auto')
+
+    Returns:
+        Tuple (dates, reduced) where reduced holds one dictionary per series with a
+        'close' list, plus 'min' and 'max' lists for the 'minmax' aggregation
+    """
+    if granularity == 'auto':
+        granularity = 'day'
+        max_points = max_points or DEFAULT_MAX_POINTS
+
+    size = len(dates)
+    if not size:
+        empty = {'close': [], 'min': [], 'max': []} if aggregation == 'minmax' else {'close': []}
+        return [], [dict(empty) for _ in series]
+
+    arrays = [np.asarray(values, dtype=float) for values in series]
+
+    # Period boundaries: [starts[i], ends[i]) covers the points of period i
+    if granularity in ('week', 'month'):
+        periods = [_period_start(_as_date(day), granularity) for day in dates]
+        starts = np.array([0] + [i for i in range(1, size) if periods[i] != periods[i - 1]])
+    else:
+        starts = np.arange(size)
+    ends = np.append(starts[1:], size)
+
+    if max_points and len(starts) > max_points and arrays:
+        # Downsample the period closes, then widen each kept point to the stretch it replaces
+        x = np.array([_as_date(dates[end - 1]).toordinal() for end in ends], dtype=float)
+        threshold = max(max_points // len(arrays), 3)
+        kept = np.unique(np.concatenate([
+            lttb_indices(x, values[ends - 1], threshold) for values in arrays
+        ]))
+        ends = ends[kept]
+        starts = np.append(0, ends[:-1])
+
+    reduced = []
+    for values in arrays:
+        points = {'close': values[ends - 1].tolist()}
+        if aggregation == 'minmax':
+            points['min'] = np.minimum.reduceat(values, starts).tolist()
+            points['max'] = np.maximum.reduceat(values, starts).tolist()
+        reduced.append(points)
+
+    return [dates[end - 1] for end in ends], reduced
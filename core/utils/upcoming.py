@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+
+# Longest period accepted by the upcoming transactions view, in days
+MAX_UPCOMING_DAYS = 366
+
+
+def advance_next_occurrences(today=None, rebuild=False):
+    """
+    Move the stored next occurrence date of recurring transactions to their first
+    occurrence on or after today. Only the series whose next occurrence has passed are
+    read (a range query on the indexed column), unless `rebuild` recomputes every
+    recurring transaction.
+
+    Returns:
+        Number of transactions updated
+    """
+    from core.models import Transaction
+
+    if today is None:
+        today = timezone.now().date()
+
+    transactions = Transaction.objects.filter(is_recurring=True) if rebuild else Transaction.objects.filter(next_occurrence_date__lt=today)
+    transactions = transactions.only(
+        'date', 'is_recurring', 'recurrence_period', 'recurrence_start_date', 'recurrence_end_date', 'next_occurrence_date'
+    ).prefetch_related('occurrence_exceptions')
+
+    changed = []
+    for transaction in transactions.iterator(chunk_size=2000):
+        next_date = transaction.compute_next_occurrence(today)
+        if next_date != transaction.next_occurrence_date:
+            transaction.next_occurrence_date = next_date
+            changed.append(transaction)
+
+    # bulk_update does not go through save(): balances and rollups are not involved
+    Transaction.objects.bulk_update(changed, ['next_occurrence_date'], batch_size=1000)
+    return len(changed)
+
+
+def upcoming_occurrences(days, households=None, today=None):
+    """
+    Occurrences of recurring transactions due in the next `days` days (today included),
+    sorted by date.
+
+    The series are found with one range query on the indexed next occurrence date, so
+    the other series are never generated. Series not advanced yet (next occurrence
+    before today) are read too and simply produce their occurrences from today. Like
+    the recurring transfer list, transfers only show their withdrawal side.
+
+    Args:
+        days: Number of days to look ahead
+        households: TaxHousehold objects (or ids) to restrict to, all households if None
+        today: First day of the period (defaults to today's date)
+
+    Returns:
+        List of Occurrence objects (see core/utils/recurrence.py)
+    """
+    from core.models import Transaction
+
+    if today is None:
+        today = timezone.now().date()
+    end_date = today + timedelta(days=days - 1)
+
+    parents = Transaction.objects.filter(
+        next_occurrence_date__lte=end_date,
+        is_recurring=True
+    ).exclude(
+        is_transfer=True, transaction_type='income'
+    ).order_by().select_related(
+        'tax_household', 'category', 'account', 'payment_method', 'recipient_member',
+        'paired_transaction__account',
+    ).prefetch_related('occurrence_exceptions__category')
+    if households is not None:
+        parents = parents.filter(tax_household__in=households)
+
+    occurrences = []
+    for parent in parents:
+        for scheduled_date, instance_date, exception in parent.iter_occurrence_dates(end_date, today, end_date):
+            # The occurrence of the parent itself comes last (after the paired one)
+            occurrences.append(parent._build_recurring_instance(instance_date, scheduled_date, exception)[-1])
+
+    occurrences.sort(key=lambda occurrence: (occurrence.date, occurrence.description, occurrence.parent.pk))
+    return occurrences
@@ -3,17 +3,34 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
 from django.contrib import messages
 from django.urls import reverse_lazy, reverse
-from django.http import HttpResponseRedirect, JsonResponse, HttpResponse
+from django.http import Http404, HttpResponseRedirect, JsonResponse, HttpResponse, StreamingHttpResponse, QueryDict
 from django.db import transaction, models
 from django.utils.translation import get_language, gettext_lazy as _
 from django.utils import timezone
+from django.views.decorators.gzip import gzip_page
 from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
 import json
 from decimal import Decimal
 
-from .models import TaxHousehold, HouseholdMember, BankAccount, AccountType, TransactionCategory, CostCenter, Transaction, PaymentMethod
+from .models import TaxHousehold, HouseholdMember, BankAccount, AccountType, TransactionCategory, CostCenter, Transaction, PaymentMethod, CategorizationRule, OccurrenceException
 from .utils.currency import CurrencyExchangeService
-from .forms import TaxHouseholdForm, HouseholdMemberForm, HouseholdMemberFormSet, BankAccountForm, TransactionCategoryForm, CostCenterForm, TransactionForm
+from .utils.reconciliation import parse_statement_csv, reconcile_account, StatementParseError
+from .utils.categorization import RuleMatcher, apply_rules
+from .utils.export import parse_transaction_filters, filter_transactions, iter_transaction_rows, export_fields, EXPORT_FORMATS
+from .utils.recategorization import move_categories_to_cost_center, clear_cost_center, recategorize_transactions
+from .utils.balances import refresh_current_balances, balance_evolutions
+from .utils.networth import net_worth_timeline
+from .utils.forecast import forecast_timeline, MAX_FORECAST_MONTHS
+from .utils.timeseries import parse_granularity
+from .utils.compact import compact_requested, encode_dates, encode_fields, encode_table, fast_json_response
+from .utils.paging import merged_page
+from .utils.rollups import period_totals
+from .utils.report_cache import cached_report
+from .utils.upcoming import upcoming_occurrences, MAX_UPCOMING_DAYS
+from .utils.recurrence import next_occurrence_date, unrecorded_occurrences
+from .utils.system_objects import TRANSFER_NAME, ensure_payment_methods, get_bank_transfer_method, get_transfer_category
+from .forms import TaxHouseholdForm, HouseholdMemberForm, HouseholdMemberFormSet, BankAccountForm, TransactionCategoryForm, CostCenterForm, TransactionForm, CategorizationRuleForm, OccurrenceExceptionForm
 
 def home(request):
     if request.user.is_authenticated:
@@ -39,21 +56,23 @@ def dashboard(request):
     
     try:
         # Check if user has a tax household
-        household = request.user.tax_household
+        household_ctx = request.household_ctx
+        household = household_ctx.household
         has_household = True
         
+        # The setup checks use the cached choices of the transaction form
+        choices = household_ctx.form_choices
+        
         # Check if the household has members
-        members = household.members.all()
-        has_members = members.exists()
+        has_members = bool(choices['members'])
         
         # Check if there are bank accounts linked to any household members
         if has_members:
-            bank_accounts = BankAccount.objects.filter(members__in=members).distinct()
-            has_bank_accounts = bank_accounts.exists()
+            has_bank_accounts = bool(choices['accounts'])
         
-        # Check if the household has any categories
+        # Check if the household has any categories (besides the provisioned Transfer one)
         if has_bank_accounts:
-            has_categories = TransactionCategory.objects.filter(tax_household=household).exists()
+            has_categories = any(name != TRANSFER_NAME for pk, name in choices['categories'])
         
         # Financial environment is complete when all steps are done
         setup_complete = has_household and has_members and has_bank_accounts and has_categories
@@ -94,7 +113,7 @@ def dashboard(request):
                     print(f"  {key}: {value}")
                 
                 # Use modified data
-                transaction_form = TransactionForm(post_data, household=household)
+                transaction_form = TransactionForm(post_data, household_ctx=household_ctx)
                 
                 if transaction_form.is_valid():
                     print("DASHBOARD DEBUG - Form is valid")
@@ -146,22 +165,9 @@ def dashboard(request):
                                 source_account = transaction_form.cleaned_data['account']
                                 destination_account = transaction_form.cleaned_data['destination_account']
                                 
-                                # Get or create a Transfer category (using _ renamed to avoid name conflict)
-                                transfer_category, created = TransactionCategory.objects.get_or_create(
-                                    tax_household=household,
-                                    name="Transfer",
-                                    defaults={'name': 'Transfer'}
-                                )
-                                
-                                # For transfer transactions, we need to create a special payment method if it doesn't exist
-                                bank_transfer_method, created = PaymentMethod.objects.get_or_create(
-                                    name="Bank Transfer",
-                                    defaults={
-                                        'name': 'Bank Transfer',
-                                        'icon': 'bi-bank',
-                                        'is_active': True
-                                    }
-                                )
+                                # Transfer category and payment method (provisioned system objects, cached)
+                                transfer_category = get_transfer_category(household)
+                                bank_transfer_method = get_bank_transfer_method(household)
                                                             
                                 # Get appropriate recipient for source account (debit/withdrawal)
                                 source_recipient_type, source_recipient_member = source_account.get_appropriate_recipient()
@@ -234,7 +240,7 @@ def dashboard(request):
                     messages.error(request, f"Form validation errors: {transaction_form.errors}")
             else:
                 # Initialize an empty form
-                transaction_form = TransactionForm(household=household)
+                transaction_form = TransactionForm(household_ctx=household_ctx)
                 
                 # Set default date to today
                 transaction_form.initial = {'date': timezone.now().date()}
@@ -247,7 +253,7 @@ def dashboard(request):
             today = date.today()
             
             # Separate recurring and non-recurring transactions
-            recurring_db_transactions = list(db_transactions.filter(is_recurring=True))
+            recurring_db_transactions = list(db_transactions.filter(is_recurring=True).prefetch_related('occurrence_exceptions__category'))
             non_recurring_db_transactions = list(db_transactions.filter(is_recurring=False))
             
             # Generate instances for recurring transactions
@@ -266,16 +272,10 @@ def dashboard(request):
             # Add generated instances, but skip any that would create duplicates or are in the future
             existing_dates = {(t.date, t.description, t.amount) for t in combined_transactions if t.date}
             
-            unique_generated_instances = []
-            for instance in generated_instances:
-                # Skip future instances - only show instances up to and including today
-                if instance.date > today:
-                    continue
-                    
-                instance_key = (instance.date, instance.description, instance.amount)
-                if instance_key not in existing_dates:
-                    unique_generated_instances.append(instance)
-                    existing_dates.add(instance_key)
+            # Skip future instances - only show instances up to and including today
+            unique_generated_instances = list(unrecorded_occurrences(
+                (instance for instance in generated_instances if instance.date <= today), existing_dates
+            ))
                     
             all_transactions = combined_transactions + unique_generated_instances
             
@@ -337,25 +337,27 @@ def logout_view(request):
 
 # Reporting & Analytics Views
 @login_required
+@gzip_page
+@cached_report
 def balance_evolution(request):
     """View for displaying bank account balance evolution chart"""
     
     # Get user's household
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, _("You need to set up a household first"))
         return redirect('financial_settings')
     
     # Get members and their bank accounts
-    members = household.members.all()
-    if not members.exists():
+    members = request.household_ctx.members
+    if not members:
         messages.error(request, _("You need to add members to your household first"))
         return redirect('household_members')
     
     # Get all bank accounts linked to household members
-    bank_accounts = BankAccount.objects.filter(members__in=members).distinct()
-    if not bank_accounts.exists():
+    bank_accounts = BankAccount.objects.filter(tax_household=household)
+    if not request.household_ctx.accounts:
         messages.error(request, _("You need to create at least one bank account first"))
         return redirect('bank_account_list')
     
@@ -380,8 +382,40 @@ def balance_evolution(request):
     # Handle AJAX request for chart data
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         account_id = request.GET.get('account_id')
+        account_ids = request.GET.get('account_ids')
         display_currency = request.GET.get('display_currency', request.session.get('currency', 'EUR'))
         
+        # Several accounts (comma-separated ids, or "all") in one response
+        if account_ids:
+            if account_ids == 'all':
+                selected_accounts = list(bank_accounts.order_by('name'))
+            else:
+                try:
+                    ids = list(dict.fromkeys(int(value) for value in account_ids.split(',') if value))
+                except ValueError:
+                    return JsonResponse({'error': 'Invalid account IDs'}, status=400)
+                
+                accounts_by_id = bank_accounts.in_bulk(ids)
+                if len(accounts_by_id) != len(ids):
+                    return JsonResponse({'error': 'Account not found'}, status=404)
+                selected_accounts = [accounts_by_id[pk] for pk in ids]
+            
+            include_total = request.GET.get('include_total') in ('1', 'true')
+            granularity, aggregation, max_points = parse_granularity(request.GET)
+            balance_data = balance_evolutions(
+                selected_accounts, start_date, end_date, display_currency, include_total,
+                granularity=granularity, aggregation=aggregation, max_points=max_points
+            )
+            
+            if compact_requested(request):
+                balance_data['dates'] = encode_dates(balance_data['dates'])
+                for account_data in balance_data['accounts']:
+                    encode_fields(account_data, ['balances', 'balances_min', 'balances_max'])
+                encode_fields(balance_data, ['total', 'total_min', 'total_max'])
+                return fast_json_response(balance_data)
+            
+            return JsonResponse(balance_data)
+        
         if not account_id:
             return JsonResponse({'error': 'Account ID is required'}, status=400)
         
@@ -391,7 +425,16 @@ def balance_evolution(request):
             return JsonResponse({'error': 'Account not found'}, status=404)
         
         # Get balance evolution data with the selected display currency
-        balance_data = calculate_balance_evolution(account, start_date, end_date, display_currency)
+        granularity, aggregation, max_points = parse_granularity(request.GET)
+        balance_data = calculate_balance_evolution(
+            account, start_date, end_date, display_currency,
+            granularity=granularity, aggregation=aggregation, max_points=max_points
+        )
+        
+        if compact_requested(request):
+            balance_data['dates'] = encode_dates(balance_data['dates'])
+            encode_fields(balance_data, ['balances', 'balances_min', 'balances_max'])
+            return fast_json_response(balance_data)
         
         return JsonResponse(balance_data)
     
@@ -404,7 +447,122 @@ def balance_evolution(request):
     
     return render(request, 'reporting/balance_evolution.html', context)
 
-def calculate_balance_evolution(account, start_date, end_date, display_currency=None):
+@login_required
+@gzip_page
+@cached_report
+def net_worth(request):
+    """View for displaying the household net worth over time, across all accounts and currencies"""
+    
+    # Get user's household
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.error(request, _("You need to set up a household first"))
+        return redirect('financial_settings')
+    
+    if not request.household_ctx.accounts:
+        messages.error(request, _("You need to create at least one bank account first"))
+        return redirect('bank_account_list')
+    
+    # Default date range (last year)
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=365)
+    
+    custom_start_date = request.GET.get('start_date', None)
+    custom_end_date = request.GET.get('end_date', None)
+    
+    # Process custom date range if provided
+    if custom_start_date and custom_end_date:
+        try:
+            start_date = datetime.strptime(custom_start_date, '%Y-%m-%d').date()
+            end_date = datetime.strptime(custom_end_date, '%Y-%m-%d').date()
+        except ValueError:
+            messages.warning(request, _("Invalid date format. Using default date range."))
+    
+    # Handle AJAX request for chart data
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        display_currency = request.GET.get('display_currency', request.session.get('currency', 'EUR'))
+        
+        if start_date > end_date:
+            return JsonResponse({'error': 'The start date must be before the end date'}, status=400)
+        
+        include_recurring = request.GET.get('include_recurring', '1') != '0'
+        granularity, aggregation, max_points = parse_granularity(request.GET)
+        timeline = net_worth_timeline(
+            household, start_date, end_date, display_currency, include_recurring,
+            granularity=granularity, aggregation=aggregation, max_points=max_points
+        )
+        
+        if compact_requested(request):
+            timeline['dates'] = encode_dates(timeline['dates'])
+            encode_fields(timeline, ['net_worth', 'net_worth_min', 'net_worth_max'])
+            return fast_json_response(timeline)
+        
+        return JsonResponse(timeline)
+    
+    context = {
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'supported_currencies': CurrencyExchangeService.SUPPORTED_CURRENCIES,
+        'selected_currency': request.session.get('currency', 'EUR')
+    }
+    
+    return render(request, 'reporting/net_worth.html', context)
+
+@login_required
+@gzip_page
+@cached_report
+def cash_flow_forecast(request):
+    """View projecting the balance of each account and of the household over the coming months"""
+    
+    # Get user's household
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.error(request, _("You need to set up a household first"))
+        return redirect('financial_settings')
+    
+    if not request.household_ctx.accounts:
+        messages.error(request, _("You need to create at least one bank account first"))
+        return redirect('bank_account_list')
+    
+    # Handle AJAX request for chart data
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        display_currency = request.GET.get('display_currency', request.session.get('currency', 'EUR'))
+        
+        try:
+            months = int(request.GET.get('months', 12))
+        except ValueError:
+            return JsonResponse({'error': 'Invalid number of months'}, status=400)
+        if not 1 <= months <= MAX_FORECAST_MONTHS:
+            return JsonResponse({'error': f'The number of months must be between 1 and {MAX_FORECAST_MONTHS}'}, status=400)
+        
+        granularity, aggregation, max_points = parse_granularity(request.GET)
+        forecast = forecast_timeline(
+            household, months, display_currency,
+            granularity=granularity, aggregation=aggregation, max_points=max_points
+        )
+        
+        if compact_requested(request):
+            forecast['dates'] = encode_dates(forecast['dates'])
+            encode_fields(forecast, ['total', 'total_min', 'total_max'])
+            for account in forecast['accounts']:
+                encode_fields(account, ['balances', 'balances_min', 'balances_max'])
+            return fast_json_response(forecast)
+        
+        return JsonResponse(forecast)
+    
+    context = {
+        'months': 12,
+        'max_months': MAX_FORECAST_MONTHS,
+        'supported_currencies': CurrencyExchangeService.SUPPORTED_CURRENCIES,
+        'selected_currency': request.session.get('currency', 'EUR')
+    }
+    
+    return render(request, 'reporting/forecast.html', context)
+
+def calculate_balance_evolution(account, start_date, end_date, display_currency=None,
+                                granularity='day', aggregation='close', max_points=None):
     """
     Calculate balance evolution for a specific account over a time period.
     Returns data formatted for a chart.
@@ -414,261 +572,36 @@ def calculate_balance_evolution(account, start_date, end_date, display_currency=
         start_date: The start date for the chart
         end_date: The end date for the chart
         display_currency: The currency to display amounts in (defaults to account's currency)
+        granularity: 'day', 'week', 'month' or 'auto' (daily points downsampled to max_points)
+        aggregation: 'close' (end of period) or 'minmax' (also lowest and highest balances)
+        max_points: Maximum number of points returned
     """
-    # Import Decimal for consistent financial calculations
-    from decimal import Decimal
-    
-    # If no display currency specified, use the account's currency
-    if not display_currency:
-        display_currency = account.currency
-    
-    # Get the initial balance (starting point)
-    initial_balance = account.balance
-    initial_balance_date = account.balance_date
-    
-    # Ensure we're working with Decimal from the start
-    if not isinstance(initial_balance, Decimal):
-        initial_balance = Decimal(str(initial_balance))
-    
-    # Get all stored transactions for this account
-    base_transactions = Transaction.objects.filter(
-        account=account
-    ).order_by('date')
-    
-    # Get recurring transactions that need to be included
-    recurring_transactions = Transaction.objects.filter(
-        account=account,
-        is_recurring=True
+    data = balance_evolutions(
+        [account], start_date, end_date, display_currency,
+        granularity=granularity, aggregation=aggregation, max_points=max_points
     )
-    
-    # Initialize data structures
-    dates = []
-    balances = []
-    
-    # Start with the recorded balance
-    current_balance = initial_balance
-    
-    # Determine the chart start date (use requested start_date even if it's before the balance_date)
-    chart_start_date = start_date
-    
-    # Generate recurring transaction instances for the entire period
-    # This ensures we capture all instances that might affect the balance
-    all_recurring_instances = []
-    processed_recurring_transfers = set()  # Track processed recurring transfers to avoid duplicates
-    
-    for txn in recurring_transactions:
-        # Skip paired transactions that are already processed
-        if txn.is_transfer and txn.paired_transaction_id:
-            # Create a unique key for this transfer pair
-            transfer_pair_key = tuple(sorted([txn.id, txn.paired_transaction_id]))
-            if transfer_pair_key in processed_recurring_transfers:
-                continue
-            processed_recurring_transfers.add(transfer_pair_key)
-        
-        instances = txn.generate_recurring_instances(current_date=end_date)
-        all_recurring_instances.extend(instances)
-    
-    # Create a combined list of all transactions (stored + recurring instances)
-    all_transactions = list(base_transactions)
-    
-    # Add recurring instances, ensuring we don't double count
-    # Track processed instances of paired transactions
-    processed_instance_pairs = set()
-    
-    for instance in all_recurring_instances:
-        # Only include instances that aren't already in the base transactions
-        # (the first instance is often the same as the base transaction)
-        is_unique = True
-        instance_date = instance.date
-        instance_amount = instance.amount
-        
-        # Skip instance if it's part of a transfer pair we've already processed
-        if hasattr(instance, 'paired_transaction') and instance.paired_transaction:
-            if hasattr(instance, '_instance_date'):
-                instance_date_str = instance._instance_date.strftime('%Y%m%d')
-                
-                # Create a unique key for this instance pair
-                if hasattr(instance, '_recurring_parent') and hasattr(instance.paired_transaction, '_recurring_parent'):
-                    parent_ids = tuple(sorted([
-                        instance._recurring_parent.id, 
-                        instance.paired_transaction._recurring_parent.id
-                    ]))
-                    pair_key = (parent_ids, instance_date_str)
-                    
-                    if pair_key in processed_instance_pairs:
-                        continue  # Skip this instance as its pair was already processed
-                    
-                    processed_instance_pairs.add(pair_key)
-        
-        # Check if the instance is already in base transactions
-        for base_txn in base_transactions:
-            if (base_txn.date == instance_date and 
-                base_txn.amount == instance_amount and
-                base_txn.transaction_type == instance.transaction_type):
-                is_unique = False
-                break
-                
-        if is_unique:
-            all_transactions.append(instance)
-    
-    # Sort transactions by date
-    all_transactions.sort(key=lambda x: x.date)
-    
-    # For debugging, print all transaction dates with more details
-    print(f"DEBUG - All transactions in date order (total: {len(all_transactions)}):")
-    for idx, tx in enumerate(all_transactions):
-        transfer_info = ""
-        recurring_info = ""
-        
-        if tx.is_transfer:
-            if hasattr(tx, 'paired_transaction') and tx.paired_transaction:
-                paired_id = tx.paired_transaction.id if hasattr(tx.paired_transaction, 'id') else 'unknown'
-                transfer_info = f", Transfer pair: {paired_id}"
-            else:
-                transfer_info = ", Transfer (unpaired)"
-        
-        if hasattr(tx, '_is_generated') and tx._is_generated:
-            recurring_info = ", Recurring instance"
-            if hasattr(tx, '_recurring_parent'):
-                parent_id = tx._recurring_parent.id
-                recurring_info += f" (parent: {parent_id})"
-        elif tx.is_recurring:
-            recurring_info = ", Recurring parent"
-            
-        print(f"  {idx+1}. Date: {tx.date}, Type: {tx.transaction_type}, Amount: {tx.amount}{transfer_info}{recurring_info}")
-    
-    # If we need to show balance before the recorded balance date, we need to work backwards
-    if start_date < initial_balance_date:
-        # Filter transactions that occurred before the initial balance date but after start date
-        backward_transactions = [tx for tx in all_transactions 
-                                if tx.date < initial_balance_date and tx.date >= start_date]
-        # Sort in reverse order
-        backward_transactions.sort(key=lambda x: x.date, reverse=True)
-        
-        # Adjust the current balance by reversing the effect of earlier transactions
-        for txn in backward_transactions:
-            # Ensure amount is a Decimal
-            amount = txn.amount
-            if not isinstance(amount, Decimal):
-                amount = Decimal(str(amount))
-                
-            if txn.transaction_type == 'income':
-                current_balance -= amount  # Subtract income that hasn't happened yet (from past perspective)
-            else:  # expense
-                current_balance += amount  # Add back expenses that haven't happened yet (from past perspective)
-                
-        # We've now calculated what the balance would have been at our start date
-    else:
-        # If start date is after initial balance date, adjust balance forward to start date
-        forward_transactions = [tx for tx in all_transactions 
-                               if tx.date >= initial_balance_date and tx.date < start_date]
-        
-        for txn in forward_transactions:
-            # Ensure amount is a Decimal
-            amount = txn.amount
-            if not isinstance(amount, Decimal):
-                amount = Decimal(str(amount))
-                
-            if txn.transaction_type == 'income':
-                current_balance += amount
-            else:  # expense
-                current_balance -= amount
-    
-    # Generate dates between start and end
-    current_date = chart_start_date
-    day_delta = timedelta(days=1)
-    
-    # For debugging
-    print(f"DEBUG - Chart start date: {chart_start_date}")
-    print(f"DEBUG - Initial balance: {current_balance}")
-    
-    # Add initial balance point
-    dates.append(chart_start_date.strftime('%Y-%m-%d'))
-    balances.append(float(current_balance))
-    
-    # Create a dictionary to track balance changes by date for more efficient lookup
-    balance_changes_by_date = {}
-    
-    # Ensure current_balance is a Decimal
-    from decimal import Decimal
-    if not isinstance(current_balance, Decimal):
-        current_balance = Decimal(str(current_balance))
-    
-    # Group transactions by date
-    for txn in all_transactions:
-        if start_date <= txn.date <= end_date:
-            date_str = txn.date.strftime('%Y-%m-%d')
-            if date_str not in balance_changes_by_date:
-                balance_changes_by_date[date_str] = Decimal('0.0')
-                
-            # Add or subtract based on transaction type
-            # Make sure we're working with Decimal objects consistently
-            amount = txn.amount
-            if not isinstance(amount, Decimal):
-                amount = Decimal(str(amount))
-                
-            if txn.transaction_type == 'income':
-                balance_changes_by_date[date_str] += amount
-            else:  # expense
-                balance_changes_by_date[date_str] -= amount
-    
-    # Process each date in the range - add a data point for EVERY day
-    print(f"DEBUG - Generating data points from {current_date} to {end_date}")
-    data_point_count = 0
-    
-    while current_date <= end_date:
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        # If we have transactions on this date, update the balance
-        if date_str in balance_changes_by_date:
-            current_balance += balance_changes_by_date[date_str]
-            print(f"DEBUG - Date {date_str} has transaction(s), new balance: {current_balance}")
-        
-        # Add a data point for this date (whether or not we have transactions)
-        dates.append(date_str)
-        balances.append(float(current_balance))
-        data_point_count += 1
-        
-        # Move to next day
-        current_date += day_delta
-    
-    print(f"DEBUG - Generated {data_point_count} data points for the chart")
-    
-    # Convert balances to display currency if needed
-    converted_balances = balances
-    if display_currency != account.currency:
-        try:
-            print(f"DEBUG - Converting from {account.currency} to {display_currency}")
-            converted_balances = []
-            for balance in balances:
-                # Convert each balance point to the display currency
-                converted_amount = CurrencyExchangeService.convert_currency(
-                    Decimal(str(balance)), 
-                    account.currency, 
-                    display_currency
-                )
-                converted_balances.append(float(converted_amount) if converted_amount else balance)
-        except Exception as e:
-            # Log the error and fall back to original values
-            print(f"ERROR - Failed to convert currency: {e}")
-            # Keep using original balances
+    series = data['accounts'][0]
     
     # Return properly formatted data for the chart
-    return {
-        'dates': dates,
-        'balances': converted_balances,
+    balance_data = {
+        'dates': data['dates'],
+        'balances': series['balances'],
         'account_name': account.name,
-        'currency': display_currency,  # Use display currency here
+        'currency': series['currency'],  # Use display currency here
         'original_currency': account.currency
     }
+    if aggregation == 'minmax':
+        balance_data['balances_min'] = series['balances_min']
+        balance_data['balances_max'] = series['balances_max']
+    return balance_data
 
 # Financial Environment Views
 @login_required
 def financial_settings(request):
     """View to display financial environment settings"""
     try:
-        tax_household = request.user.tax_household
-        household_members = tax_household.members.all()
+        tax_household = request.household_ctx.household
+        household_members = request.household_ctx.members
     except TaxHousehold.DoesNotExist:
         tax_household = None
         household_members = []
@@ -703,7 +636,7 @@ def household_create(request):
 def household_update(request):
     """View to update an existing tax household"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, "You don't have a tax household yet.")
         return redirect('household_create')
@@ -723,7 +656,7 @@ def household_update(request):
 def household_members(request):
     """View to manage household members"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, "You need to create a tax household first.")
         return redirect('household_create')
@@ -746,7 +679,7 @@ def household_members(request):
 def member_create(request):
     """View to create a new household member"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, "You need to create a tax household first.")
         return redirect('household_create')
@@ -807,15 +740,16 @@ def member_delete(request, pk):
 def bank_account_list(request):
     """View to list bank accounts"""
     try:
-        household = request.user.tax_household
-        # Get all members of the household
-        members = household.members.all()
-        
+        household = request.household_ctx.household
         # Check if there are any members in the household
-        has_members = members.exists()
+        has_members = bool(request.household_ctx.members)
         
         # Get all bank accounts linked to any of these members
-        bank_accounts = BankAccount.objects.filter(members__in=members).distinct() if has_members else []
+        bank_accounts = BankAccount.objects.filter(tax_household=household)
+        
+        # Bring stored current balances up to date (only touches transactions once a day)
+        if has_members:
+            refresh_current_balances(bank_accounts)
         
         return render(request, 'financial/bank_account_list.html', {
             'bank_accounts': bank_accounts,
@@ -835,7 +769,7 @@ def bank_account_list(request):
 def bank_account_create(request):
     """View to create a new bank account"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         if household.members.count() == 0:
             messages.error(request, "You need to add household members first.")
             return redirect('member_create')
@@ -882,12 +816,12 @@ def bank_account_update(request, pk):
     account = get_object_or_404(BankAccount, pk=pk)
     
     # Verify the account belongs to a member in the user's household
-    if not account.members.filter(tax_household__user=request.user).exists():
+    if account.tax_household is None or account.tax_household.user != request.user:
         messages.error(request, "You don't have permission to edit this bank account.")
         return redirect('bank_account_list')
     
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, "You need to create a tax household first.")
         return redirect('household_create')
@@ -931,7 +865,7 @@ def bank_account_delete(request, pk):
     account = get_object_or_404(BankAccount, pk=pk)
     
     # Verify the account belongs to a member in the user's household
-    if not account.members.filter(tax_household__user=request.user).exists():
+    if account.tax_household is None or account.tax_household.user != request.user:
         messages.error(request, "You don't have permission to delete this bank account.")
         return redirect('bank_account_list')
     
@@ -963,6 +897,50 @@ def bank_account_delete(request, pk):
         'transactions_count': transactions_count
     })
 
+@login_required
+def bank_account_reconcile(request, pk):
+    """View to reconcile an imported bank statement against an account's transactions"""
+    account = get_object_or_404(BankAccount, pk=pk)
+
+    # Verify the account belongs to a member in the user's household
+    if account.tax_household is None or account.tax_household.user != request.user:
+        messages.error(request, "You don't have permission to reconcile this bank account.")
+        return redirect('bank_account_list')
+
+    result = None
+    date_window = 3
+    suggestions = []
+
+    if request.method == 'POST':
+        statement_file = request.FILES.get('statement')
+        try:
+            date_window = max(0, min(31, int(request.POST.get('date_window', date_window))))
+        except (TypeError, ValueError):
+            date_window = 3
+
+        if not statement_file:
+            messages.error(request, _("Please select a statement file to import."))
+        else:
+            try:
+                lines = parse_statement_csv(statement_file.read())
+                result = reconcile_account(account, lines, date_window=date_window)
+
+                # Suggest a category for statement lines missing from the ledger
+                matcher = RuleMatcher.for_household(request.household_ctx.household)
+                suggestions = [
+                    (line, matcher.match(line.description, line.absolute_amount, line.transaction_type) if matcher else None)
+                    for line in result.unmatched_lines
+                ]
+            except StatementParseError as e:
+                messages.error(request, _("Could not read the statement: {}").format(e))
+
+    return render(request, 'financial/bank_account_reconcile.html', {
+        'account': account,
+        'result': result,
+        'date_window': date_window,
+        'suggestions': suggestions,
+    })
+
 # Cost Center Views
 # Redirect to category list since we're now showing cost centers there
 @login_required
@@ -974,10 +952,10 @@ def cost_center_list(request):
 def cost_center_create(request):
     """View to create a new cost center"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         
         # Check if they have bank accounts (prerequisite)
-        if not BankAccount.objects.filter(members__in=household.members.all()).exists():
+        if not request.household_ctx.accounts:
             messages.error(request, "You need to create bank accounts first.")
             return redirect('bank_account_create')
     except TaxHousehold.DoesNotExist:
@@ -1029,13 +1007,8 @@ def cost_center_delete(request, pk):
         return redirect('category_list')
     
     if request.method == 'POST':
-        # Get all categories associated with this cost center
-        categories = TransactionCategory.objects.filter(cost_center=cost_center)
-        
-        # Remove cost center association from all categories
-        for category in categories:
-            category.cost_center = None
-            category.save()
+        # Remove cost center association from all categories in one query
+        clear_cost_center(cost_center)
         
         cost_center_name = cost_center.name
         cost_center.delete()
@@ -1064,20 +1037,10 @@ def assign_categories_to_cost_center(request, pk):
     if request.method == 'POST':
         category_ids = request.POST.getlist('categories')
         
-        # Assign categories to this cost center
+        # Assign categories to this cost center in one query (ids from other households are ignored)
+        category_ids = [category_id for category_id in category_ids if category_id.isdigit()]
         if category_ids:
-            assigned_count = 0
-            for category_id in category_ids:
-                try:
-                    category = TransactionCategory.objects.get(
-                        id=category_id,
-                        tax_household=cost_center.tax_household
-                    )
-                    category.cost_center = cost_center
-                    category.save()
-                    assigned_count += 1
-                except TransactionCategory.DoesNotExist:
-                    continue
+            assigned_count = move_categories_to_cost_center(cost_center.tax_household, category_ids, cost_center)
             
             messages.success(request, f"{assigned_count} categories assigned to cost center '{cost_center.name}'")
         else:
@@ -1095,10 +1058,10 @@ def assign_categories_to_cost_center(request, pk):
 def category_list(request):
     """View to list transaction categories and cost centers"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         
         # Check if they have bank accounts (prerequisite)
-        has_bank_accounts = BankAccount.objects.filter(members__in=household.members.all()).exists()
+        has_bank_accounts = bool(request.household_ctx.accounts)
         
         if not has_bank_accounts:
             messages.warning(request, "You need to create bank accounts before adding categories.")
@@ -1157,10 +1120,10 @@ def category_list(request):
 def category_create(request):
     """View to create a new transaction category"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         
         # Check if they have bank accounts (prerequisite)
-        if not BankAccount.objects.filter(members__in=household.members.all()).exists():
+        if not request.household_ctx.accounts:
             messages.error(request, "You need to create bank accounts first.")
             return redirect('bank_account_create')
     except TaxHousehold.DoesNotExist:
@@ -1223,6 +1186,109 @@ def category_delete(request, pk):
     
     return render(request, 'financial/category_confirm_delete.html', {'category': category})
 
+# Categorization Rule Views
+@login_required
+def categorization_rule_list(request):
+    """View to list the automatic categorization rules of the household"""
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.error(request, "You need to create a tax household first.")
+        return redirect('household_create')
+    
+    rules = CategorizationRule.objects.filter(
+        tax_household=household
+    ).select_related('category', 'category__cost_center', 'payment_method', 'recipient_member')
+    
+    return render(request, 'financial/categorization_rule_list.html', {
+        'rules': rules,
+        'has_categories': bool(request.household_ctx.categories),
+    })
+
+@login_required
+def categorization_rule_create(request):
+    """View to create a new categorization rule"""
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.error(request, "You need to create a tax household first.")
+        return redirect('household_create')
+    
+    if not request.household_ctx.categories:
+        messages.error(request, _("You need to create categories first."))
+        return redirect('category_create')
+    
+    if request.method == 'POST':
+        form = CategorizationRuleForm(request.POST, household=household)
+        if form.is_valid():
+            rule = form.save(commit=False)
+            rule.tax_household = household
+            rule.save()
+            messages.success(request, _("Rule '{}' created successfully!").format(rule.name))
+            return redirect('categorization_rule_list')
+    else:
+        form = CategorizationRuleForm(household=household)
+    
+    return render(request, 'financial/categorization_rule_form.html', {'form': form})
+
+@login_required
+def categorization_rule_update(request, pk):
+    """View to update a categorization rule"""
+    rule = get_object_or_404(CategorizationRule, pk=pk)
+    
+    # Verify the rule belongs to the user's household
+    if rule.tax_household.user != request.user:
+        messages.error(request, "You don't have permission to edit this rule.")
+        return redirect('categorization_rule_list')
+    
+    if request.method == 'POST':
+        form = CategorizationRuleForm(request.POST, instance=rule, household=rule.tax_household)
+        if form.is_valid():
+            updated_rule = form.save()
+            messages.success(request, _("Rule '{}' updated successfully!").format(updated_rule.name))
+            return redirect('categorization_rule_list')
+    else:
+        form = CategorizationRuleForm(instance=rule, household=rule.tax_household)
+    
+    return render(request, 'financial/categorization_rule_form.html', {'form': form, 'rule': rule})
+
+@login_required
+def categorization_rule_delete(request, pk):
+    """View to delete a categorization rule"""
+    rule = get_object_or_404(CategorizationRule, pk=pk)
+    
+    # Verify the rule belongs to the user's household
+    if rule.tax_household.user != request.user:
+        messages.error(request, "You don't have permission to delete this rule.")
+        return redirect('categorization_rule_list')
+    
+    if request.method == 'POST':
+        rule_name = rule.name
+        rule.delete()
+        messages.success(request, _("Rule '{}' deleted successfully!").format(rule_name))
+        return redirect('categorization_rule_list')
+    
+    return render(request, 'financial/categorization_rule_confirm_delete.html', {'rule': rule})
+
+@login_required
+def categorization_rule_apply(request):
+    """View to re-apply all active rules to the existing transactions of the household"""
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.error(request, "You need to create a tax household first.")
+        return redirect('household_create')
+    
+    if request.method != 'POST':
+        return redirect('categorization_rule_list')
+    
+    counts = apply_rules(household)
+    if counts:
+        messages.success(request, _("{} transactions recategorized.").format(sum(counts.values())))
+    else:
+        messages.info(request, _("No transaction matched the active rules."))
+    return redirect('categorization_rule_list')
+
 # Helper function to process transactions
 def process_transaction_from_form(form, household):
     """
@@ -1295,7 +1361,7 @@ def process_transaction_from_form(form, household):
 def transaction_list(request):
     """View to display all transactions with filtering options, including recurring instances"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         # Get all actual transactions from the database
         db_transactions = Transaction.objects.filter(tax_household=household)
         
@@ -1303,27 +1369,18 @@ def transaction_list(request):
         category_filter = request.GET.get('category')
         account_filter = request.GET.get('account')
         type_filter = request.GET.get('type')
-        date_from = request.GET.get('date_from')
-        date_to = request.GET.get('date_to')
-        
-        # Apply filters to the database query
-        if category_filter:
-            db_transactions = db_transactions.filter(category_id=category_filter)
-        
-        if account_filter:
-            db_transactions = db_transactions.filter(account_id=account_filter)
-        
-        if type_filter:
-            db_transactions = db_transactions.filter(transaction_type=type_filter)
         
+        # Apply filters to the database query (shared with the transaction export)
         # Don't apply date filters here yet, as we need to generate recurring instances first
+        filters = parse_transaction_filters(request.GET)
+        db_transactions = filter_transactions(db_transactions, filters, dates=False)
         
         # Separate recurring and non-recurring transactions
         from datetime import date
         today = date.today()
         
         # Get all recurring and non-recurring transactions
-        recurring_transactions = list(db_transactions.filter(is_recurring=True))
+        recurring_transactions = list(db_transactions.filter(is_recurring=True).prefetch_related('occurrence_exceptions__category'))
         non_recurring_transactions = list(db_transactions.filter(is_recurring=False))
         
         # Generate instances for recurring transactions
@@ -1348,12 +1405,12 @@ def transaction_list(request):
                     print(f"DEBUG: First instance: {instances[0].date}, Last instance: {instances[-1].date}")
                     
                 # Apply category and account filters to generated instances
-                if category_filter:
-                    instances = [inst for inst in instances if inst.category_id == int(category_filter)]
-                if account_filter:
-                    instances = [inst for inst in instances if inst.account_id == int(account_filter)]
-                if type_filter:
-                    instances = [inst for inst in instances if inst.transaction_type == type_filter]
+                if filters['category']:
+                    instances = [inst for inst in instances if inst.category_id == filters['category']]
+                if filters['account']:
+                    instances = [inst for inst in instances if inst.account_id == filters['account']]
+                if filters['type']:
+                    instances = [inst for inst in instances if inst.transaction_type == filters['type']]
                     
                 generated_instances.extend(instances)
             except Exception as e:
@@ -1367,37 +1424,20 @@ def transaction_list(request):
         # This prevents duplicates on the creation date of recurring transactions
         existing_dates = {(t.date, t.description, t.amount) for t in combined_transactions if t.date}
         
-        unique_generated_instances = []
-        for instance in generated_instances:
-            # Skip future instances - only show instances up to and including today
-            if instance.date > today:
-                continue
-                
-            instance_key = (instance.date, instance.description, instance.amount)
-            if instance_key not in existing_dates:
-                unique_generated_instances.append(instance)
-                existing_dates.add(instance_key)
+        # Skip future instances - only show instances up to and including today
+        unique_generated_instances = list(unrecorded_occurrences(
+            (instance for instance in generated_instances if instance.date <= today), existing_dates
+        ))
                 
         all_transactions = combined_transactions + unique_generated_instances
         
-        # Apply date filters to the combined list
+        # Apply date filters to the combined list (parse_transaction_filters drops invalid dates)
+        date_from = filters['date_from']
+        date_to = filters['date_to']
         if date_from:
-            # Convert to date object if it's a string
-            if isinstance(date_from, str):
-                from django.utils.dateparse import parse_date
-                date_from = parse_date(date_from)
-                
-            if date_from:  # Make sure we have a valid date
-                all_transactions = [t for t in all_transactions if t.date and t.date >= date_from]
-        
+            all_transactions = [t for t in all_transactions if t.date and t.date >= date_from]
         if date_to:
-            # Convert to date object if it's a string
-            if isinstance(date_to, str):
-                from django.utils.dateparse import parse_date
-                date_to = parse_date(date_to)
-                
-            if date_to:  # Make sure we have a valid date
-                all_transactions = [t for t in all_transactions if t.date and t.date <= date_to]
+            all_transactions = [t for t in all_transactions if t.date and t.date <= date_to]
         
         # Sort transactions by date (newest first)
         # Use a safer sort key that handles None values
@@ -1426,14 +1466,15 @@ def transaction_list(request):
         all_transactions.sort(key=safe_sort_key, reverse=True)
         
         # Get filter options
-        categories = TransactionCategory.objects.filter(tax_household=household)
-        members = household.members.all()
-        accounts = BankAccount.objects.filter(members__in=members).distinct()
+        categories = request.household_ctx.categories
+        accounts = request.household_ctx.accounts
         
         context = {
             'transactions': all_transactions,
             'categories': categories,
             'accounts': accounts,
+            # Bulk recategorization is only offered for a filtered list
+            'has_active_filters': any(filters.values()),
             'current_filters': {
                 'category': category_filter,
                 'account': account_filter,
@@ -1449,11 +1490,77 @@ def transaction_list(request):
         messages.warning(request, _("You need to set up your financial environment first."))
         return redirect('dashboard')
 
+@login_required
+def transaction_export(request):
+    """
+    Stream the household's transactions as CSV or JSON, with the same filters as the
+    transaction list. Rows are sent as they are read, so large exports start immediately
+    and use constant memory.
+    """
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.warning(request, _("You need to set up your financial environment first."))
+        return redirect('dashboard')
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponse(_("Unsupported export format."), status=400)
+    stream, content_type, extension = EXPORT_FORMATS[export_format]
+    
+    display_currency = request.GET.get('currency') or None
+    if display_currency and display_currency not in dict(CurrencyExchangeService.SUPPORTED_CURRENCIES):
+        return HttpResponse(_("Unsupported currency."), status=400)
+    
+    rows = iter_transaction_rows(
+        household,
+        parse_transaction_filters(request.GET),
+        include_recurring=request.GET.get('recurring') in ('1', 'true', 'on'),
+        display_currency=display_currency,
+    )
+    
+    response = StreamingHttpResponse(stream(rows, export_fields(display_currency)), content_type=content_type)
+    filename = f"transactions-{timezone.localdate():%Y%m%d}.{extension}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@login_required
+def transaction_bulk_recategorize(request):
+    """View to move every transaction matching the transaction list filters to another category"""
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.warning(request, _("You need to set up your financial environment first."))
+        return redirect('dashboard')
+    
+    # The filters travel with the form so that we can return to the same list
+    filter_query = request.POST.get('filters', '')
+    redirect_url = reverse('transaction_list') + (f'?{filter_query}' if filter_query else '')
+    
+    if request.method != 'POST':
+        return redirect('transaction_list')
+    
+    try:
+        category = TransactionCategory.objects.get(pk=request.POST.get('target_category'), tax_household=household)
+    except (TransactionCategory.DoesNotExist, ValueError, TypeError):
+        messages.error(request, _("Please select a category."))
+        return HttpResponseRedirect(redirect_url)
+    
+    filters = parse_transaction_filters(QueryDict(filter_query))
+    if not any(filters.values()):
+        # Without a filter the whole history would be moved to one category
+        messages.error(request, _("Please filter the transactions to recategorize first."))
+        return HttpResponseRedirect(redirect_url)
+    updated_count = recategorize_transactions(household, category, filters=filters)
+    
+    messages.success(request, _("{} transactions moved to category '{}'.").format(updated_count, category.name))
+    return HttpResponseRedirect(redirect_url)
+
 @login_required
 def recurring_transaction_list(request):
     """View to display non-transfer recurring transactions"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         recurring_transactions = Transaction.objects.filter(
             tax_household=household,
             is_recurring=True,
@@ -1476,7 +1583,7 @@ def recurring_transaction_list(request):
 def recurring_transfer_list(request):
     """View to display recurring transfers"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         
         # Get all recurring transfers (withdrawal side only)
         recurring_transfers = Transaction.objects.filter(
@@ -1502,21 +1609,137 @@ def recurring_transfer_list(request):
         messages.warning(request, _("You need to set up your financial environment first."))
         return redirect('dashboard')
 
+@login_required
+def upcoming_transactions(request):
+    """View (and JSON API for AJAX requests) of the recurring transactions due in the next N days"""
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.warning(request, _("You need to set up your financial environment first."))
+        return redirect('dashboard')
+    
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), MAX_UPCOMING_DAYS)
+    except ValueError:
+        days = 30
+    
+    occurrences = upcoming_occurrences(days, households=[household])
+    totals = {'income': Decimal('0.00'), 'expense': Decimal('0.00')}
+    for occurrence in occurrences:
+        if not occurrence.is_transfer:
+            totals[occurrence.transaction_type] += occurrence.amount
+    
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'days': days,
+            'occurrences': [
+                {
+                    'transaction_id': occurrence.parent.pk,
+                    'date': occurrence.date.strftime('%Y-%m-%d'),
+                    'description': occurrence.clean_description,
+                    'transaction_type': occurrence.transaction_type,
+                    'amount': float(occurrence.amount),
+                    'account': occurrence.account.name,
+                    'category': occurrence.category.name,
+                    'is_transfer': occurrence.is_transfer,
+                    'destination_account': occurrence.paired_transaction.account.name if occurrence.is_transfer and occurrence.paired_transaction else None,
+                }
+                for occurrence in occurrences
+            ],
+            'total_income': float(totals['income']),
+            'total_expense': float(totals['expense']),
+        })
+    
+    context = {
+        'occurrences': occurrences,
+        'days': days,
+        'total_income': totals['income'],
+        'total_expense': totals['expense'],
+    }
+    
+    return render(request, 'financial/upcoming_transactions.html', context)
+
+@login_required
+def occurrence_edit(request, pk, occurrence_date):
+    """View to skip or change a single occurrence of a recurring transaction"""
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        messages.warning(request, _("You need to set up your financial environment first."))
+        return redirect('dashboard')
+    
+    parent = get_object_or_404(
+        Transaction.objects.select_related('paired_transaction'),
+        pk=pk, tax_household=household, is_recurring=True
+    )
+    
+    # The occurrence is identified by its scheduled date, as in the ids of generated instances
+    try:
+        scheduled_date = datetime.strptime(occurrence_date, '%Y%m%d').date()
+    except ValueError:
+        raise Http404("Invalid occurrence date")
+    start_date, end_date = parent.recurrence_bounds()
+    if next_occurrence_date(start_date, parent.recurrence_period, end_date, scheduled_date) != scheduled_date:
+        raise Http404("No occurrence of this transaction is scheduled on this date")
+    if scheduled_date == parent.date:
+        messages.info(request, _("This occurrence is the recorded transaction itself, edit the transaction instead."))
+        return redirect('transaction_update', pk=parent.pk)
+    
+    # Both sides of a recurring transfer get the same change
+    parents = [parent]
+    if parent.is_transfer and parent.paired_transaction and parent.paired_transaction.is_recurring:
+        parents.append(parent.paired_transaction)
+    
+    exception = OccurrenceException.objects.filter(parent=parent, occurrence_date=scheduled_date).first()
+    if exception is None:
+        exception = OccurrenceException(parent=parent, occurrence_date=scheduled_date)
+    
+    if request.method == 'POST':
+        if 'reset' in request.POST:
+            OccurrenceException.objects.filter(parent__in=parents, occurrence_date=scheduled_date).delete()
+            messages.success(request, _("The occurrence follows its recurring transaction again."))
+            return redirect('transaction_list')
+        
+        form = OccurrenceExceptionForm(request.POST, instance=exception, parent=parent)
+        if form.is_valid():
+            with transaction.atomic():
+                if not form.has_changes():
+                    # Nothing differs from the series: no exception is kept
+                    OccurrenceException.objects.filter(parent__in=parents, occurrence_date=scheduled_date).delete()
+                else:
+                    form.save()
+                    for paired_parent in parents[1:]:
+                        OccurrenceException.objects.update_or_create(
+                            parent=paired_parent,
+                            occurrence_date=scheduled_date,
+                            defaults={
+                                'is_skipped': exception.is_skipped,
+                                'date': exception.date,
+                                'amount': exception.amount,
+                            }
+                        )
+            messages.success(request, _("Occurrence updated successfully."))
+            return redirect('transaction_list')
+    else:
+        form = OccurrenceExceptionForm(instance=exception, parent=parent)
+    
+    context = {
+        'form': form,
+        'parent': parent,
+        'scheduled_date': scheduled_date,
+        'exception': exception if exception.pk else None,
+    }
+    
+    return render(request, 'financial/occurrence_form.html', context)
+
 @login_required
 def transaction_create(request):
     """View to create a new transaction"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         
         # Check if there are payment methods available
-        payment_methods = PaymentMethod.objects.filter(is_active=True)
-        if not payment_methods.exists():
-            # Create a default payment method if none exists
-            PaymentMethod.objects.create(
-                name=_("Credit Card"),
-                icon="bi-credit-card",
-                is_active=True
-            )
+        ensure_payment_methods(household)
         
         if request.method == 'POST':
             # Debug - print all POST data
@@ -1551,7 +1774,7 @@ def transaction_create(request):
                 print(f"  {key}: {value}")
             
             # Use modified data
-            form = TransactionForm(post_data, household=household)
+            form = TransactionForm(post_data, household_ctx=request.household_ctx)
             
             if form.is_valid():
                 print("DEBUG - Form is valid")
@@ -1589,22 +1812,9 @@ def transaction_create(request):
                             source_account = form.cleaned_data['account']
                             destination_account = form.cleaned_data['destination_account']
                             
-                            # Get or create a Transfer category (using _ renamed to avoid name conflict)
-                            transfer_category, created = TransactionCategory.objects.get_or_create(
-                                tax_household=household,
-                                name="Transfer",
-                                defaults={'name': 'Transfer'}
-                            )
-                            
-                            # For transfer transactions, we need to create a special payment method if it doesn't exist
-                            bank_transfer_method, created = PaymentMethod.objects.get_or_create(
-                                name="Bank Transfer",
-                                defaults={
-                                    'name': 'Bank Transfer',
-                                    'icon': 'bi-bank',
-                                    'is_active': True
-                                }
-                            )
+                            # Transfer category and payment method (provisioned system objects, cached)
+                            transfer_category = get_transfer_category(household)
+                            bank_transfer_method = get_bank_transfer_method(household)
                                                         
                             # Get appropriate recipient for source account (debit/withdrawal)
                             source_recipient_type, source_recipient_member = source_account.get_appropriate_recipient()
@@ -1689,7 +1899,7 @@ def transaction_create(request):
                 
                 messages.error(request, error_message)
         else:
-            form = TransactionForm(household=household)
+            form = TransactionForm(household_ctx=request.household_ctx)
             form.initial = {'date': timezone.now().date()}
         
         return render(request, 'financial/transaction_form.html', {
@@ -1705,7 +1915,7 @@ def transaction_create(request):
 def transaction_update(request, pk):
     """View to update an existing transaction"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         transaction = get_object_or_404(Transaction, pk=pk, tax_household=household)
         
         # Check if this is a transfer transaction
@@ -1740,7 +1950,7 @@ def transaction_update(request, pk):
             }
             
             # Create a form pre-filled with transfer data
-            form = TransactionForm(initial=initial_data, household=household)
+            form = TransactionForm(initial=initial_data, household_ctx=request.household_ctx)
             
             # Pre-check the transfer checkbox (the form will initialize accordingly)
             form.initial['is_transfer'] = True
@@ -1772,7 +1982,7 @@ def transaction_update(request, pk):
                 # Leave the recipient fields in POST data as they were submitted
                 # They will be set appropriately when the transactions are updated
                 
-                form = TransactionForm(post_data, household=household)
+                form = TransactionForm(post_data, household_ctx=request.household_ctx)
                 
                 if form.is_valid():
                     print("DEBUG - Transfer Update - Form is valid")
@@ -1784,23 +1994,9 @@ def transaction_update(request, pk):
                     source_account = form.cleaned_data['account']
                     destination_account = form.cleaned_data['destination_account']
                     
-                    # Get or create the transfer category and payment method
-                    transfer_category = None
-                    try:
-                        transfer_category = TransactionCategory.objects.get(
-                            tax_household=household,
-                            name="Transfer"
-                        )
-                    except TransactionCategory.DoesNotExist:
-                        messages.error(request, _("Transfer category not found."))
-                        return redirect('transaction_list')
-                        
-                    bank_transfer_method = None
-                    try:
-                        bank_transfer_method = PaymentMethod.objects.get(name="Bank Transfer")
-                    except PaymentMethod.DoesNotExist:
-                        messages.error(request, _("Bank Transfer payment method not found."))
-                        return redirect('transaction_list')
+                    # Transfer category and payment method (provisioned system objects, cached)
+                    transfer_category = get_transfer_category(household)
+                    bank_transfer_method = get_bank_transfer_method(household)
                     
                     # Start a database transaction to ensure both updates are atomic
                     from django.db import transaction as db_transaction
@@ -1885,14 +2081,7 @@ def transaction_update(request, pk):
                     })
             
         # Check if there are payment methods available
-        payment_methods = PaymentMethod.objects.filter(is_active=True)
-        if not payment_methods.exists():
-            # Create a default payment method if none exists
-            PaymentMethod.objects.create(
-                name=_("Credit Card"),
-                icon="bi-credit-card",
-                is_active=True
-            )
+        ensure_payment_methods(household)
         
         # Normal (non-transfer) transaction update
         if request.method == 'POST':
@@ -1928,7 +2117,7 @@ def transaction_update(request, pk):
                 print(f"  {key}: {value}")
                 
             # Use modified data
-            form = TransactionForm(post_data, household=household, instance=transaction)
+            form = TransactionForm(post_data, household_ctx=request.household_ctx, instance=transaction)
             
             if form.is_valid():
                 print("DEBUG - Update - Form is valid")
@@ -1945,7 +2134,7 @@ def transaction_update(request, pk):
                 # Display form errors to the user
                 messages.error(request, _("There were errors in your form. Please check the error messages below."))
         else:
-            form = TransactionForm(household=household, instance=transaction)
+            form = TransactionForm(household_ctx=request.household_ctx, instance=transaction)
             print(f"DEBUG - Transaction instance date: {transaction.date}")
             print(f"DEBUG - Form initial date value: {form.initial.get('date')}")
         
@@ -1963,7 +2152,7 @@ def transaction_update(request, pk):
 def transaction_delete(request, pk):
     """View to delete a transaction"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         transaction = get_object_or_404(Transaction, pk=pk, tax_household=household)
         
         # Check if this is a transfer transaction
@@ -2025,7 +2214,7 @@ def transaction_delete(request, pk):
 def transaction_duplicate(request, pk):
     """View to duplicate a transaction"""
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
         original_transaction = get_object_or_404(Transaction, pk=pk, tax_household=household)
         
         # Check if this is a transfer transaction
@@ -2067,7 +2256,7 @@ def transaction_duplicate(request, pk):
                 # Leave the recipient fields in POST data as they were submitted
                 # They will be set appropriately when the transactions are created
                 
-                form = TransactionForm(post_data, household=household)
+                form = TransactionForm(post_data, household_ctx=request.household_ctx)
                 
                 if form.is_valid():
                     # Handle transfer creation (this is already implemented in transaction_create view)
@@ -2088,22 +2277,9 @@ def transaction_duplicate(request, pk):
                                 source_account = form.cleaned_data['account']
                                 destination_account = form.cleaned_data['destination_account']
                                 
-                                # Get or create a Transfer category
-                                try:
-                                    transfer_category = TransactionCategory.objects.get(
-                                        tax_household=household,
-                                        name="Transfer"
-                                    )
-                                except TransactionCategory.DoesNotExist:
-                                    messages.error(request, _("Transfer category not found."))
-                                    return redirect('transaction_list')
-                                
-                                # Get or create Bank Transfer payment method
-                                try:
-                                    bank_transfer_method = PaymentMethod.objects.get(name="Bank Transfer")
-                                except PaymentMethod.DoesNotExist:
-                                    messages.error(request, _("Bank Transfer payment method not found."))
-                                    return redirect('transaction_list')
+                                # Transfer category and payment method (provisioned system objects, cached)
+                                transfer_category = get_transfer_category(household)
+                                bank_transfer_method = get_bank_transfer_method(household)
                                 
                                 # Get appropriate recipient for source and destination accounts
                                 source_recipient_type, source_recipient_member = source_account.get_appropriate_recipient()
@@ -2177,7 +2353,7 @@ def transaction_duplicate(request, pk):
                     messages.error(request, error_message)
             else:
                 # For GET requests, create a new form with the initial data
-                form = TransactionForm(initial=initial_data, household=household)
+                form = TransactionForm(initial=initial_data, household_ctx=request.household_ctx)
                 form.initial['is_transfer'] = True
             
             return render(request, 'financial/transaction_form.html', {
@@ -2208,7 +2384,7 @@ def transaction_duplicate(request, pk):
             initial_data['recipient'] = original_transaction.recipient_member.id
         
         # Create a new form instance with initial data
-        form = TransactionForm(initial=initial_data, household=household)
+        form = TransactionForm(initial=initial_data, household_ctx=request.household_ctx)
         
         if request.method == 'POST':
             # Handle form submission
@@ -2231,7 +2407,7 @@ def transaction_duplicate(request, pk):
                     post_data['recipient_type'] = 'family'  # Default to family if invalid
                     post_data['recipient_member'] = ''
             
-            form = TransactionForm(post_data, household=household)
+            form = TransactionForm(post_data, household_ctx=request.household_ctx)
             
             if form.is_valid():
                 transaction_obj = form.save(commit=False)
@@ -2270,7 +2446,73 @@ def set_currency(request):
     
     # If not POST, redirect to home
     return HttpResponseRedirect('/')
+
+def analysis_conditions(household, request):
+    """
+    Filter on the expenses matching the cost center and bank account filters of the
+    request (transfers excluded). Only uses fields shared by Transaction and MonthlyRollup.
+    """
+    conditions = models.Q(tax_household=household, transaction_type='expense', is_transfer=False)
+    
+    # Cost center filter, 'none' standing for categories without a cost center
+    cost_center_ids = [cid for cid in request.GET.get('cost_centers', '').split(',') if cid]
+    if cost_center_ids:
+        cost_center_filter = models.Q(category__cost_center_id__in=[cid for cid in cost_center_ids if cid.isdigit()])
+        if 'none' in cost_center_ids:
+            cost_center_filter |= models.Q(category__cost_center__isnull=True)
+        conditions &= cost_center_filter
+    
+    # Bank account filter
+    bank_account_ids = [aid for aid in request.GET.get('bank_accounts', '').split(',') if aid.isdigit()]
+    if bank_account_ids:
+        conditions &= models.Q(account_id__in=bank_account_ids)
+    
+    return conditions
+
+def analysis_expenses(household, request, start_date, end_date):
+    """
+    Expenses of an analysis period matching the filters of the request
+    (see analysis_conditions)
+    
+    Returns:
+        Tuple (queryset, instances): the recorded expenses, and the generated instances
+        of recurring expenses in the period that are not already recorded
+    """
+    conditions = analysis_conditions(household, request)
+    expenses = Transaction.objects.filter(conditions, date__gte=start_date, date__lte=end_date)
+    
+    # Generate instances of the recurring expenses matching the same filters
+    instances = []
+    today = timezone.now().date()
+    recurring_expenses = Transaction.objects.filter(conditions, is_recurring=True).select_related(
+        'category__cost_center', 'account', 'payment_method', 'recipient_member'
+    ).prefetch_related('occurrence_exceptions__category__cost_center')
+    for recurring_expense in recurring_expenses:
+        try:
+            instances.extend(
+                recurring_expense.generate_recurring_instances(current_date=today, window_start=start_date, window_end=end_date)
+            )
+        except Exception as e:
+            print(f"Error generating recurring instances for expense analysis: {e}")
+    
+    # Instances already recorded as real expenses (same date, description and amount)
+    # are not counted twice
+    seen_expenses = set(
+        expenses.filter(date__in={instance.date for instance in instances}).values_list('date', 'description', 'amount')
+    )
+    return expenses, list(unrecorded_occurrences(instances, seen_expenses))
+
+def analysis_recipient_name(expense):
+    """Beneficiary of an expense as shown in the expense analysis"""
+    if expense.recipient_type == 'family':
+        return "Family"
+    if expense.recipient_type == 'member' and expense.recipient_member:
+        return f"{expense.recipient_member.first_name} {expense.recipient_member.last_name}"
+    return "External"
+
 @login_required
+@gzip_page
+@cached_report
 def expense_analysis(request):
     """
     View for expense analysis dashboard
@@ -2278,26 +2520,26 @@ def expense_analysis(request):
     """
     # Get user's household
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, _("You need to set up a household first"))
         return redirect('financial_settings')
     
     # Get members and their bank accounts
-    members = household.members.all()
-    if not members.exists():
+    members = request.household_ctx.members
+    if not members:
         messages.error(request, _("You need to add members to your household first"))
         return redirect('household_members')
     
     # Get all bank accounts linked to household members
-    bank_accounts = BankAccount.objects.filter(members__in=members).distinct()
-    if not bank_accounts.exists():
+    bank_accounts = BankAccount.objects.filter(tax_household=household)
+    if not request.household_ctx.accounts:
         messages.error(request, _("You need to create at least one bank account first"))
         return redirect('bank_account_list')
     
     # Default date range (last year)
     end_date = timezone.now().date()
-    start_date = end_date.replace(year=end_date.year-1)
+    start_date = end_date - relativedelta(years=1)
     
     # Process date range parameters
     custom_start_date = request.GET.get('start_date')
@@ -2339,8 +2581,8 @@ def expense_analysis(request):
         
         # Get bank accounts for this household
         all_bank_accounts = BankAccount.objects.filter(
-            members__in=members
-        ).distinct().order_by('name').values('id', 'name', 'currency')
+            tax_household=household
+        ).order_by('name').values('id', 'name', 'currency')
         
         # Return as JSON response
         return JsonResponse({
@@ -2351,245 +2593,90 @@ def expense_analysis(request):
     
     # Handle AJAX request for chart data
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        # Parse filter parameters
-        cost_centers_param = request.GET.get('cost_centers', '')
-        cost_center_ids = cost_centers_param.split(',') if cost_centers_param else []
-        
-        # Parse bank account filter parameters
-        bank_accounts_param = request.GET.get('bank_accounts', '')
-        bank_account_ids = bank_accounts_param.split(',') if bank_accounts_param else []
-        
-        # Build base query for expense transactions
-        # Exclude transfers to avoid double counting
-        base_query = Transaction.objects.filter(
-            tax_household=household,
-            transaction_type='expense',
-            date__gte=start_date,
-            date__lte=end_date,
-            is_transfer=False  # Exclude transfers
-        )
-        
-        # Get all recurring expense transactions for generating instances
-        recurring_transactions = Transaction.objects.filter(
-            tax_household=household,
-            transaction_type='expense',
-            is_recurring=True,
-            is_transfer=False  # Exclude transfers
+        instances = analysis_expenses(household, request, start_date, end_date)[1]
+        
+        # Totals per month, category, cost center, recipient and account currency, read
+        # from the monthly rollups; the expense rows themselves are served page by page
+        # by expense_analysis_transactions
+        groups = {}
+        stored_groups = period_totals(
+            analysis_conditions(household, request), start_date, end_date,
+            ('category__name', 'category__cost_center__name', 'recipient_type',
+             'recipient_member__first_name', 'recipient_member__last_name', 'account__currency')
         )
+        for group in stored_groups:
+            recipient_name = "External"
+            if group['recipient_type'] == 'family':
+                recipient_name = "Family"
+            elif group['recipient_type'] == 'member' and group['recipient_member__first_name'] is not None:
+                recipient_name = f"{group['recipient_member__first_name']} {group['recipient_member__last_name']}"
+            key = (group['month'], group['category__name'], group['category__cost_center__name'],
+                   recipient_name, group['account__currency'])
+            groups[key] = groups.get(key, Decimal('0.00')) + group['total']
+        
+        # Generated recurring instances are added to the same groups
+        for instance in instances:
+            key = (instance.date.replace(day=1), instance.category.name,
+                   instance.category.cost_center.name if instance.category.cost_center else None,
+                   analysis_recipient_name(instance), instance.account.currency)
+            groups[key] = groups.get(key, Decimal('0.00')) + instance.amount
         
-        # Apply cost center filter if provided
-        if cost_center_ids and cost_center_ids[0]:
-            # Check if we need to filter for transactions without cost centers
-            if 'none' in cost_center_ids:
-                # If 'none' is the only selected option, just show transactions without cost centers
-                if len(cost_center_ids) == 1:
-                    base_query = base_query.filter(
-                        category__cost_center__isnull=True
-                    )
-                else:
-                    # Show transactions without cost centers AND those with selected cost centers
-                    # First, create a query for categories in selected cost centers
-                    cost_center_ids_without_none = [cid for cid in cost_center_ids if cid != 'none']
-                    categories_in_cost_centers = TransactionCategory.objects.filter(
-                        cost_center_id__in=cost_center_ids_without_none,
-                        tax_household=household
-                    )
-                    
-                    # Then, combine with categories without cost center
-                    base_query = base_query.filter(
-                        # Either matches a category with one of the selected cost centers
-                        # OR matches a category without any cost center
-                        models.Q(category__in=categories_in_cost_centers) |
-                        models.Q(category__cost_center__isnull=True)
-                    )
-            else:
-                # Regular cost center filtering (no "none" option selected)
-                try:
-                    # Get all categories belonging to the selected cost centers
-                    categories_in_cost_centers = TransactionCategory.objects.filter(
-                        cost_center_id__in=cost_center_ids,
-                        tax_household=household
-                    )
-                    
-                    base_query = base_query.filter(category__in=categories_in_cost_centers)
-                except ValueError:
-                    # Handle invalid IDs
-                    pass
-        
-        # Apply bank account filter if provided
-        if bank_account_ids and bank_account_ids[0]:
-            base_query = base_query.filter(account_id__in=bank_account_ids)
-            # Also filter recurring transactions to only include those with the selected accounts
-            recurring_transactions = recurring_transactions.filter(account_id__in=bank_account_ids)
-        
-        # Get base database transactions (non-recurring + parent recurring transactions)
-        db_expenses = base_query.select_related(
-            'category', 'account', 'payment_method'
-        ).prefetch_related(
-            'category__cost_center'
-        )
-        
-        # Generate instances for recurring transactions to include in the analysis
-        recurring_instances = []
-        today = timezone.now().date()
-        
-        # Generate instances for all recurring transactions
-        for transaction in recurring_transactions:
-            try:
-                # Generate recurring instances for this transaction
-                instances = transaction.generate_recurring_instances(current_date=today)
-                
-                # Filter instances to include only those in the selected date range
-                filtered_instances = [
-                    instance for instance in instances 
-                    if instance.date >= start_date and instance.date <= end_date
-                ]
-                
-                # Apply cost center filters to instances if needed
-                if cost_center_ids and cost_center_ids[0]:
-                    if 'none' in cost_center_ids:
-                        # Complex filter for "none" option (handled below)
-                        pass
-                    else:
-                        # Filter by categories in selected cost centers
-                        categories_in_cost_centers = TransactionCategory.objects.filter(
-                            cost_center_id__in=cost_center_ids,
-                            tax_household=household
-                        )
-                        filtered_instances = [
-                            instance for instance in filtered_instances
-                            if instance.category in categories_in_cost_centers
-                        ]
-                
-                # Add filtered instances to our list
-                recurring_instances.extend(filtered_instances)
-                
-            except Exception as e:
-                print(f"Error generating recurring instances for expense analysis: {e}")
-        
-        # Combine actual transactions with recurring instances, avoiding duplicates
-        # Create a dictionary to track expenses we've already seen, using date+description+amount as key
-        seen_expenses = {}
-        all_expenses = []
-        
-        # Add database expenses first
-        for expense in db_expenses:
-            key = (expense.date, expense.description, expense.amount)
-            seen_expenses[key] = expense
-            all_expenses.append(expense)
-        
-        # Then add recurring instances, avoiding duplicates
-        for instance in recurring_instances:
-            key = (instance.date, instance.description, instance.amount)
-            if key not in seen_expenses:
-                seen_expenses[key] = instance
-                all_expenses.append(instance)
-        
-        # Use combined expenses for analysis
-        expenses = all_expenses
-        
-        # Convert all amounts to the display currency
-        converted_expenses = []
         total_expenses = Decimal('0.00')
         
         # Prepare data structures for charts
         category_data = {}  # For pie chart
         cost_center_data = {}  # For bar chart
-        monthly_data = []  # For trend chart
+        cost_center_category_data = {}  # For the categories stacked in the bar chart
+        recipient_data = {}  # For beneficiary chart
+        monthly_data = {}  # For trend chart
         
-        # Process expense data
-        for expense in expenses:
-            converted_amount = expense.amount
+        for (month, category_name, cost_center_name, recipient_name, currency), amount in groups.items():
+            converted_amount = amount
             
             # Convert currency if needed
-            if expense.account.currency != display_currency:
+            if currency != display_currency:
                 try:
-                    converted_amount = CurrencyExchangeService.convert_currency(
-                        expense.amount,
-                        expense.account.currency,
-                        display_currency
-                    )
+                    converted_amount = CurrencyExchangeService.convert_currency(amount, currency, display_currency)
                 except Exception as e:
                     print(f"ERROR - Failed to convert currency: {e}")
+                    converted_amount = None
+                if converted_amount is None:
                     # Keep original amount if conversion fails
+                    converted_amount = amount
             
-            # Add to total
             total_expenses += converted_amount
+            amount_value = float(converted_amount)
             
-            # For category pie chart
-            category_name = expense.category.name
-            if category_name in category_data:
-                category_data[category_name] += float(converted_amount)
-            else:
-                category_data[category_name] = float(converted_amount)
-            
-            # For cost center bar chart
-            cost_center_name = expense.category.cost_center.name if expense.category.cost_center else _("Not associated with a cost center")
-            if cost_center_name in cost_center_data:
-                cost_center_data[cost_center_name] += float(converted_amount)
-            else:
-                cost_center_data[cost_center_name] = float(converted_amount)
-            
-            # For monthly trend chart
-            month_key = expense.date.strftime('%Y-%m')
-            
-            # Find existing entry or create new one
-            month_entry = next((item for item in monthly_data if item['month'] == month_key), None)
+            if cost_center_name is None:
+                cost_center_name = _("Not associated with a cost center")
             
-            if month_entry:
-                # Update existing monthly entry
-                if category_name in month_entry:
-                    month_entry[category_name] += float(converted_amount)
-                else:
-                    month_entry[category_name] = float(converted_amount)
-            else:
-                # Create new monthly entry
-                new_entry = {
-                    'month': month_key,
-                    'display_month': expense.date.strftime('%b %Y'),
-                    category_name: float(converted_amount)
-                }
-                monthly_data.append(new_entry)
-            
-            # Get recipient information
-            recipient_name = "External"
-            if expense.recipient_type == 'family':
-                recipient_name = "Family"
-            elif expense.recipient_type == 'member' and expense.recipient_member:
-                recipient_name = f"{expense.recipient_member.first_name} {expense.recipient_member.last_name}"
-            
-            # Add to expense list for table
-            converted_expenses.append({
-                'date': expense.date.strftime('%Y-%m-%d'),
-                'description': expense.description,
-                'category': expense.category.name,
-                'cost_center': cost_center_name,
-                'recipient': recipient_name,
-                'amount': float(converted_amount)
-            })
+            category_data[category_name] = category_data.get(category_name, 0) + amount_value
+            cost_center_data[cost_center_name] = cost_center_data.get(cost_center_name, 0) + amount_value
+            cost_center_category = (cost_center_name, category_name)
+            cost_center_category_data[cost_center_category] = cost_center_category_data.get(cost_center_category, 0) + amount_value
+            recipient_data[recipient_name] = recipient_data.get(recipient_name, 0) + amount_value
+            month_category = (month, category_name)
+            monthly_data[month_category] = monthly_data.get(month_category, 0) + amount_value
         
         # Format data for charts
         categories_data = [{'name': cat, 'amount': amount} for cat, amount in category_data.items()]
         cost_centers_data = [{'name': cc, 'amount': amount} for cc, amount in cost_center_data.items()]
+        cost_center_categories_data = [
+            {'cost_center': cc, 'category': cat, 'amount': amount}
+            for (cc, cat), amount in cost_center_category_data.items()
+        ]
+        recipients_data = [{'name': name, 'amount': amount} for name, amount in recipient_data.items()]
         
         # Sort categories by amount (descending)
         categories_data.sort(key=lambda x: x['amount'], reverse=True)
         cost_centers_data.sort(key=lambda x: x['amount'], reverse=True)
+        recipients_data.sort(key=lambda x: x['amount'], reverse=True)
         
-        # Sort monthly data chronologically
-        monthly_data.sort(key=lambda x: x['month'])
-        
-        # Transform monthly data for the chart
-        chart_monthly_data = []
-        for entry in monthly_data:
-            month = entry['display_month']
-            for category, amount in entry.items():
-                if category not in ['month', 'display_month']:
-                    chart_monthly_data.append({
-                        'month': month,
-                        'category': category,
-                        'amount': amount
-                    })
+        # Monthly data for the chart, chronologically
+        chart_monthly_data = [
+            {'month': month.strftime('%b %Y'), 'category': category, 'amount': amount}
+            for (month, category), amount in sorted(monthly_data.items(), key=lambda item: item[0][0])
+        ]
         
         # Calculate monthly average
         days_in_range = (end_date - start_date).days + 1
@@ -2600,9 +2687,6 @@ def expense_analysis(request):
         top_category = max(category_data.items(), key=lambda x: x[1], default=(None, 0))
         top_cost_center = max(cost_center_data.items(), key=lambda x: x[1], default=(None, 0))
         
-        # Sort expenses by date (newest first)
-        converted_expenses.sort(key=lambda x: x['date'], reverse=True)
-        
         # Build response
         response_data = {
             'currency': display_currency,
@@ -2612,10 +2696,14 @@ def expense_analysis(request):
             'top_cost_center': top_cost_center[0],
             'categories_data': categories_data,
             'cost_centers_data': cost_centers_data,
-            'monthly_data': chart_monthly_data,
-            'expenses': converted_expenses
+            'cost_center_categories_data': cost_center_categories_data,
+            'recipients_data': recipients_data,
+            'monthly_data': chart_monthly_data
         }
         
+        if compact_requested(request):
+            return fast_json_response(compact_analysis_data(response_data))
+        
         return JsonResponse(response_data)
     
     # For regular page request, render the template with context
@@ -2628,7 +2716,133 @@ def expense_analysis(request):
     
     return render(request, 'reporting/expense_analysis.html', context)
 
+# Sort keys of the expense analysis table and the lookups they order by
+EXPENSE_TABLE_ORDERING = {
+    'date': 'date',
+    'description': 'description',
+    'category': 'category__name',
+    'cost_center': 'category__cost_center__name',
+    'account': 'account__name',
+    'amount': 'amount',
+}
+
 @login_required
+@gzip_page
+@cached_report
+def expense_analysis_transactions(request):
+    """
+    Rows of the expense analysis table, one page at a time
+    
+    Uses the same period and filters as the expense analysis charts. Query parameters:
+    search (description or category), sort (a key of EXPENSE_TABLE_ORDERING; amounts are
+    sorted in their account currency), direction ('asc' or 'desc'), page and page_size.
+    """
+    try:
+        household = request.household_ctx.household
+    except TaxHousehold.DoesNotExist:
+        return JsonResponse({'error': 'Household not found'}, status=404)
+    
+    # Default date range (last year)
+    end_date = timezone.now().date()
+    start_date = end_date - relativedelta(years=1)
+    if request.GET.get('start_date') and request.GET.get('end_date'):
+        try:
+            start_date = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return JsonResponse({'error': 'Invalid date format'}, status=400)
+    
+    display_currency = request.GET.get('display_currency', request.session.get('currency', 'EUR'))
+    
+    sort = request.GET.get('sort', 'date')
+    if sort not in EXPENSE_TABLE_ORDERING:
+        return JsonResponse({'error': 'Invalid sort column'}, status=400)
+    prefix = '' if request.GET.get('direction') == 'asc' else '-'
+    order_by = [prefix + EXPENSE_TABLE_ORDERING[sort]]
+    if sort != 'date':
+        order_by.append('-date')
+    
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+        page_size = min(100, max(1, int(request.GET.get('page_size', 25))))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid page'}, status=400)
+    
+    expenses, instances = analysis_expenses(household, request, start_date, end_date)
+    
+    search = request.GET.get('search', '').strip()
+    if search:
+        expenses = expenses.filter(
+            models.Q(description__icontains=search) | models.Q(category__name__icontains=search)
+        )
+        instances = [
+            instance for instance in instances
+            if search.lower() in instance.description.lower() or search.lower() in instance.category.name.lower()
+        ]
+    
+    rows, count = merged_page(
+        expenses.select_related('category__cost_center', 'account', 'recipient_member'),
+        instances, order_by, page, page_size
+    )
+    
+    table_rows = []
+    for expense in rows:
+        converted_amount = expense.amount
+        if expense.account.currency != display_currency:
+            converted_amount = CurrencyExchangeService.convert_currency(
+                expense.amount,
+                expense.account.currency,
+                display_currency
+            ) or expense.amount
+        table_rows.append({
+            'id': str(expense.id),
+            'date': expense.date.strftime('%Y-%m-%d'),
+            'description': expense.description,
+            'category': expense.category.name,
+            'cost_center': expense.category.cost_center.name if expense.category.cost_center else _("Not associated with a cost center"),
+            'account': expense.account.name,
+            'recipient': analysis_recipient_name(expense),
+            'amount': float(converted_amount),
+            'is_generated': getattr(expense, '_is_generated', False)
+        })
+    
+    return JsonResponse({
+        'currency': display_currency,
+        'rows': table_rows,
+        'count': count,
+        'page': page,
+        'page_size': page_size,
+        'num_pages': max(1, -(-count // page_size))
+    })
+
+def compact_analysis_data(response_data):
+    """
+    Compact format of the expense / income analysis data: the transaction and monthly
+    rows are sent column by column, with categories, cost centers, recipients and
+    months stored once (see core/utils/compact.py)
+    """
+    if 'expenses' in response_data:
+        response_data['expenses'] = encode_table(
+            response_data['expenses'],
+            dictionary_columns=('date', 'category', 'cost_center', 'recipient'),
+            value_columns=('amount',)
+        )
+    if 'cost_center_categories_data' in response_data:
+        response_data['cost_center_categories_data'] = encode_table(
+            response_data['cost_center_categories_data'],
+            dictionary_columns=('cost_center', 'category'),
+            value_columns=('amount',)
+        )
+    response_data['monthly_data'] = encode_table(
+        response_data['monthly_data'],
+        dictionary_columns=('month', 'category'),
+        value_columns=('amount',)
+    )
+    return response_data
+
+@login_required
+@gzip_page
+@cached_report
 def income_analysis(request):
     """
     View for income analysis dashboard
@@ -2640,7 +2854,7 @@ def income_analysis(request):
     
     # Get user's household first
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, _("You need to set up a household first"))
         return redirect('financial_settings')
@@ -2713,26 +2927,26 @@ def income_analysis(request):
     
     # Get user's household
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, _("You need to set up a household first"))
         return redirect('financial_settings')
     
     # Get members and their bank accounts
-    members = household.members.all()
-    if not members.exists():
+    members = request.household_ctx.members
+    if not members:
         messages.error(request, _("You need to add members to your household first"))
         return redirect('household_members')
     
     # Get all bank accounts linked to household members
-    bank_accounts = BankAccount.objects.filter(members__in=members).distinct()
-    if not bank_accounts.exists():
+    bank_accounts = BankAccount.objects.filter(tax_household=household)
+    if not request.household_ctx.accounts:
         messages.error(request, _("You need to create at least one bank account first"))
         return redirect('bank_account_list')
     
     # Default date range (last year)
     end_date = timezone.now().date()
-    start_date = end_date.replace(year=end_date.year-1)
+    start_date = end_date - relativedelta(years=1)
     
     # Process date range parameters
     custom_start_date = request.GET.get('start_date')
@@ -2774,8 +2988,8 @@ def income_analysis(request):
         
         # Get bank accounts for this household
         all_bank_accounts = BankAccount.objects.filter(
-            members__in=members
-        ).distinct().order_by('name').values('id', 'name', 'currency')
+            tax_household=household
+        ).order_by('name').values('id', 'name', 'currency')
         
         # Return as JSON response
         return JsonResponse({
@@ -2873,16 +3087,12 @@ def income_analysis(request):
         today = timezone.now().date()
         
         # Generate instances for all recurring transactions
-        for transaction in recurring_transactions:
+        for transaction in recurring_transactions.prefetch_related('occurrence_exceptions__category__cost_center'):
             try:
-                # Generate recurring instances for this transaction
-                instances = transaction.generate_recurring_instances(current_date=today)
-                
-                # Filter instances to include only those in the selected date range
-                filtered_instances = [
-                    instance for instance in instances 
-                    if instance.date >= start_date and instance.date <= end_date
-                ]
+                # Generate the recurring instances of this transaction in the selected date range
+                filtered_instances = transaction.generate_recurring_instances(
+                    current_date=today, window_start=start_date, window_end=end_date
+                )
                 
                 # Apply cost center filters to instances if needed
                 if cost_center_ids and cost_center_ids[0]:
@@ -2918,11 +3128,7 @@ def income_analysis(request):
             all_incomes.append(income)
         
         # Then add recurring instances, avoiding duplicates
-        for instance in recurring_instances:
-            key = (instance.date, instance.description, instance.amount)
-            if key not in seen_incomes:
-                seen_incomes[key] = instance
-                all_incomes.append(instance)
+        all_incomes.extend(unrecorded_occurrences(recurring_instances, seen_incomes))
         
         # Use combined incomes for analysis
         incomes = all_incomes
@@ -3062,6 +3268,9 @@ def income_analysis(request):
             'expenses': converted_incomes  # Using same field name as expense page for JS compatibility
         }
         
+        if compact_requested(request):
+            return fast_json_response(compact_analysis_data(response_data))
+        
         return JsonResponse(response_data)
     
     # For regular page request, render the template with context
@@ -3076,25 +3285,27 @@ def income_analysis(request):
     return render(request, 'reporting/income_analysis.html', context)
 
 @login_required
+@gzip_page
+@cached_report
 def account_overview(request):
     """View for displaying account overview with balances by member and account type"""
     
     # Get user's household
     try:
-        household = request.user.tax_household
+        household = request.household_ctx.household
     except TaxHousehold.DoesNotExist:
         messages.error(request, _("You need to set up a household first"))
         return redirect('financial_settings')
     
     # Get members and their bank accounts
-    members = household.members.all()
-    if not members.exists():
+    members = request.household_ctx.members
+    if not members:
         messages.error(request, _("You need to add members to your household first"))
         return redirect('household_members')
     
     # Get all bank accounts linked to household members
-    bank_accounts = BankAccount.objects.filter(members__in=members).distinct()
-    if not bank_accounts.exists():
+    bank_accounts = BankAccount.objects.filter(tax_household=household)
+    if not request.household_ctx.accounts:
         messages.error(request, _("You need to create at least one bank account first"))
         return redirect('bank_account_list')
     
@@ -3132,89 +3343,61 @@ def account_overview(request):
             'accounts': []
         }
         
-        # Track which accounts have been processed
-        processed_accounts = set()
+        # Stored current balances only need refreshing once a day
+        refresh_current_balances(bank_accounts)
         
-        # Process each member
-        for member in members:
-            member_accounts = bank_accounts.filter(members=member)
-            member_data = {
-                'id': member.id,
-                'name': f"{member.first_name} {member.last_name}",
-                'accounts': []
-            }
+        # One query for all accounts with their owner count and owner (for personal accounts)
+        accounts = bank_accounts.annotate(
+            owners_count=models.Count('members', distinct=True),
+            owner_id=models.Min('members__id')
+        )
+        
+        # Exchange rates are looked up once per account currency
+        conversion_factors = {}
+        member_accounts = {member.id: [] for member in members}
+        
+        for account in accounts:
+            current_balance = account.current_balance
             
-            # Process each account for this member
-            for account in member_accounts:
-                # Skip if this account has already been fully processed for this member
-                if account.id in processed_accounts:
-                    continue
-                
-                # Calculate current balance for this account
-                today = timezone.now().date()
-                initial_balance = account.balance or Decimal('0.00')
-                initial_balance_date = account.balance_date or today
-                
-                # Get transactions since balance date
-                transactions = Transaction.objects.filter(
-                    account=account,
-                    date__gt=initial_balance_date,
-                    date__lte=today
-                )
-                
-                # Calculate current balance by applying transactions
-                current_balance = initial_balance
-                for txn in transactions:
-                    amount = Decimal(str(txn.amount)) if not isinstance(txn.amount, Decimal) else txn.amount
-                    if txn.transaction_type == 'income':
-                        current_balance += amount
-                    else:  # expense
-                        current_balance -= amount
-                
-                # Convert to display currency if needed
-                display_balance = current_balance
-                if display_currency != account.currency:
+            # Convert to display currency if needed
+            display_balance = current_balance
+            if display_currency != account.currency:
+                if account.currency not in conversion_factors:
                     try:
-                        display_balance = CurrencyExchangeService.convert_currency(
-                            current_balance,
+                        conversion_factors[account.currency] = CurrencyExchangeService.convert_currency(
+                            Decimal('1'),
                             account.currency,
                             display_currency
                         )
                     except Exception as e:
                         print(f"ERROR - Failed to convert currency: {e}")
-                        # Keep using original balance if conversion fails
-                
-                # Check if this is a personal account (1 owner) or family account (multiple owners)
-                account_owners_count = account.members.count()
-                
-                if account_owners_count == 1:
-                    # Personal account - add to member's data
-                    member_data['accounts'].append({
-                        'type_id': account.account_type.id,
-                        'balance': float(display_balance)
-                    })
-                    
-                    # Add to the account type totals
-                    account_type_totals[account.account_type.id] += display_balance
-                    
-                    # Mark as processed to avoid duplicates
-                    processed_accounts.add(account.id)
-                elif account_owners_count > 1 and account.id not in processed_accounts:
-                    # Family account - add to family data
-                    family_data['accounts'].append({
-                        'type_id': account.account_type.id,
-                        'balance': float(display_balance)
-                    })
-                    
-                    # Add to the account type totals
-                    account_type_totals[account.account_type.id] += display_balance
-                    
-                    # Mark as processed to avoid duplicates
-                    processed_accounts.add(account.id)
+                        conversion_factors[account.currency] = None
+                # Keep using original balance if conversion fails
+                if conversion_factors[account.currency] is not None:
+                    display_balance = current_balance * conversion_factors[account.currency]
+            
+            account_data = {
+                'type_id': account.account_type_id,
+                'balance': float(display_balance)
+            }
             
-            # Add member data to result if they have accounts
-            if member_data['accounts']:
-                data['members'].append(member_data)
+            # Personal accounts (1 owner) belong to their member, shared accounts to the family
+            if account.owners_count == 1:
+                member_accounts[account.owner_id].append(account_data)
+            else:
+                family_data['accounts'].append(account_data)
+            
+            # Add to the account type totals
+            account_type_totals[account.account_type_id] += display_balance
+        
+        # Add member data to result if they have accounts
+        for member in members:
+            if member_accounts[member.id]:
+                data['members'].append({
+                    'id': member.id,
+                    'name': f"{member.first_name} {member.last_name}",
+                    'accounts': member_accounts[member.id]
+                })
         
         # Add family data to result if it has accounts
         if family_data['accounts']:
@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.HouseholdContextMiddleware',  # Lazy per-request household data
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,6 +80,7 @@ TEMPLATES = [
                 'django.template.context_processors.i18n',  # Add i18n context processor
                 'core.context_processors.language_context',  # Our custom context processor
                 'core.context_processors.currency_context',  # Currency context processor
+                'core.context_processors.household_context',  # Per-request household data
             ],
         },
     },
@@ -178,3 +180,10 @@ LOGOUT_REDIRECT_URL = 'login'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Lifetime of cached report responses (they are invalidated earlier by any data change)
+REPORT_CACHE_TIMEOUT = 60 * 60
+
+# Lifetime of the cached transaction form choices (dropped earlier when members,
+# accounts, categories or payment methods change)
+FORM_CHOICES_CACHE_TIMEOUT = 24 * 60 * 60
@@ -0,0 +1,65 @@
+/*
+ * Expands report payloads requested with ?format=compact (see core/utils/compact.py)
+ * back into the regular JSON structure, so charts can use them unchanged.
+ */
+(function(window) {
+    function isoDate(start, offset) {
+        const date = new Date(start + 'T00:00:00Z');
+        date.setUTCDate(date.getUTCDate() + offset);
+        return date.toISOString().slice(0, 10);
+    }
+
+    function expandDates(encoded) {
+        if (encoded.step !== undefined) {
+            return Array.from({ length: encoded.count }, (_, index) => isoDate(encoded.start, index * encoded.step));
+        }
+        let offset = 0;
+        return encoded.deltas.map(delta => isoDate(encoded.start, offset += delta));
+    }
+
+    function expandDeltas(deltas, scale) {
+        let total = 0;
+        return deltas.map(delta => (total += delta) / scale);
+    }
+
+    function expandTable(table) {
+        const columns = table.columns.map((column, index) => {
+            const values = expandCompact(table.values[index]);
+            const dictionary = table.dictionaries[column];
+            return dictionary ? values.map(position => dictionary[position]) : values;
+        });
+        const size = columns.length ? columns[0].length : 0;
+        return Array.from({ length: size }, (_, row) => {
+            const item = {};
+            table.columns.forEach((column, index) => {
+                item[column] = columns[index][row];
+            });
+            return item;
+        });
+    }
+
+    function expandCompact(value) {
+        if (Array.isArray(value)) {
+            return value.map(expandCompact);
+        }
+        if (value === null || typeof value !== 'object') {
+            return value;
+        }
+        if ('$dates' in value) {
+            return expandDates(value.$dates);
+        }
+        if ('$deltas' in value) {
+            return expandDeltas(value.$deltas, value.scale);
+        }
+        if ('$table' in value) {
+            return expandTable(value.$table);
+        }
+        const result = {};
+        Object.keys(value).forEach(key => {
+            result[key] = expandCompact(value[key]);
+        });
+        return result;
+    }
+
+    window.expandCompact = expandCompact;
+})(window);